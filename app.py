@@ -7,12 +7,40 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
+import copy
+import hmac
+import json
+import uuid
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import custom modules
 from utils.data_fetcher import DataFetcher
 from utils.analyzer import SentimentAnalyzer
+from utils.sentiment_backends import create_backend as create_sentiment_backend
+from utils.profiler import monitor
+from utils.rollups import TrendRollups
+from utils.anomaly import AnomalyDetector
+from utils.co_mentions import CoMentionGraph
+from utils.deep_analysis import DeepContentAnalyzer
+from utils.market_data import MarketData
+from utils.figure_cache import FigureCache
+from utils.downsampling import downsample, target_points
+from utils.filter_index import FilterIndex
+from utils.ingestion_worker import DatasetStore, IngestionWorker
+from utils.fetch_planner import FetchPlanner
+from utils.key_validator import KeyValidator
+from utils.search_index import SearchIndex, tokenize
+from utils.article_store import ArticleStore
+from utils.out_of_core import OutOfCoreEngine
+from utils.maintenance import StorageMaintainer
+from utils.shared_backend import create_backend
+from utils.snapshots import SnapshotManager
+from utils.api_server import AggregatesAPI, start_in_background
+from utils.session_memory import DatasetRegistry, derive_key, fork
+from utils.derived_state import empty_state, build_version, assign_stories, descend
+from utils.story_clustering import StoryClusterer, story_summary, competitor_story_stats
+from utils import charts
 import config
 
 # Page configuration
@@ -117,22 +145,337 @@ def load_css():
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_fetch_planner():
+    """Process-wide fetch planner so API quota is tracked across sessions"""
+    return FetchPlanner()
+
+@st.cache_resource
+def get_article_store():
+    """Process-wide Parquet article history, or None when persistence is disabled"""
+    if not config.STORAGE_CONFIG['persist']:
+        return None
+    return ArticleStore()
+
+@st.cache_resource
+def get_shared_backend():
+    """Cache/dataset backend shared by every replica (in-process when running a single one)"""
+    return create_backend()
+
+@st.cache_resource
+def get_key_validator():
+    """Process-wide key checker; results are shared across replicas through the shared backend, probes count against quota"""
+    return KeyValidator(backend=get_shared_backend(), planner=get_fetch_planner())
+
+@st.cache_resource
+def get_sentiment_backend():
+    """Process-wide sentiment backend, so the model loads once and its score cache serves every session"""
+    try:
+        return create_sentiment_backend(config.SENTIMENT_CONFIG)
+    except ValueError:
+        # The analyzer reports the misconfiguration and falls back to VADER/TextBlob
+        return None
+
+@st.cache_resource
+def get_deep_analyzer():
+    """Process-wide deep content analyzer, sharing its sentence cache and worker pool"""
+    return DeepContentAnalyzer()
+
+@st.cache_resource
+def get_market_data():
+    """Process-wide price bar cache for the market reaction view"""
+    return MarketData()
+
+@st.cache_resource
+def get_dataset_registry():
+    """Process-wide dataset versions that sessions reference instead of holding private copies"""
+    return DatasetRegistry()
+
+@st.cache_resource
+def get_snapshot_manager():
+    """Process-wide manager of memory-mapped dataset snapshots, or None when persistence is disabled"""
+    if not config.STORAGE_CONFIG['persist']:
+        return None
+    return SnapshotManager()
+
+@st.cache_resource
+def get_api_server():
+    """Aggregates API served next to the dashboard when enabled"""
+    snapshots = get_snapshot_manager()
+    if not config.API_CONFIG['enabled'] or snapshots is None:
+        return None
+    return start_in_background(AggregatesAPI(snapshots))
+
+@st.cache_resource
+def get_ingestion_worker():
+    """Process-wide background ingestion worker and the dataset store it publishes to"""
+    # A single process keeps deltas in memory; replicas exchange them through the shared backend
+    shared = config.SHARED_BACKEND_CONFIG['backend'] != 'local'
+    store = DatasetStore(
+        backend=get_shared_backend() if shared else None,
+        poll_seconds=config.SHARED_BACKEND_CONFIG['version_poll_seconds']
+    )
+    snapshots = get_snapshot_manager()
+    article_store = get_article_store()
+    worker = IngestionWorker(
+        store,
+        planner=get_fetch_planner(),
+        article_store=article_store,
+        snapshots=snapshots,
+        validator=get_key_validator(),
+        deep_analyzer=get_deep_analyzer(),
+        sentiment_backend=get_sentiment_backend(),
+        maintainer=StorageMaintainer(article_store, snapshots) if article_store is not None else None
+    )
+    if snapshots is not None and store.backend is None:
+        # After a restart, continue from the last snapshot: its rows, version numbering, URLs and derived state
+        latest = snapshots.load_latest()
+        if latest is not None:
+            dataset, tables, meta = latest
+            store.seed(dataset, meta['dataset_version'])
+            worker.resume(dataset, tables, meta['dataset_version'])
+    return worker
+
 class StrategicIntelligenceDashboard:
+    SAMPLE_KEY = 'sample'
+    
     def __init__(self):
-        self.data_fetcher = DataFetcher()
-        self.analyzer = SentimentAnalyzer()
+        self.data_fetcher = DataFetcher(planner=get_fetch_planner(), validator=get_key_validator())
+        # The fetcher is rebuilt on every rerun; saved keys live in the session
+        self.data_fetcher.newsapi_key = st.session_state.get('newsapi_key')
+        self.data_fetcher.gnews_key = st.session_state.get('gnews_key')
+        self.analyzer = SentimentAnalyzer(backend=get_sentiment_backend())
         self.df = None
+        self.filter_key = ()
+        self.ingestion_worker = get_ingestion_worker()
+        self.article_store = get_article_store()
+        self.snapshots = get_snapshot_manager()
+        self.api_server = get_api_server()
+        self.registry = get_dataset_registry()
+        self._empty_state = None
         self.initialize_session_state()
+        self.restore_evicted_dataset()
+        self.analyzer.rules = st.session_state.scoring_rules
+    
+    @property
+    def news_data(self):
+        """The shared dataset version this session references"""
+        df = self.registry.get(st.session_state.session_id)
+        return df if df is not None else pd.DataFrame()
+    
+    @property
+    def state(self):
+        """Structures derived from the session's dataset version, shared by every session referencing it"""
+        state = self.registry.state(st.session_state.session_id)
+        if state is None:
+            if self._empty_state is None:
+                self._empty_state = empty_state(pd.DataFrame())
+            state = self._empty_state
+        return state
     
     def initialize_session_state(self):
         """Initialize session state variables"""
         if 'api_keys_configured' not in st.session_state:
             st.session_state.api_keys_configured = False
-        if 'news_data' not in st.session_state:
-            st.session_state.news_data = pd.DataFrame()
+        if 'session_id' not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
         if 'analysis_complete' not in st.session_state:
             st.session_state.analysis_complete = False
+        if 'dataset_version' not in st.session_state:
+            st.session_state.dataset_version = 0
+        if 'figure_cache' not in st.session_state:
+            st.session_state.figure_cache = FigureCache(config.FIGURE_CACHE_CONFIG['max_entries'])
+        if 'ingest_version' not in st.session_state:
+            st.session_state.ingest_version = 0
+            # Worker rows are only appended onto datasets built from the worker's own versions
+            st.session_state.follows_worker = True
+        if 'snapshot_checked' not in st.session_state:
+            st.session_state.snapshot_checked = True
+            self.load_snapshot()
+        if 'scoring_rules' not in st.session_state:
+            st.session_state.scoring_rules = SentimentAnalyzer.default_rules()
+            st.session_state.applied_rules = SentimentAnalyzer.default_rules()
+    
+    def load_dataset(self, df, key=None):
+        """Replace the session dataset; `df` may be a callable, run only if no session has loaded `key` yet"""
+        def build():
+            frame = df() if callable(df) else df
+            return build_version(frame, shared_stories=False)
+        # Fetched data is private to the session unless the caller names a shareable version
+        self.publish_dataset(key or derive_key('private', uuid.uuid4().hex), build)
+        # Sample and fetched frames are not worker versions; appending worker rows would mix the two
+        st.session_state.follows_worker = False
+        st.session_state.ingest_version = 0
+    
+    def restore_evicted_dataset(self):
+        """Start over from the latest snapshot when this session's dataset was evicted while idle"""
+        if not st.session_state.analysis_complete or self.registry.key(st.session_state.session_id) is not None:
+            return
+        monitor.increment('session_memory.restores')
+        # The derived structures went with the evicted version
+        st.session_state.analysis_complete = False
+        st.session_state.ingest_version = 0
+        st.session_state.dataset_version += 1
+        st.session_state.figure_cache.invalidate()
+        # Reloaded rows carry default scores; the session's rules are re-applied on the next render
+        st.session_state.applied_rules = SentimentAnalyzer.default_rules()
+        st.session_state.dataset_evicted = True
+        self.load_snapshot()
     
+    def load_snapshot(self):
+        """Start the session from the latest published snapshot instead of an empty dashboard"""
+        if self.snapshots is None or st.session_state.analysis_complete:
+            return
+        latest = self.snapshots.latest_meta()
+        if latest is None:
+            return
+        
+        path, meta = latest
+        # Every session starting from this snapshot shares one frame and one set of derived structures;
+        # only the first one reads the tables
+        key = derive_key('snapshot', meta['dataset_version'], meta['created_at'])
+        self.publish_dataset(key, lambda: self.build_snapshot_version(*self.snapshots.load(path)))
+        st.session_state.ingest_version = meta['dataset_version']
+        st.session_state.follows_worker = True
+    
+    def build_snapshot_version(self, df, tables, meta):
+        """A dataset version and its derived structures from a snapshot's precomputed tables"""
+        state = empty_state(df)
+        # Rollups come precomputed; the search index builds lazily on the first query
+        state['rollups'] = TrendRollups.from_tables({
+            granularity: tables.get(f"rollup_{granularity}") for granularity in TrendRollups.GRANULARITIES
+        })
+        # Baselines, co-mentions and story ids come precomputed too, so nothing here walks the corpus in Python
+        if 'daily_trend' in tables and not tables['daily_trend'].empty:
+            trend = tables['daily_trend']
+            state['anomaly_detector'].add_daily(
+                trend['date'], trend['competitor'], trend['article_count'],
+                trend['sentiment_score'] * trend['article_count'],
+                latest=pd.to_datetime(df['published_at'], utc=True).max().tz_localize(None)
+            )
+        else:
+            state['anomaly_detector'].update(df)
+        # Fitted up front so sessions sharing the detector only ever read it
+        state['anomaly_detector'].fit()
+        if 'co_mentions_entity' in tables and 'co_mentions_competitor' in tables:
+            state['co_mentions'] = CoMentionGraph.from_tables(tables)
+        else:
+            state['co_mentions'].update(df)
+        return assign_stories(df, state), state
+    
+    def append_dataset(self, new_rows, since_version, latest_version):
+        """Append newly ingested rows to the session dataset"""
+        parent_key = self.registry.key(st.session_state.session_id)
+        parent_df, parent_state = self.news_data, self.state
+        applied_rules = st.session_state.applied_rules
+        
+        def build():
+            rows = new_rows
+            # Rows from the background worker are scored with the config defaults
+            if applied_rules != SentimentAnalyzer.default_rules():
+                rows = self.analyzer.relabel(rows, previous_rules=SentimentAnalyzer.default_rules())
+            return build_version(rows, parent_df, parent_state)
+        # Sessions that started from the same version and saw the same deltas end up sharing a frame
+        self.publish_dataset(derive_key(parent_key, 'append', since_version, latest_version), build)
+    
+    def publish_dataset(self, key, build):
+        """Point the session at dataset version `key`, building it and its derived structures only if no session has"""
+        self.registry.acquire(st.session_state.session_id, key, build)
+        st.session_state.analysis_complete = True
+        
+        # New data invalidates every cached figure
+        st.session_state.dataset_version += 1
+        st.session_state.figure_cache.invalidate()
+    
+    def apply_scoring_rules(self):
+        """Re-derive labels from stored raw scores when the session's scoring rules changed"""
+        rules = st.session_state.scoring_rules
+        if rules == st.session_state.applied_rules:
+            return
+        
+        news_data, parent_state = self.news_data, self.state
+        if not news_data.empty:
+            applied_rules = st.session_state.applied_rules
+            
+            def build():
+                relabelled = self.analyzer.relabel(news_data, previous_rules=applied_rules)
+                # Rows keep their story ids; only the stories' scores change
+                df, state = build_version(relabelled)
+                state['shared_stories'] = parent_state['shared_stories']
+                # Same rows in the same positions, so the parent's search index still applies
+                descend(state, parent_state, len(news_data))
+                state['story_clusterer'] = fork(parent_state['story_clusterer'])
+                state['story_clusterer'].rescore(relabelled)
+                return df, state
+            key = derive_key(self.registry.key(st.session_state.session_id), 'rules', json.dumps(rules, sort_keys=True))
+            self.publish_dataset(key, build)
+        st.session_state.applied_rules = copy.deepcopy(rules)
+    
+    def render_scoring_rules(self):
+        """Render controls for sentiment weights and thresholds"""
+        rules = st.session_state.scoring_rules
+        
+        with st.sidebar.expander("⚖️ Scoring Rules", expanded=False):
+            vader_weight = st.slider(
+                "VADER Weight",
+                min_value=0.0,
+                max_value=1.0,
+                value=float(rules['vader_weight']),
+                step=0.05,
+                help="TextBlob receives the remaining weight"
+            )
+            positive_threshold = st.slider(
+                "Positive Threshold",
+                min_value=0.0,
+                max_value=0.5,
+                value=float(rules['positive_threshold']),
+                step=0.01
+            )
+            negative_threshold = st.slider(
+                "Negative Threshold",
+                min_value=-0.5,
+                max_value=0.0,
+                value=float(rules['negative_threshold']),
+                step=0.01
+            )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Apply", use_container_width=True):
+                    rules = dict(rules)
+                    rules['vader_weight'] = round(vader_weight, 2)
+                    rules['textblob_weight'] = round(1 - vader_weight, 2)
+                    rules['positive_threshold'] = positive_threshold
+                    rules['negative_threshold'] = negative_threshold
+                    st.session_state.scoring_rules = rules
+                    st.rerun()
+            with col2:
+                if st.button("Reset", use_container_width=True):
+                    st.session_state.scoring_rules = SentimentAnalyzer.default_rules()
+                    st.rerun()
+    
+    def search_articles(self, query):
+        """Search the session dataset, indexing rows added since the last search first"""
+        state, news_data = self.state, self.news_data
+        search_index = state['search_index']
+        try:
+            added = search_index.sync(news_data, state['token'], state['lineage'])
+        except ValueError:
+            # Another branch of the dataset already extended the shared index; this version indexes on its own
+            search_index = state['search_index'] = SearchIndex()
+            added = search_index.sync(news_data, state['token'], state['lineage'])
+        # The index is shared with every session on this version and counted against the memory budget
+        if added:
+            self.registry.remeasure(st.session_state.session_id)
+        # Versions derived from this one may have indexed rows past its own
+        return search_index.search(query, max_row=len(news_data))
+    
+    def cached_figure(self, chart_id, builder, filtered_df):
+        """Build a chart once per dataset version and filter state"""
+        key = (st.session_state.dataset_version, self.filter_key, chart_id)
+        return st.session_state.figure_cache.get_or_build(key, lambda: builder(filtered_df))
+    
+    @monitor.timed('render.api_key_input')
     def render_api_key_input(self):
         """Render API key input section"""
         st.sidebar.header("🔑 API Configuration")
@@ -163,7 +506,7 @@ class StrategicIntelligenceDashboard:
                             st.session_state.api_keys_configured = True
                             st.session_state.newsapi_key = newsapi_key
                             st.session_state.gnews_key = gnews_key
-                            st.success("✅ API keys configured successfully!")
+                            st.success("✅ API keys saved! They are verified in the background.")
                             st.rerun()
                     else:
                         st.error("❌ Please enter at least one API key")
@@ -171,11 +514,28 @@ class StrategicIntelligenceDashboard:
             with col2:
                 if st.button("🔄 Use Sample Data", use_container_width=True):
                     st.session_state.api_keys_configured = True
-                    st.session_state.news_data = self.create_sample_data()
-                    st.session_state.analysis_complete = True
+                    # One sample dataset serves every session that asks for it
+                    self.load_dataset(self.create_sample_data, key=self.SAMPLE_KEY)
                     st.success("✅ Loaded sample data for demonstration!")
                     st.rerun()
+            
+            self.render_key_status()
+    
+    def render_key_status(self):
+        """Show the background verification state of the saved keys"""
+        validator = self.data_fetcher.validator
+        labels = {
+            'valid': "✅ verified",
+            'invalid': "❌ rejected",
+            'pending': "⏳ checking...",
+            'unknown': "❔ not verified yet"
+        }
+        for provider, name in (('newsapi', 'NewsAPI'), ('gnews', 'GNews')):
+            key = st.session_state.get(f"{provider}_key")
+            if key:
+                st.caption(f"{name} key: {labels[validator.status(provider, key)]}")
     
+    @monitor.timed('render.data_fetching_section')
     def render_data_fetching_section(self):
         """Render data fetching controls"""
         st.sidebar.header("📥 Data Configuration")
@@ -206,6 +566,20 @@ class StrategicIntelligenceDashboard:
             help="How far back to search for articles"
         )
         
+        deep_analysis = st.sidebar.checkbox(
+            "🔬 Deep Content Analysis",
+            value=config.DEEP_ANALYSIS_CONFIG['enabled'],
+            help="Also score the article body sentence by sentence, per mentioned competitor (slower)"
+        )
+        self.analyzer.deep = get_deep_analyzer() if deep_analysis else None
+        
+        # Remaining provider quota
+        usage = self.data_fetcher.planner.usage()
+        st.sidebar.caption(" • ".join(
+            f"{provider}: {stats['remaining']}/{stats['quota']} calls left today"
+            for provider, stats in usage.items()
+        ))
+        
         # Fetch data button
         if st.sidebar.button("🚀 Fetch & Analyze Data", type="primary", use_container_width=True):
             if not selected_competitors:
@@ -228,21 +602,137 @@ class StrategicIntelligenceDashboard:
                 with st.spinner("🧠 Analyzing sentiment and emotions..."):
                     analyzed_data = self.analyzer.analyze_dataframe(fetched_data)
                 
-                st.session_state.news_data = analyzed_data
-                st.session_state.analysis_complete = True
+                self.load_dataset(analyzed_data)
+                store = self.ingestion_worker.store
+                if store.backend is None:
+                    # Share the rows like a background run, so snapshots and the API include them;
+                    # with a shared backend only the lease holder may write versions
+                    with st.spinner("📦 Publishing snapshot..."):
+                        fresh = self.ingestion_worker.publish_rows(analyzed_data)
+                else:
+                    fresh = store.unseen(analyzed_data)
+                # Articles already in the history are not written again
+                if self.article_store is not None and not fresh.empty:
+                    self.article_store.append(fresh)
                 st.success("✅ Data analysis complete! Check the dashboard below.")
                 st.rerun()
             else:
                 st.error("❌ No data fetched. Please check your API keys and try again.")
+        
+        self.render_background_refresh(selected_competitors, articles_per_query, days_back, deep_analysis)
+    
+    def render_background_refresh(self, selected_competitors, articles_per_query, days_back, deep_analysis=False):
+        """Render controls for the scheduled background ingestion worker"""
+        worker = self.ingestion_worker
+        
+        with st.sidebar.expander("⏱️ Background Refresh", expanded=worker.is_alive()):
+            # The worker is process-wide, so only sessions holding the admin token may reconfigure or toggle it
+            admin_token = config.INGESTION_CONFIG['admin_token']
+            if not admin_token:
+                st.caption("Set DASHBOARD_ADMIN_TOKEN to control background refresh from the dashboard")
+            else:
+                token = st.text_input("Admin Token", type="password", key='ingestion_admin_token')
+                if token and hmac.compare_digest(token.encode('utf-8'), admin_token.encode('utf-8')):
+                    self.render_worker_controls(selected_competitors, articles_per_query, days_back, deep_analysis)
+                elif token:
+                    st.error("❌ Invalid admin token")
+            
+            status = worker.status
+            if status['running']:
+                st.caption("🔄 Ingestion in progress...")
+            elif status['last_run']:
+                st.caption(f"Last run {status['last_run']}: {status['last_rows']} new articles")
+            if status['changed_by']:
+                st.caption(f"Last started or stopped by {status['changed_by']}")
+            if status['lease_held'] is False:
+                st.caption("🔁 Another replica holds the ingestion lease; showing its data")
+            if status['last_error']:
+                st.caption(f"❌ Last error: {status['last_error']}")
+    
+    def render_worker_controls(self, selected_competitors, articles_per_query, days_back, deep_analysis):
+        """Admin-only schedule and on/off controls of the background ingestion worker"""
+        worker = self.ingestion_worker
+        changed_by = f"session {st.session_state.session_id[:8]} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        interval_minutes = st.slider(
+            "Refresh Interval (Minutes)",
+            min_value=5,
+            max_value=240,
+            value=config.INGESTION_CONFIG['interval_minutes'],
+            help="How often the background worker fetches and analyzes new articles"
+        )
+        enabled = st.checkbox(
+            "Enable background refresh",
+            value=worker.is_alive(),
+            help="Fetch and analyze on a schedule without blocking the dashboard"
+        )
+        
+        if enabled:
+            newsapi_key = st.session_state.get('newsapi_key')
+            gnews_key = st.session_state.get('gnews_key')
+            if not (newsapi_key or gnews_key):
+                st.warning("⚠️ Save an API key to enable background refresh")
+            elif not selected_competitors:
+                st.warning("⚠️ Please select at least one competitor")
+            else:
+                worker.configure(
+                    newsapi_key=newsapi_key,
+                    gnews_key=gnews_key,
+                    competitors={comp: config.COMPETITORS[comp] for comp in selected_competitors},
+                    articles_per_query=articles_per_query,
+                    days_back=days_back,
+                    interval_minutes=interval_minutes,
+                    deep_analysis=deep_analysis
+                )
+                worker.start(changed_by=changed_by)
+                if st.button("Refresh Now", use_container_width=True):
+                    worker.trigger()
+        elif worker.is_alive():
+            worker.stop(changed_by=changed_by)
+    
+    def sync_background_data(self):
+        """Pick up rows published by the background worker since this session last looked"""
+        store = self.ingestion_worker.store
+        if not st.session_state.follows_worker or store.version <= st.session_state.ingest_version:
+            return
+        
+        since = st.session_state.ingest_version
+        latest, new_rows = store.changes_since(since)
+        st.session_state.ingest_version = latest
+        if not new_rows.empty:
+            self.append_dataset(new_rows, since, latest)
+    
+    def render_refresh_poller(self):
+        """Cheaply poll the dataset store and rerun the page when new rows are published"""
+        fragment = getattr(st, 'fragment', None)
+        store = self.ingestion_worker.store
+        if fragment is None or not (self.ingestion_worker.is_alive() or store.backend is not None):
+            return
+        if not st.session_state.follows_worker:
+            return
+        
+        @fragment(run_every=config.INGESTION_CONFIG['poll_seconds'])
+        def poll_dataset_store():
+            if store.version > st.session_state.ingest_version:
+                st.rerun()
+        
+        poll_dataset_store()
     
+    @monitor.timed('render.dashboard_controls')
     def render_dashboard_controls(self):
         """Render dashboard controls"""
         st.sidebar.header("🎛️ Dashboard Controls")
         
+        # Full-text search
+        search_query = st.sidebar.text_input(
+            "Search Articles",
+            placeholder="e.g. earnings guidance",
+            help="Ranked search over article titles and text, combined with the filters below"
+        ).strip()
+        
         # Analysis type
         analysis_type = st.sidebar.selectbox(
             "Analysis Focus",
-            options=['Overall Dashboard', 'Competitor Comparison', 'Trend Analysis', 'Emotion Analysis', 'Source Analysis'],
+            options=['Overall Dashboard', 'Competitor Comparison', 'Trend Analysis', 'Emotion Analysis', 'Source Analysis', 'Market Reaction', 'Historical Overview'],
             help="Choose what type of analysis to focus on"
         )
         
@@ -254,10 +744,10 @@ class StrategicIntelligenceDashboard:
             help="Filter articles by sentiment"
         )
         
+        filter_index = self.state['filter_index']
+        
         # Source filters
-        available_sources = []
-        if not st.session_state.news_data.empty:
-            available_sources = st.session_state.news_data['source'].unique().tolist()
+        available_sources = filter_index.values['source']
         
         source_filter = st.sidebar.multiselect(
             "Filter by Source",
@@ -266,10 +756,37 @@ class StrategicIntelligenceDashboard:
             help="Filter articles by news source"
         )
         
+        # Competitor filters
+        available_competitors = filter_index.values['competitor']
+        
+        competitor_filter = st.sidebar.multiselect(
+            "Filter by Competitor",
+            options=available_competitors,
+            default=available_competitors,
+            help="Filter articles by competitor"
+        )
+        
+        # Date filter
+        date_filter = None
+        first_day, last_day = filter_index.date_bounds()
+        if first_day is not None:
+            selected_dates = st.sidebar.date_input(
+                "Filter by Date",
+                value=(first_day, last_day),
+                min_value=first_day,
+                max_value=last_day,
+                help="Filter articles by publication date"
+            )
+            if isinstance(selected_dates, (list, tuple)) and len(selected_dates) == 2:
+                date_filter = tuple(selected_dates)
+        
         return {
             'analysis_type': analysis_type,
+            'search_query': search_query,
             'sentiment_filter': sentiment_filter,
-            'source_filter': source_filter
+            'source_filter': source_filter,
+            'competitor_filter': competitor_filter,
+            'date_filter': date_filter
         }
     
     def create_sample_data(self):
@@ -323,6 +840,7 @@ class StrategicIntelligenceDashboard:
         df['published_at'] = pd.to_datetime(df['published_at'])
         return df
     
+    @monitor.timed('render.kpi_metrics')
     def render_kpi_metrics(self, filtered_df):
         """Render KPI metrics at the top"""
         st.markdown("### 📈 Key Performance Indicators")
@@ -331,7 +849,7 @@ class StrategicIntelligenceDashboard:
             st.warning("No data available for the selected filters.")
             return
         
-        col1, col2, col3, col4, col5 = st.columns(5)
+        col1, col2, col3, col4, col5, col6 = st.columns(6)
         
         with col1:
             total_articles = len(filtered_df)
@@ -378,7 +896,18 @@ class StrategicIntelligenceDashboard:
                 <div class="metric-value">{unique_sources}</div>
             </div>
             """, unsafe_allow_html=True)
+        
+        with col6:
+            # Syndicated copies of one story count once here
+            unique_stories = filtered_df['story_id'].nunique() if 'story_id' in filtered_df.columns else total_articles
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-label">Unique Stories</div>
+                <div class="metric-value">{unique_stories}</div>
+            </div>
+            """, unsafe_allow_html=True)
     
+    @monitor.timed('render.sentiment_analysis')
     def render_sentiment_analysis(self, filtered_df):
         """Render sentiment analysis section"""
         st.markdown('<div class="section-header">📊 Sentiment Analysis</div>', unsafe_allow_html=True)
@@ -387,40 +916,15 @@ class StrategicIntelligenceDashboard:
         
         with col1:
             # Sentiment distribution pie chart
-            sentiment_counts = filtered_df['sentiment_label'].value_counts()
-            fig = px.pie(
-                values=sentiment_counts.values,
-                names=sentiment_counts.index,
-                title="Sentiment Distribution",
-                color=sentiment_counts.index,
-                color_discrete_map={
-                    'Positive': '#2ecc71',
-                    'Negative': '#e74c3c',
-                    'Neutral': '#f39c12'
-                }
-            )
-            fig.update_traces(textposition='inside', textinfo='percent+label')
+            fig = self.cached_figure('sentiment_pie', charts.sentiment_distribution_pie, filtered_df)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Sentiment distribution by competitor
-            sentiment_by_competitor = pd.crosstab(
-                filtered_df['competitor'], 
-                filtered_df['sentiment_label']
-            )
-            fig = px.bar(
-                sentiment_by_competitor,
-                title="Sentiment Distribution by Competitor",
-                barmode='stack',
-                color_discrete_map={
-                    'Positive': '#2ecc71',
-                    'Negative': '#e74c3c',
-                    'Neutral': '#f39c12'
-                }
-            )
-            fig.update_layout(xaxis_title="Competitor", yaxis_title="Number of Articles")
+            fig = self.cached_figure('sentiment_by_competitor', charts.sentiment_by_competitor_bar, filtered_df)
             st.plotly_chart(fig, use_container_width=True)
     
+    @monitor.timed('render.competitor_comparison')
     def render_competitor_comparison(self, filtered_df):
         """Render competitor comparison section"""
         st.markdown('<div class="section-header">🏢 Competitor Comparison</div>', unsafe_allow_html=True)
@@ -429,29 +933,12 @@ class StrategicIntelligenceDashboard:
         
         with col1:
             # Average sentiment by competitor
-            avg_sentiment = filtered_df.groupby('competitor')['sentiment_score'].mean().sort_values()
-            fig = px.bar(
-                x=avg_sentiment.values,
-                y=avg_sentiment.index,
-                orientation='h',
-                title="Average Sentiment Score by Competitor",
-                color=avg_sentiment.values,
-                color_continuous_scale='RdYlGn',
-                color_continuous_midpoint=0
-            )
-            fig.update_layout(xaxis_title="Sentiment Score", yaxis_title="Competitor")
+            fig = self.cached_figure('avg_sentiment_by_competitor', charts.average_sentiment_by_competitor_bar, filtered_df)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Sentiment score distribution
-            fig = px.box(
-                filtered_df,
-                x='competitor',
-                y='sentiment_score',
-                title="Sentiment Score Distribution by Competitor",
-                color='competitor'
-            )
-            fig.update_layout(showlegend=False)
+            fig = self.cached_figure('sentiment_box', charts.sentiment_score_box, filtered_df)
             st.plotly_chart(fig, use_container_width=True)
         
         # Competitor performance matrix
@@ -461,28 +948,63 @@ class StrategicIntelligenceDashboard:
             'subjectivity': 'mean'
         }).round(3)
         competitor_stats.columns = ['Avg Sentiment', 'Article Count', 'Avg Subjectivity']
+        if 'story_id' in filtered_df.columns:
+            story_stats = competitor_story_stats(filtered_df).round(3)
+            competitor_stats['Story Count'] = story_stats['count']
+            competitor_stats['Story-Weighted Sentiment'] = story_stats['mean']
         competitor_stats = competitor_stats.sort_values('Avg Sentiment', ascending=False)
         
         st.dataframe(competitor_stats.style.background_gradient(
             subset=['Avg Sentiment'], cmap='RdYlGn'
         ), use_container_width=True)
     
-    def render_trend_analysis(self, filtered_df):
+    @monitor.timed('render.trend_analysis')
+    def render_trend_analysis(self, filtered_df, filters):
         """Render trend analysis section"""
         st.markdown('<div class="section-header">📈 Trend Analysis</div>', unsafe_allow_html=True)
         
-        # Convert to datetime and extract date
-        filtered_df['date'] = pd.to_datetime(filtered_df['published_at']).dt.date
+        trend_days = st.slider(
+            "Trend Range (Days)",
+            min_value=1,
+            max_value=365,
+            value=30,
+            help="Trends are read from hourly, daily or weekly rollups depending on the range"
+        )
+        
+        rollups = self.state['rollups']
+        rollup_filters = {
+            'competitors': filters['competitor_filter'],
+            'sources': filters['source_filter'],
+            'sentiments': filters['sentiment_filter'],
+            'date_range': filters['date_filter']
+        }
+        if tokenize(filters['search_query']):
+            # Rollups cannot answer for search hits; roll up the filtered rows instead, once per filter state
+            def build():
+                search_rollups = TrendRollups()
+                search_rollups.update(filtered_df)
+                return search_rollups
+            rollups = st.session_state.figure_cache.get_or_build(
+                (st.session_state.dataset_version, self.filter_key, 'trend_rollups'), build
+            )
+        granularity, competitor_trend = rollups.competitor_trend(trend_days, **rollup_filters)
+        _, overall_trend = rollups.overall_trend(trend_days, **rollup_filters)
+        period = {'hourly': 'Hourly', 'daily': 'Daily', 'weekly': 'Weekly'}[granularity]
         
-        # Daily sentiment trend
-        daily_sentiment = filtered_df.groupby(['date', 'competitor'])['sentiment_score'].mean().reset_index()
+        if competitor_trend.empty:
+            st.info("No trend data available for the selected range.")
+            return
         
+        # Never send more points than the chart width can resolve
+        full_width, half_width = target_points(), target_points(0.5)
+        
+        # Sentiment trend per competitor
         fig = px.line(
-            daily_sentiment,
-            x='date',
+            downsample(competitor_trend, 'bucket', 'sentiment_score', full_width, group='competitor'),
+            x='bucket',
             y='sentiment_score',
             color='competitor',
-            title="Daily Sentiment Trend by Competitor",
+            title=f"{period} Sentiment Trend by Competitor",
             markers=True
         )
         fig.update_layout(xaxis_title="Date", yaxis_title="Average Sentiment Score")
@@ -493,30 +1015,45 @@ class StrategicIntelligenceDashboard:
         
         with col1:
             # Volume trend
-            daily_volume = filtered_df.groupby('date').size().reset_index(name='count')
             fig = px.area(
-                daily_volume,
-                x='date',
+                downsample(overall_trend, 'bucket', 'count', half_width, method='minmax'),
+                x='bucket',
                 y='count',
-                title="Daily Article Volume Trend"
+                title=f"{period} Article Volume Trend"
             )
             fig.update_layout(xaxis_title="Date", yaxis_title="Number of Articles")
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Sentiment trend with moving average
-            sentiment_trend = filtered_df.groupby('date')['sentiment_score'].mean().reset_index()
+            sentiment_trend = overall_trend[['bucket', 'sentiment_score']].copy()
             sentiment_trend['moving_avg'] = sentiment_trend['sentiment_score'].rolling(window=3).mean()
             
             fig = px.line(
-                sentiment_trend,
-                x='date',
+                downsample(sentiment_trend, 'bucket', 'sentiment_score', half_width),
+                x='bucket',
                 y=['sentiment_score', 'moving_avg'],
-                title="Overall Sentiment Trend (with 3-day Moving Average)",
-                labels={'value': 'Sentiment Score', 'variable': 'Metric'}
+                title="Overall Sentiment Trend (with 3-period Moving Average)",
+                labels={'value': 'Sentiment Score', 'variable': 'Metric', 'bucket': 'Date'}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Distinct stories rather than syndicated copies
+        if 'story_id' in filtered_df.columns:
+            published = pd.to_datetime(filtered_df['published_at'])
+            daily_stories = filtered_df.groupby([published.dt.date.rename('date'), 'competitor'])['story_id'].nunique().reset_index(name='stories')
+            fig = px.line(
+                downsample(daily_stories, 'date', 'stories', full_width, group='competitor'),
+                x='date',
+                y='stories',
+                color='competitor',
+                title="Daily Distinct Stories by Competitor",
+                markers=True
             )
+            fig.update_layout(xaxis_title="Date", yaxis_title="Number of Stories")
             st.plotly_chart(fig, use_container_width=True)
     
+    @monitor.timed('render.emotion_analysis')
     def render_emotion_analysis(self, filtered_df):
         """Render emotion analysis section"""
         st.markdown('<div class="section-header">😊 Emotion Analysis</div>', unsafe_allow_html=True)
@@ -525,28 +1062,12 @@ class StrategicIntelligenceDashboard:
         
         with col1:
             # Emotion distribution
-            emotion_counts = filtered_df['emotion'].value_counts()
-            fig = px.pie(
-                values=emotion_counts.values,
-                names=emotion_counts.index,
-                title="Emotion Distribution in Articles"
-            )
-            fig.update_traces(textposition='inside', textinfo='percent+label')
+            fig = self.cached_figure('emotion_pie', charts.emotion_distribution_pie, filtered_df)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Emotion by competitor heatmap
-            emotion_by_competitor = pd.crosstab(
-                filtered_df['competitor'],
-                filtered_df['emotion'],
-                normalize='index'
-            )
-            fig = px.imshow(
-                emotion_by_competitor,
-                title="Emotion Distribution Heatmap by Competitor",
-                aspect="auto",
-                color_continuous_scale='Blues'
-            )
+            fig = self.cached_figure('emotion_heatmap', charts.emotion_heatmap, filtered_df)
             st.plotly_chart(fig, use_container_width=True)
         
         # Emotion-sentiment correlation
@@ -559,6 +1080,7 @@ class StrategicIntelligenceDashboard:
             subset=['Average Sentiment'], cmap='RdYlGn'
         ), use_container_width=True)
     
+    @monitor.timed('render.source_analysis')
     def render_source_analysis(self, filtered_df):
         """Render source analysis section"""
         st.markdown('<div class="section-header">📰 Source Analysis</div>', unsafe_allow_html=True)
@@ -567,57 +1089,93 @@ class StrategicIntelligenceDashboard:
         
         with col1:
             # Source distribution
-            source_counts = filtered_df['source'].value_counts().head(10)
-            fig = px.bar(
-                x=source_counts.values,
-                y=source_counts.index,
-                orientation='h',
-                title="Top 10 News Sources",
-                color=source_counts.values,
-                color_continuous_scale='viridis'
-            )
-            fig.update_layout(xaxis_title="Number of Articles", yaxis_title="Source")
+            fig = self.cached_figure('top_sources', charts.top_sources_bar, filtered_df)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Sentiment by source
-            source_sentiment = filtered_df.groupby('source')['sentiment_score'].mean().sort_values().tail(10)
-            fig = px.bar(
-                x=source_sentiment.values,
-                y=source_sentiment.index,
-                orientation='h',
-                title="Average Sentiment by Source (Top 10)",
-                color=source_sentiment.values,
-                color_continuous_scale='RdYlGn',
-                color_continuous_midpoint=0
-            )
-            fig.update_layout(xaxis_title="Average Sentiment Score", yaxis_title="Source")
+            fig = self.cached_figure('sentiment_by_source', charts.sentiment_by_source_bar, filtered_df)
             st.plotly_chart(fig, use_container_width=True)
     
+    @monitor.timed('render.entity_analysis')
     def render_entity_analysis(self, filtered_df):
         """Render entity analysis section"""
         st.markdown('<div class="section-header">🔍 Key Entities & Topics</div>', unsafe_allow_html=True)
         
-        # Extract all entities
-        all_entities = []
-        for entities in filtered_df['entities']:
-            if isinstance(entities, list):
-                all_entities.extend(entities)
-        
-        entity_counts = pd.Series(all_entities).value_counts().head(15)
-        
-        fig = px.bar(
-            x=entity_counts.values,
-            y=entity_counts.index,
-            orientation='h',
-            title="Top 15 Mentioned Entities",
-            color=entity_counts.values,
-            color_continuous_scale='viridis'
-        )
-        fig.update_layout(xaxis_title="Frequency", yaxis_title="Entity")
+        fig = self.cached_figure('top_entities', charts.top_entities_bar, filtered_df)
         st.plotly_chart(fig, use_container_width=True)
+        
+        self.render_co_mention_network(filtered_df)
     
-    def render_alert_system(self, filtered_df):
+    @monitor.timed('render.co_mention_network')
+    def render_co_mention_network(self, filtered_df):
+        """Render who is mentioned with whom over a recent window"""
+        st.subheader("🕸️ Co-mention Network")
+        
+        window_days = st.slider(
+            "Co-mention Window (Days)",
+            min_value=1,
+            max_value=90,
+            value=7,
+            help="Counts articles mentioning both ends of an edge within the window"
+        )
+        graph = self.state['co_mentions']
+        competitors = list(filtered_df['competitor'].unique()) if not filtered_df.empty else None
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            entity_edges = graph.top_edges('entity', days=window_days, competitors=competitors)
+            if entity_edges.empty:
+                st.info("No competitor-topic co-mentions in this window.")
+            else:
+                entity_edges['edge'] = entity_edges['source'] + ' ↔ ' + entity_edges['target']
+                fig = px.bar(
+                    entity_edges.sort_values('articles'),
+                    x='articles',
+                    y='edge',
+                    orientation='h',
+                    title="Top Competitor-Topic Co-mentions",
+                    color='articles',
+                    color_continuous_scale='blues'
+                )
+                fig.update_layout(xaxis_title="Articles", yaxis_title="")
+                st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            matrix = graph.competitor_matrix(days=window_days)
+            if competitors:
+                # Selected competitors against everyone they were mentioned with
+                matrix = matrix.loc[[name for name in matrix.index if name in competitors]]
+                matrix = matrix.loc[:, matrix.any()]
+            if matrix.empty or not matrix.to_numpy().any():
+                st.info("No competitors mentioned together in this window.")
+            else:
+                fig = px.imshow(
+                    matrix,
+                    title="Competitor Co-mentions",
+                    color_continuous_scale='blues',
+                    aspect='auto'
+                )
+                st.plotly_chart(fig, use_container_width=True)
+    
+    @monitor.timed('alerts.detector')
+    def alert_detector(self, filters):
+        """Baselines over the rows the sentiment and source filters keep; the shared detector when they keep every row"""
+        mask = self.state['filter_index'].mask(sentiments=filters['sentiment_filter'], sources=filters['source_filter'])
+        if mask is None:
+            return self.state['anomaly_detector']
+        
+        def build():
+            detector = AnomalyDetector()
+            detector.update(self.news_data.iloc[np.flatnonzero(mask)][['published_at', 'competitor', 'sentiment_score']])
+            return detector
+        # Dates and competitors are left out: baselines need the full history of every competitor
+        key = (st.session_state.dataset_version, self.filter_key[:2], 'anomaly_detector')
+        return st.session_state.figure_cache.get_or_build(key, build)
+    
+    @monitor.timed('render.alert_system')
+    def render_alert_system(self, filtered_df, filters):
         """Render alert system"""
         st.markdown('<div class="section-header">🚨 Key Alerts & Insights</div>', unsafe_allow_html=True)
         
@@ -625,35 +1183,106 @@ class StrategicIntelligenceDashboard:
             st.info("No data available for generating alerts.")
             return
         
+        detector = self.alert_detector(filters)
+        competitors = list(filtered_df['competitor'].unique())
+        baselined = detector.baselined(competitors)
+        anomalies = None
         alerts = []
+        if baselined:
+            anomalies = detector.detect(competitors=baselined)
+            alerts = self.anomaly_alerts(anomalies)
+        pending = [competitor for competitor in competitors if competitor not in baselined]
+        if pending:
+            # Fixed rules for the competitors without enough history for a baseline yet
+            alerts += self.threshold_alerts(filtered_df[filtered_df['competitor'].isin(pending)])
         
-        # Check for negative sentiment spikes in last 3 days
-        recent_cutoff = datetime.now() - timedelta(days=3)
-        recent_data = filtered_df[filtered_df['published_at'] >= recent_cutoff]
+        # Display alerts
+        if not alerts:
+            st.success("🎉 No critical alerts at this time. Market sentiment appears stable.")
+        else:
+            self.render_alerts(alerts)
         
-        if not recent_data.empty:
-            negative_spike = recent_data[recent_data['sentiment_label'] == 'Negative']
-            if len(negative_spike) > 8:
+        if anomalies is not None and not anomalies.empty:
+            with st.expander("Anomaly details", expanded=False):
+                details = anomalies.copy()
+                details['date'] = details['date'].dt.date
+                st.dataframe(details.round(3), use_container_width=True)
+    
+    def render_alerts(self, alerts):
+        """Render alert boxes styled by alert type"""
+        for alert in alerts:
+            if alert['type'] == 'danger':
+                st.markdown(f'<div class="alert-box alert-danger">🚨 {alert["message"]}</div>', unsafe_allow_html=True)
+            elif alert['type'] == 'warning':
+                st.markdown(f'<div class="alert-box alert-warning">⚠️ {alert["message"]}</div>', unsafe_allow_html=True)
+            else:
+                st.markdown(f'<div class="alert-box alert-success">✅ {alert["message"]}</div>', unsafe_allow_html=True)
+    
+    def anomaly_alerts(self, anomalies):
+        """Turn baseline deviations into alerts, strongest per competitor and metric"""
+        alerts = []
+        strongest = anomalies.drop_duplicates(['competitor', 'metric'])
+        for row in strongest.itertuples(index=False):
+            day = row.date.strftime('%b %d')
+            confidence = f"{row.confidence:.0%} confidence"
+            severity = 'High' if row.confidence >= 0.99 else 'Medium'
+            if row.metric == 'volume':
+                direction = 'spike' if row.z_score > 0 else 'drop'
+                alerts.append({
+                    'type': 'warning',
+                    'message': f"📊 {row.competitor} coverage {direction} on {day}: {row.observed:.0f} articles vs {row.expected:.1f} expected ({confidence})",
+                    'severity': severity
+                })
+            elif row.z_score < 0:
                 alerts.append({
                     'type': 'danger',
-                    'message': f"⚠️ High negative sentiment spike: {len(negative_spike)} negative articles in last 3 days",
-                    'severity': 'High'
+                    'message': f"🔴 {row.competitor} sentiment fell on {day}: {row.observed:.2f} vs baseline {row.expected:.2f} ({confidence})",
+                    'severity': severity
                 })
-            
-            # Check for positive momentum
-            positive_spike = recent_data[recent_data['sentiment_label'] == 'Positive']
-            if len(positive_spike) > 10:
+            else:
                 alerts.append({
                     'type': 'success',
-                    'message': f"📈 Strong positive momentum: {len(positive_spike)} positive articles in last 3 days",
-                    'severity': 'Medium'
+                    'message': f"🟢 {row.competitor} sentiment rose on {day}: {row.observed:.2f} vs baseline {row.expected:.2f} ({confidence})",
+                    'severity': severity
                 })
+        return alerts
+    
+    def threshold_alerts(self, filtered_df):
+        """Fixed-count and fixed-threshold alerts over the filtered data"""
+        # Check for sentiment spikes in last 3 days
+        recent_cutoff = datetime.now() - timedelta(days=3)
+        recent_data = filtered_df[filtered_df['published_at'] >= recent_cutoff]
+        competitor_stats = filtered_df.groupby('competitor', sort=False).agg(
+            avg_sentiment=('sentiment_score', 'mean'),
+            article_count=('competitor', 'size')
+        ).reset_index()
+        return self.rule_alerts(
+            int((recent_data['sentiment_label'] == 'Negative').sum()),
+            int((recent_data['sentiment_label'] == 'Positive').sum()),
+            competitor_stats
+        )
+    
+    def rule_alerts(self, recent_negative, recent_positive, competitor_stats):
+        """The fixed rules over recent label counts and per-competitor average sentiment and article count"""
+        alerts = []
+        if recent_negative > 8:
+            alerts.append({
+                'type': 'danger',
+                'message': f"⚠️ High negative sentiment spike: {recent_negative} negative articles in last 3 days",
+                'severity': 'High'
+            })
+        
+        # Check for positive momentum
+        if recent_positive > 10:
+            alerts.append({
+                'type': 'success',
+                'message': f"📈 Strong positive momentum: {recent_positive} positive articles in last 3 days",
+                'severity': 'Medium'
+            })
         
         # Competitor-specific alerts
-        for competitor in filtered_df['competitor'].unique():
-            comp_data = filtered_df[filtered_df['competitor'] == competitor]
-            avg_sentiment = comp_data['sentiment_score'].mean()
-            article_count = len(comp_data)
+        for row in competitor_stats.itertuples(index=False):
+            competitor, avg_sentiment, article_count = row.competitor, row.avg_sentiment, row.article_count
             
             if avg_sentiment < -0.3 and article_count > 5:
                 alerts.append({
@@ -667,19 +1296,174 @@ class StrategicIntelligenceDashboard:
                     'message': f"🟢 {competitor} showing strongly positive sentiment ({avg_sentiment:.2f}) across {article_count} articles",
                     'severity': 'Medium'
                 })
+        return alerts
+    
+    @monitor.timed('render.market_reaction')
+    def render_market_reaction(self, filtered_df):
+        """Render how competitor stock prices moved around their news"""
+        st.markdown('<div class="section-header">💹 Market Reaction</div>', unsafe_allow_html=True)
+        
+        market = get_market_data()
+        available = market.available()
+        if not available:
+            st.info(
+                f"No price files found. Add OHLC bars as {market.price_dir}/<TICKER>.parquet or .csv "
+                f"with timestamp and close columns for: {', '.join(sorted(market.tickers.values()))}"
+            )
+            return
+        if filtered_df.empty:
+            st.info("No data available for market analysis.")
+            return
         
-        # Display alerts
-        if not alerts:
-            st.success("🎉 No critical alerts at this time. Market sentiment appears stable.")
+        try:
+            events = market.event_returns(filtered_df)
+            correlation = market.lagged_correlation(filtered_df)
+        except (ValueError, ImportError) as e:
+            st.error(f"❌ Could not read price data: {e}")
+            return
+        
+        st.caption(f"Price data for: {', '.join(f'{name} ({ticker})' for name, ticker in available.items())}")
+        
+        if not correlation.empty and correlation.notna().to_numpy().any():
+            fig = px.imshow(
+                correlation.T,
+                title="Sentiment vs. Daily Return Correlation by Lag (days; positive = sentiment leads)",
+                color_continuous_scale='RdYlGn',
+                color_continuous_midpoint=0,
+                aspect='auto'
+            )
+            fig.update_layout(xaxis_title="Lag (Days)", yaxis_title="Competitor")
+            st.plotly_chart(fig, use_container_width=True)
         else:
-            for alert in alerts:
-                if alert['type'] == 'danger':
-                    st.markdown(f'<div class="alert-box alert-danger">🚨 {alert["message"]}</div>', unsafe_allow_html=True)
-                elif alert['type'] == 'warning':
-                    st.markdown(f'<div class="alert-box alert-warning">⚠️ {alert["message"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="alert-box alert-success">✅ {alert["message"]}</div>', unsafe_allow_html=True)
+            st.info("Not enough overlapping days of news and prices to estimate correlations.")
+        
+        if events.empty:
+            st.info("No articles fall within the price history.")
+            return
+        
+        horizons = config.MARKET_CONFIG['horizons']
+        return_columns = [f'return_{horizon}' for horizon in horizons]
+        reaction = events.groupby('sentiment_label')[return_columns].mean().mul(100)
+        reaction.columns = horizons
+        reaction = reaction.reset_index().melt(id_vars='sentiment_label', var_name='horizon', value_name='return_pct')
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            fig = px.bar(
+                reaction,
+                x='horizon',
+                y='return_pct',
+                color='sentiment_label',
+                barmode='group',
+                title="Average Return After News by Sentiment",
+                color_discrete_map={'Positive': '#2ecc71', 'Negative': '#e74c3c', 'Neutral': '#95a5a6'}
+            )
+            fig.update_layout(xaxis_title="Horizon", yaxis_title="Return (%)")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            summary = events.groupby('competitor').agg(
+                articles=('sentiment_score', 'size'),
+                avg_sentiment=('sentiment_score', 'mean'),
+                **{f"avg_{column}": (column, 'mean') for column in return_columns}
+            )
+            st.dataframe(summary.round(4), use_container_width=True)
     
+    @monitor.timed('render.historical_overview')
+    def render_historical_overview(self, filters):
+        """Render aggregates over the full stored history with out-of-core scans"""
+        st.markdown('<div class="section-header">🗄️ Historical Overview</div>', unsafe_allow_html=True)
+        
+        if self.article_store is None or not self.article_store.has_data():
+            st.info("No stored article history yet. Fetched data is persisted automatically.")
+            return
+        
+        try:
+            engine = OutOfCoreEngine(self.article_store)
+        except ImportError as e:
+            st.error(f"❌ {e}")
+            return
+        
+        scan_filters = {
+            'sentiments': filters['sentiment_filter'],
+            'sources': filters['source_filter'],
+            'competitors': filters['competitor_filter'],
+            'date_range': filters['date_filter']
+        }
+        st.caption(
+            f"Streaming scan of {len(self.article_store.segment_paths())} segments and "
+            f"{len(self.article_store.daily_paths())} monthly daily-aggregate files with {engine.engine}"
+        )
+        
+        # Alerts over the whole history; recent articles are always in the raw segments
+        if self.article_store.segment_paths():
+            alert_stats = engine.alert_scan(**scan_filters)
+            # The same fixed rules as the live alerts, including the per-competitor ones
+            self.render_alerts(self.rule_alerts(
+                int(alert_stats['recent_negative'].sum()),
+                int(alert_stats['recent_positive'].sum()),
+                alert_stats
+            ))
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            competitor_stats = engine.competitor_stats(**scan_filters)
+            fig = px.bar(
+                competitor_stats.sort_values('avg_sentiment'),
+                x='avg_sentiment',
+                y='competitor',
+                orientation='h',
+                title="Average Sentiment by Competitor (All History)",
+                color='avg_sentiment',
+                color_continuous_scale='RdYlGn',
+                color_continuous_midpoint=0
+            )
+            fig.update_layout(xaxis_title="Sentiment Score", yaxis_title="Competitor")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            source_stats = engine.source_stats(**scan_filters).head(10)
+            fig = px.bar(
+                source_stats.sort_values('article_count'),
+                x='article_count',
+                y='source',
+                orientation='h',
+                title="Top 10 News Sources (All History)",
+                color='article_count',
+                color_continuous_scale='viridis'
+            )
+            fig.update_layout(xaxis_title="Number of Articles", yaxis_title="Source")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        daily_trend = engine.daily_trend(**scan_filters)
+        fig = px.line(
+            downsample(daily_trend, 'date', 'sentiment_score', target_points(), group='competitor'),
+            x='date',
+            y='sentiment_score',
+            color='competitor',
+            title="Daily Sentiment Trend by Competitor (All History)"
+        )
+        fig.update_layout(xaxis_title="Date", yaxis_title="Average Sentiment Score")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        emotion_stats = engine.emotion_stats(**scan_filters)
+        emotion_matrix = emotion_stats.pivot(index='competitor', columns='emotion', values='article_count').fillna(0)
+        fig = px.imshow(
+            emotion_matrix.div(emotion_matrix.sum(axis=1), axis=0),
+            title="Emotion Distribution Heatmap by Competitor (All History)",
+            aspect="auto",
+            color_continuous_scale='Blues'
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.markdown("#### Competitor Performance Matrix (All History)")
+        competitor_stats = competitor_stats.set_index('competitor').round(3)
+        competitor_stats.columns = ['Avg Sentiment', 'Article Count', 'Avg Subjectivity']
+        st.dataframe(competitor_stats, use_container_width=True)
+    
+    @monitor.timed('render.raw_data')
     def render_raw_data(self, filtered_df):
         """Render raw data table"""
         st.markdown('<div class="section-header">📋 Article Details</div>', unsafe_allow_html=True)
@@ -688,6 +1472,17 @@ class StrategicIntelligenceDashboard:
             st.info("No data available to display.")
             return
         
+        group_by_story = 'story_id' in filtered_df.columns and st.checkbox(
+            "Group articles by story",
+            value=False,
+            help="Collapse syndicated copies of the same story into one row"
+        )
+        if group_by_story:
+            stories = story_summary(filtered_df)
+            stories['avg_sentiment'] = stories['avg_sentiment'].round(3)
+            st.dataframe(stories, use_container_width=True)
+            return
+        
         # Show data table with sentiment coloring
         display_columns = ['competitor', 'title', 'source', 'published_at', 'sentiment_label', 'sentiment_score', 'emotion']
         
@@ -708,18 +1503,101 @@ class StrategicIntelligenceDashboard:
         # Display the dataframe
         st.dataframe(display_df, use_container_width=True)
     
+    def diagnostics_enabled(self):
+        """Check whether the hidden diagnostics panel should be shown"""
+        if config.PROFILING_CONFIG['diagnostics_panel']:
+            return True
+        try:
+            return st.query_params.get('diagnostics') == '1'
+        except AttributeError:
+            return False
+    
+    def render_diagnostics_panel(self):
+        """Render the hidden performance diagnostics panel in the sidebar"""
+        with st.sidebar.expander("🩺 Diagnostics", expanded=False):
+            profile_mode = st.selectbox(
+                "Profile runs with",
+                options=['Off'] + monitor.PROFILE_MODES,
+                key='profile_mode',
+                help="Capture a profile of every dashboard run"
+            )
+            
+            metrics = monitor.snapshot()
+            if metrics['timings']:
+                timings_df = pd.DataFrame.from_dict(metrics['timings'], orient='index')
+                timings_df = timings_df[['count', 'total', 'mean', 'max', 'last']].sort_values('total', ascending=False)
+                st.dataframe(timings_df.round(4), use_container_width=True)
+            if metrics['counters']:
+                st.json(metrics['counters'])
+            
+            if monitor.last_profile and profile_mode != 'Off':
+                st.text_area(f"Last {monitor.last_profile_mode} profile", monitor.last_profile, height=300)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "Prometheus",
+                    data=monitor.to_prometheus(),
+                    file_name="dashboard_metrics.prom",
+                    mime="text/plain",
+                    use_container_width=True
+                )
+            with col2:
+                st.download_button(
+                    "JSON",
+                    data=monitor.to_json(),
+                    file_name="dashboard_metrics.json",
+                    mime="application/json",
+                    use_container_width=True
+                )
+            if st.button("Reset Metrics", use_container_width=True):
+                monitor.reset()
+            
+            memory = self.registry.stats(st.session_state.session_id)
+            st.caption(
+                f"Session datasets and derived state: {memory['total_bytes'] / 2 ** 20:.1f} of {memory['budget_bytes'] / 2 ** 20:.0f} MB "
+                f"across {memory['datasets']} versions and {memory['sessions']} sessions, "
+                f"{memory['evictions']} evicted"
+            )
+            if 'session_bytes' in memory:
+                st.caption(f"This session: {memory['session_bytes'] / 2 ** 20:.1f} MB, shared with {memory['shared_with']} other sessions")
+    
     def run(self):
         """Main method to run the dashboard"""
+        profile_mode = st.session_state.get('profile_mode', 'Off')
+        
+        with monitor.stage('render.total'):
+            if profile_mode in monitor.PROFILE_MODES:
+                with monitor.capture(profile_mode):
+                    self.render_main()
+            else:
+                self.render_main()
+        
+        if config.PROFILING_CONFIG['json_log']:
+            monitor.log_json()
+        
+        if self.diagnostics_enabled():
+            self.render_diagnostics_panel()
+    
+    def render_main(self):
+        """Render the dashboard page"""
         load_css()
         
         # Header
         st.markdown('<h1 class="main-header">🎯 Strategic Intelligence Dashboard</h1>', unsafe_allow_html=True)
         st.markdown("### Real-time Market Intelligence & Sentiment Analysis")
         
+        if st.session_state.pop('dataset_evicted', False):
+            st.info("ℹ️ This session was idle, so its data was released to free memory. Showing the latest published data.")
+        
         # API Key Input Section
         self.render_api_key_input()
         
-        if not st.session_state.api_keys_configured:
+        # Rows published by the background worker
+        self.sync_background_data()
+        self.render_refresh_poller()
+        
+        if not st.session_state.api_keys_configured and not st.session_state.analysis_complete:
             st.info("👆 Please configure your API keys in the sidebar to get started, or use sample data for demonstration.")
             return
         
@@ -736,18 +1614,32 @@ class StrategicIntelligenceDashboard:
             return
         
         # Dashboard Controls
+        self.render_scoring_rules()
+        self.apply_scoring_rules()
         filters = self.render_dashboard_controls()
+        self.filter_key = (
+            tuple(sorted(filters['sentiment_filter'])),
+            tuple(sorted(filters['source_filter'])),
+            tuple(sorted(filters['competitor_filter'])),
+            filters['date_filter'],
+            filters['search_query']
+        )
         
-        # Filter data based on selections
-        filtered_df = st.session_state.news_data.copy()
-        
-        # Apply sentiment filter
-        if filters['sentiment_filter']:
-            filtered_df = filtered_df[filtered_df['sentiment_label'].isin(filters['sentiment_filter'])]
-        
-        # Apply source filter
-        if filters['source_filter']:
-            filtered_df = filtered_df[filtered_df['source'].isin(filters['source_filter'])]
+        # Ranked search hits, if any, restrict the rows before the other filters
+        search_rows = None
+        # A query of stopwords only has nothing to match and is treated as no search
+        if tokenize(filters['search_query']):
+            search_rows, _ = self.search_articles(filters['search_query'])
+        
+        # Filter data based on selections using the precomputed index
+        filtered_df = self.state['filter_index'].select(
+            self.news_data,
+            rows=search_rows,
+            sentiments=filters['sentiment_filter'],
+            sources=filters['source_filter'],
+            competitors=filters['competitor_filter'],
+            date_range=filters['date_filter']
+        )
         
         # Main Dashboard
         if filtered_df.empty:
@@ -759,7 +1651,7 @@ class StrategicIntelligenceDashboard:
         
         # Always show KPIs and Alerts
         self.render_kpi_metrics(filtered_df)
-        self.render_alert_system(filtered_df)
+        self.render_alert_system(filtered_df, filters)
         
         # Show analysis based on selected type
         if analysis_type == 'Overall Dashboard':
@@ -773,7 +1665,7 @@ class StrategicIntelligenceDashboard:
             self.render_sentiment_analysis(filtered_df)
         
         elif analysis_type == 'Trend Analysis':
-            self.render_trend_analysis(filtered_df)
+            self.render_trend_analysis(filtered_df, filters)
             self.render_sentiment_analysis(filtered_df)
         
         elif analysis_type == 'Emotion Analysis':
@@ -784,6 +1676,12 @@ class StrategicIntelligenceDashboard:
             self.render_source_analysis(filtered_df)
             self.render_entity_analysis(filtered_df)
         
+        elif analysis_type == 'Market Reaction':
+            self.render_market_reaction(filtered_df)
+        
+        elif analysis_type == 'Historical Overview':
+            self.render_historical_overview(filters)
+        
         # Always show raw data at the bottom
         st.markdown("---")
         self.render_raw_data(filtered_df)
@@ -24,8 +24,190 @@ COMPETITORS = {
 }
 
 SENTIMENT_CONFIG = {
+    # Thresholds on the combined score
     'positive_threshold': 0.1,
-    'negative_threshold': -0.1
+    'negative_threshold': -0.1,
+    # Per-model label thresholds and blend weights
+    'vader_positive_threshold': 0.05,
+    'vader_negative_threshold': -0.05,
+    'textblob_positive_threshold': 0.1,
+    'textblob_negative_threshold': -0.1,
+    'vader_weight': 0.6,
+    'textblob_weight': 0.4,
+    # Share of the deep-analysis content score in the final score, when one exists
+    'content_weight': 0.5,
+    # 'lexicon' blends VADER and TextBlob; 'transformer' scores with a local CPU model
+    'backend': os.getenv('SENTIMENT_BACKEND', 'lexicon'),
+    'transformer_model_path': os.getenv('SENTIMENT_MODEL_PATH', ''),
+    'transformer_batch_size': 32,
+    'transformer_max_tokens_per_batch': 4096,
+    'transformer_max_length': 128,
+    'transformer_use_onnx': True,
+    'transformer_quantize': True,
+    'transformer_cache_size': 10000,
+    'transformer_num_threads': None
+}
+
+ENTITY_KEYWORDS = [
+    'NVIDIA', 'AMD', 'Intel', 'TSMC', 'Qualcomm', 'Apple', 'Google',
+    'Microsoft', 'Amazon', 'Meta', 'Tesla', 'AI', 'GPU', 'CPU',
+    'semiconductor', 'chip', 'processor', 'earnings', 'stock', 'market',
+    'technology', 'innovation', 'research', 'development', 'investment'
+]
+
+EMOTION_KEYWORDS = {
+    'Joy': ['growth', 'profit', 'success', 'win', 'gain', 'positive', 'bullish', 'optimistic', 'achievement', 'breakthrough'],
+    'Fear': ['drop', 'fall', 'loss', 'risk', 'concern', 'worry', 'bearish', 'pessimistic', 'uncertainty', 'volatility'],
+    'Anger': ['sue', 'lawsuit', 'fight', 'conflict', 'dispute', 'angry', 'frustrated', 'controversy', 'allegation'],
+    'Surprise': ['unexpected', 'surprise', 'shock', 'sudden', 'unanticipated', 'announcement', 'release', 'launch'],
+    'Sadness': ['decline', 'loss', 'miss', 'disappoint', 'cut', 'reduce', 'layoff', 'downturn', 'recession']
+}
+
+# Market data: local OHLC bars per ticker as <price_dir>/<TICKER>.parquet or .csv
+MARKET_CONFIG = {
+    'price_dir': os.getenv('DASHBOARD_PRICE_DIR', 'data/prices'),
+    'tickers': {},  # overrides for the tickers derived from COMPETITORS aliases
+    'max_staleness': '4D',  # news on a weekend or holiday still maps to the last close
+    'horizons': ['1h', '1D', '5D'],
+    'max_lag_days': 5,
+    'min_overlap_days': 10
+}
+
+# Deep analysis: sentence-level scoring of article content
+DEEP_ANALYSIS_CONFIG = {
+    'enabled': os.getenv('DASHBOARD_DEEP_ANALYSIS', '0') == '1',
+    'workers': max((os.cpu_count() or 2) - 1, 1),
+    'batch_size': 256,
+    'cache_size': 100000,
+    'max_sentences': 40
+}
+
+# Story clustering (hashed TF-IDF + LSH nearest-cluster assignment)
+CLUSTERING_CONFIG = {
+    'n_features': 1024,
+    'n_tables': 4,
+    'n_bits': 12,
+    'similarity_threshold': 0.5,
+    'max_age_days': 3
+}
+
+# Trend rollups: each granularity serves selected ranges up to this many days
+ROLLUP_CONFIG = {
+    'max_days': {
+        'hourly': 3,
+        'daily': 120
+    }
+}
+
+# Anomaly detection: per-competitor EWMA baselines over daily volume and sentiment
+ANOMALY_CONFIG = {
+    'alpha': 0.3,
+    'seasonal_alpha': 0.1,
+    'z_threshold': 2.5,
+    'min_history_days': 7,
+    'recent_days': 3,
+    'sentiment_floor': 0.1
+}
+
+# Time-series charts are reduced server-side to what their rendered width can show
+CHART_CONFIG = {
+    'viewport_width': int(os.getenv('DASHBOARD_VIEWPORT_WIDTH', '1400')),
+    'points_per_pixel': 0.5,
+    'min_points': 50,
+    'method': 'lttb'
+}
+
+# Plotly figure cache (per session, invalidated on new data)
+FIGURE_CACHE_CONFIG = {
+    'max_entries': 64
+}
+
+# Fetch planning: provider quotas, per-run call budget and query length limits
+FETCH_CONFIG = {
+    'daily_quota': {
+        'newsapi': int(os.getenv('NEWSAPI_DAILY_QUOTA', '100')),
+        'gnews': int(os.getenv('GNEWS_DAILY_QUOTA', '100'))
+    },
+    'call_budget': 40,
+    'max_query_length': {
+        'newsapi': 500,
+        'gnews': 200
+    }
+}
+
+# API key checks: run concurrently in the background, results cached per key hash
+KEY_VALIDATION_CONFIG = {
+    'timeout_seconds': 5,
+    'valid_ttl_seconds': 6 * 3600,
+    'invalid_ttl_seconds': 600,
+    'max_workers': 4
+}
+
+# Article history storage (Parquet segments) and out-of-core scans
+STORAGE_CONFIG = {
+    'data_dir': os.getenv('DASHBOARD_DATA_DIR', 'data/store'),
+    'persist': os.getenv('DASHBOARD_PERSIST', '1') == '1',
+    'snapshot_dir': os.getenv('DASHBOARD_SNAPSHOT_DIR', 'data/snapshots'),
+    'snapshots_to_keep': 3,
+    'snapshot_pin_seconds': 2 * 60 * 60,  # pins older than this are left by crashed readers and ignored
+    'scan_threads': None  # None uses every CPU core
+}
+
+# Storage maintenance: compaction of small segments and retention per tier
+MAINTENANCE_CONFIG = {
+    'interval_hours': 6,
+    'small_segment_bytes': 8 * 1024 * 1024,
+    'target_segment_rows': 1_000_000,
+    'row_group_rows': 128 * 1024,
+    'retire_grace_seconds': 15 * 60,  # replaced files stay on disk this long for scans already running
+    'raw_retention_days': 90,  # older articles are rolled up into the daily tier
+    'daily_retention_days': 730  # 0 keeps daily aggregates forever
+}
+
+# Shared cache / dataset backend for multi-replica deployments: 'local', 'sqlite' or 'redis'
+SHARED_BACKEND_CONFIG = {
+    'backend': os.getenv('DASHBOARD_SHARED_BACKEND', 'local'),
+    'sqlite_path': os.getenv('DASHBOARD_SHARED_DB', 'data/shared.db'),
+    'redis_url': os.getenv('DASHBOARD_REDIS_URL', 'redis://localhost:6379/0'),
+    'lease_seconds': 120,
+    'version_poll_seconds': 1.0
+}
+
+# Read-only JSON API over the latest snapshot's aggregates (python -m utils.api_server)
+API_CONFIG = {
+    'enabled': os.getenv('DASHBOARD_API', '0') == '1',  # also serve it from the dashboard process
+    'host': os.getenv('DASHBOARD_API_HOST', '127.0.0.1'),
+    'port': int(os.getenv('DASHBOARD_API_PORT', '8502')),
+    'max_age_seconds': 30,
+    'max_cached_responses': 256
+}
+
+# Static per-competitor HTML reports rendered from the latest snapshot (python -m utils.reports)
+REPORT_CONFIG = {
+    'output_dir': os.getenv('DASHBOARD_REPORT_DIR', 'reports'),
+    'workers': max(min(os.cpu_count() or 2, 8), 1),
+    'include_plotlyjs': 'cdn',  # True embeds plotly.js so reports open offline
+    'recent_days': 7  # window for the anomaly table
+}
+
+# Session datasets are shared immutable versions; idle sessions lose theirs when over budget
+SESSION_MEMORY_CONFIG = {
+    'budget_mb': int(os.getenv('DASHBOARD_SESSION_MEMORY_MB', '2048')),
+    'idle_minutes': 30
+}
+
+# Background ingestion worker
+INGESTION_CONFIG = {
+    'interval_minutes': 30,
+    'poll_seconds': 15,
+    # Required to start, stop or reconfigure the process-wide worker from the dashboard; empty disables the controls
+    'admin_token': os.getenv('DASHBOARD_ADMIN_TOKEN', '')
+}
+
+# Profiling / diagnostics configuration
+PROFILING_CONFIG = {
+    'diagnostics_panel': os.getenv('DASHBOARD_DIAGNOSTICS', '0') == '1',  # also enabled with ?diagnostics=1
+    'json_log': os.getenv('DASHBOARD_JSON_METRICS', '0') == '1'
 }
 
 # UI Configuration
@@ -0,0 +1,88 @@
+import threading
+import pandas as pd
+import pytest
+from utils.derived_state import build_version
+from utils.session_memory import DatasetRegistry, fork
+from utils.story_clustering import StoryClusterer
+
+
+def articles(start, n, competitor='NVIDIA', topic='launch'):
+    """Minimal analyzed rows as the ingestion worker publishes them"""
+    return pd.DataFrame({
+        'title': [f"{competitor} {topic} story {i}" for i in range(n)],
+        'description': [f"Coverage of the {topic} number {i}" for i in range(n)],
+        'text': [f"{competitor} {topic} story {i}. Coverage of the {topic} number {i}" for i in range(n)],
+        'published_at': pd.date_range(start, periods=n, freq='h', tz='UTC'),
+        'competitor': competitor,
+        'source': 'NewsAPI',
+        'sentiment_label': 'Positive',
+        'sentiment_score': 0.5,
+        'entities': [[competitor, 'GPU'] for _ in range(n)]
+    })
+
+
+def test_fork_gives_structures_fresh_locks():
+    clusterer = StoryClusterer()
+    copy = fork(clusterer)
+    assert copy._lock is not clusterer._lock
+    assert isinstance(copy._lock, type(threading.Lock()))
+    with copy._lock:
+        assert not clusterer._lock.locked()
+
+
+def test_append_delta_onto_session_with_derived_state():
+    parent_df, parent_state = build_version(articles('2024-01-01', 24), shared_stories=False)
+    parent_state['search_index'].sync(parent_df, parent_state['token'], parent_state['lineage'])
+
+    delta = articles('2024-01-02', 6, competitor='AMD', topic='earnings')
+    df, state = build_version(delta, parent_df, parent_state)
+
+    assert len(df) == 30
+    # Structures the delta updates are copies; the parent version is left as it was
+    assert state['rollups'] is not parent_state['rollups']
+    assert parent_state['rollups'].tables['daily']['count'].sum() == 24
+    assert state['rollups'].tables['daily']['count'].sum() == 30
+    assert parent_state['anomaly_detector'].counts.sum() == 24
+    assert state['anomaly_detector'].counts.sum() == 30
+    assert 'AMD' not in parent_state['co_mentions'].competitors
+    assert 'AMD' in state['co_mentions'].competitors
+    assert state['filter_index'].size == 30 and parent_state['filter_index'].size == 24
+    assert df['story_id'].notna().all()
+
+    # The search index is shared and extended; the parent never sees the child's rows
+    assert state['search_index'] is parent_state['search_index']
+    assert state['search_index'].sync(df, state['token'], state['lineage']) == 6
+    rows, _ = state['search_index'].search('earnings', max_row=len(df))
+    assert sorted(rows.tolist()) == list(range(24, 30))
+    rows, _ = parent_state['search_index'].search('earnings', max_row=len(parent_df))
+    assert len(rows) == 0
+
+
+def test_sibling_versions_do_not_read_each_others_search_rows():
+    parent_df, parent_state = build_version(articles('2024-01-01', 10))
+    first_df, first = build_version(articles('2024-01-02', 3, topic='earnings'), parent_df, parent_state)
+    second_df, second = build_version(articles('2024-01-02', 5, topic='recall'), parent_df, parent_state)
+
+    first['search_index'].sync(first_df, first['token'], first['lineage'])
+    with pytest.raises(ValueError):
+        second['search_index'].sync(second_df, second['token'], second['lineage'])
+    # The parent's own rows were credited to it, so sessions still on the parent keep the shared index
+    assert parent_state['search_index'].sync(parent_df, parent_state['token'], parent_state['lineage']) == 0
+
+
+def test_registry_rebuilds_a_version_released_by_its_last_session():
+    registry = DatasetRegistry(budget_bytes=1 << 30, idle_seconds=3600)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return build_version(articles('2024-01-01', 4))
+
+    registry.acquire('a', 'v1', build)
+    registry.acquire('b', 'v1', build)
+    assert len(builds) == 1
+    registry.release('a')
+    registry.release('b')
+    # The entry went away with its last session; asking for the key again builds it rather than failing
+    assert len(registry.acquire('c', 'v1', build)) == 4
+    assert len(builds) == 2
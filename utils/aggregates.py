@@ -0,0 +1,60 @@
+import pandas as pd
+
+
+def competitor_stats(df):
+    """Mean sentiment, article count and mean subjectivity per competitor"""
+    stats = df.groupby('competitor').agg(
+        avg_sentiment=('sentiment_score', 'mean'),
+        article_count=('sentiment_score', 'size'),
+        avg_subjectivity=('subjectivity', 'mean')
+    )
+    return stats.sort_values('avg_sentiment', ascending=False).reset_index()
+
+
+def source_stats(df):
+    """Article count and mean sentiment per source"""
+    stats = df.groupby('source').agg(
+        article_count=('sentiment_score', 'size'),
+        avg_sentiment=('sentiment_score', 'mean')
+    )
+    return stats.sort_values('article_count', ascending=False).reset_index()
+
+
+def emotion_stats(df):
+    """Article count and mean sentiment per competitor and emotion"""
+    return df.groupby(['competitor', 'emotion']).agg(
+        article_count=('sentiment_score', 'size'),
+        avg_sentiment=('sentiment_score', 'mean')
+    ).reset_index()
+
+
+def daily_trend(df):
+    """Mean sentiment and article volume per day and competitor"""
+    published = pd.to_datetime(df['published_at'])
+    return df.groupby([published.dt.floor('D').rename('date'), 'competitor']).agg(
+        sentiment_score=('sentiment_score', 'mean'),
+        article_count=('sentiment_score', 'size')
+    ).reset_index()
+
+
+def daily_rollup(df):
+    """Article count and score sums per UTC day, competitor, source, label and emotion"""
+    published = pd.to_datetime(df['published_at'], utc=True)
+    return df.groupby(
+        [published.dt.floor('D').rename('published_at'), 'competitor', 'source', 'sentiment_label', 'emotion'],
+        dropna=False
+    ).agg(
+        article_count=('sentiment_score', 'size'),
+        score_sum=('sentiment_score', 'sum'),
+        subjectivity_sum=('subjectivity', 'sum')
+    ).reset_index()
+
+
+def compute_all(df):
+    """Every precomputed aggregate, keyed by name"""
+    return {
+        'competitor_stats': competitor_stats(df),
+        'source_stats': source_stats(df),
+        'emotion_stats': emotion_stats(df),
+        'daily_trend': daily_trend(df)
+    }
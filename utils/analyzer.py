@@ -3,13 +3,54 @@ import numpy as np
 from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import re
+import copy
+import logging
 from collections import Counter
 from datetime import datetime
 import streamlit as st
+from utils.profiler import monitor
+from utils.sentiment_backends import create_backend
+import config
+
+logger = logging.getLogger(__name__)
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, backend=None, verbose=True, rules=None, deep=None):
         self.vader_analyzer = SentimentIntensityAnalyzer()
+        self.verbose = verbose
+        self.rules = rules or self.default_rules()
+        self.deep = deep
+        self.backend = backend
+        if self.backend is None:
+            try:
+                self.backend = create_backend(config.SENTIMENT_CONFIG)
+            except ValueError as e:
+                self.disable_backend(e)
+    
+    def disable_backend(self, error):
+        """Fall back to the VADER/TextBlob blend when the configured backend cannot be used"""
+        self.backend = None
+        monitor.increment('analyze.backend_fallbacks')
+        if self.verbose:
+            st.warning(f"⚠️ Transformer sentiment backend unavailable, using VADER/TextBlob: {error}")
+        else:
+            logger.warning("Transformer sentiment backend unavailable, using VADER/TextBlob: %s", error)
+    
+    @staticmethod
+    def default_rules():
+        """Scoring weights, thresholds and keyword lists from config"""
+        rules = {key: value for key, value in config.SENTIMENT_CONFIG.items() if not key.startswith(('backend', 'transformer_'))}
+        rules['entity_keywords'] = list(config.ENTITY_KEYWORDS)
+        rules['emotion_keywords'] = copy.deepcopy(config.EMOTION_KEYWORDS)
+        return rules
+    
+    def label_score(self, score, positive_threshold, negative_threshold):
+        """Map a score to Positive/Negative/Neutral with inclusive thresholds"""
+        if score >= positive_threshold:
+            return "Positive"
+        elif score <= negative_threshold:
+            return "Negative"
+        return "Neutral"
     
     def clean_text(self, text):
         """Clean text for analysis"""
@@ -24,6 +65,7 @@ class SentimentAnalyzer:
         text = ' '.join(text.split())
         return text
     
+    @monitor.timed('analyze.vader')
     def analyze_sentiment_vader(self, text):
         """Analyze sentiment using VADER"""
         cleaned_text = self.clean_text(text)
@@ -31,12 +73,9 @@ class SentimentAnalyzer:
         
         # Determine sentiment label
         compound = scores['compound']
-        if compound >= 0.05:
-            sentiment_label = "Positive"
-        elif compound <= -0.05:
-            sentiment_label = "Negative"
-        else:
-            sentiment_label = "Neutral"
+        sentiment_label = self.label_score(
+            compound, self.rules['vader_positive_threshold'], self.rules['vader_negative_threshold']
+        )
             
         return {
             "sentiment_label": sentiment_label,
@@ -46,6 +85,7 @@ class SentimentAnalyzer:
             "neutral_score": scores['neu']
         }
     
+    @monitor.timed('analyze.textblob')
     def analyze_sentiment_textblob(self, text):
         """Analyze sentiment using TextBlob"""
         cleaned_text = self.clean_text(text)
@@ -55,9 +95,9 @@ class SentimentAnalyzer:
         subjectivity = analysis.sentiment.subjectivity
         
         # Determine sentiment label
-        if polarity > 0.1:
+        if polarity > self.rules['textblob_positive_threshold']:
             sentiment_label = "Positive"
-        elif polarity < -0.1:
+        elif polarity < self.rules['textblob_negative_threshold']:
             sentiment_label = "Negative"
         else:
             sentiment_label = "Neutral"
@@ -68,18 +108,14 @@ class SentimentAnalyzer:
             "subjectivity": subjectivity
         }
     
+    @monitor.timed('analyze.entities')
     def extract_entities(self, text):
         """Extract key entities using simple pattern matching"""
         cleaned_text = self.clean_text(text)
         
         # Common tech companies and products
         entities = []
-        tech_keywords = [
-            'NVIDIA', 'AMD', 'Intel', 'TSMC', 'Qualcomm', 'Apple', 'Google',
-            'Microsoft', 'Amazon', 'Meta', 'Tesla', 'AI', 'GPU', 'CPU',
-            'semiconductor', 'chip', 'processor', 'earnings', 'stock', 'market',
-            'technology', 'innovation', 'research', 'development', 'investment'
-        ]
+        tech_keywords = self.rules['entity_keywords']
         
         for keyword in tech_keywords:
             if keyword.lower() in cleaned_text.lower():
@@ -87,17 +123,12 @@ class SentimentAnalyzer:
         
         return list(set(entities))  # Remove duplicates
     
+    @monitor.timed('analyze.emotion')
     def analyze_emotion(self, text):
         """Basic emotion detection based on keywords"""
         cleaned_text = self.clean_text(text).lower()
         
-        emotion_keywords = {
-            'Joy': ['growth', 'profit', 'success', 'win', 'gain', 'positive', 'bullish', 'optimistic', 'achievement', 'breakthrough'],
-            'Fear': ['drop', 'fall', 'loss', 'risk', 'concern', 'worry', 'bearish', 'pessimistic', 'uncertainty', 'volatility'],
-            'Anger': ['sue', 'lawsuit', 'fight', 'conflict', 'dispute', 'angry', 'frustrated', 'controversy', 'allegation'],
-            'Surprise': ['unexpected', 'surprise', 'shock', 'sudden', 'unanticipated', 'announcement', 'release', 'launch'],
-            'Sadness': ['decline', 'loss', 'miss', 'disappoint', 'cut', 'reduce', 'layoff', 'downturn', 'recession']
-        }
+        emotion_keywords = self.rules['emotion_keywords']
         
         emotion_scores = {emotion: 0 for emotion in emotion_keywords.keys()}
         
@@ -114,49 +145,68 @@ class SentimentAnalyzer:
             
         return dominant_emotion
     
-    def comprehensive_analysis(self, text):
+    def comprehensive_analysis(self, text, model_score=None):
         """Perform comprehensive sentiment analysis"""
         vader_result = self.analyze_sentiment_vader(text)
         textblob_result = self.analyze_sentiment_textblob(text)
         entities = self.extract_entities(text)
         emotion = self.analyze_emotion(text)
         
-        # Combine results - weighted average
-        combined_score = (vader_result['sentiment_score'] * 0.6 + 
-                         textblob_result['sentiment_score_tb'] * 0.4)
+        if model_score is not None:
+            # Scored in batch by the configured backend
+            combined_score = model_score
+        else:
+            # Combine results - weighted average
+            combined_score = (vader_result['sentiment_score'] * self.rules['vader_weight'] + 
+                             textblob_result['sentiment_score_tb'] * self.rules['textblob_weight'])
         
         # Final sentiment determination
-        if combined_score >= 0.1:
-            final_sentiment = "Positive"
-        elif combined_score <= -0.1:
-            final_sentiment = "Negative"
-        else:
-            final_sentiment = "Neutral"
+        final_sentiment = self.label_score(
+            combined_score, self.rules['positive_threshold'], self.rules['negative_threshold']
+        )
         
+        # Raw model outputs are kept unrounded so labels can be re-derived later
         return {
             "sentiment_label": final_sentiment,
             "sentiment_score": round(combined_score, 3),
-            "vader_score": round(vader_result['sentiment_score'], 3),
-            "textblob_score": round(textblob_result['sentiment_score_tb'], 3),
-            "subjectivity": round(textblob_result['subjectivity'], 3),
+            "vader_score": vader_result['sentiment_score'],
+            "textblob_score": textblob_result['sentiment_score_tb'],
+            "subjectivity": textblob_result['subjectivity'],
+            "model_score": model_score,
             "emotion": emotion,
             "entities": entities,
             "analysis_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
     
+    @monitor.timed('analyze.total')
     def analyze_dataframe(self, df, text_column='text'):
         """Analyze sentiment for entire dataframe"""
         if df.empty:
             return df
             
-        st.info("🧠 Starting comprehensive sentiment analysis...")
+        if self.verbose:
+            st.info("🧠 Starting comprehensive sentiment analysis...")
         
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        progress_bar = st.progress(0) if self.verbose else None
+        status_text = st.empty() if self.verbose else None
         
         analysis_results = []
         total_rows = len(df)
         
+        # Batched backend scoring ahead of the per-article pass
+        model_scores = {}
+        if self.backend is not None:
+            valid_texts = df[text_column].dropna()
+            if self.verbose:
+                status_text.text(f"Scoring {len(valid_texts)} articles with {self.backend.name} model...")
+            try:
+                scores = self.backend.score_batch(valid_texts.astype(str).tolist())
+            except (ImportError, OSError, ValueError, RuntimeError) as e:
+                # Model dependencies and files are only loaded on first use
+                self.disable_backend(e)
+            else:
+                model_scores = dict(zip(valid_texts.index, scores))
+        
         for idx, row in df.iterrows():
             if pd.isna(row[text_column]):
                 analysis_results.append({
@@ -165,25 +215,100 @@ class SentimentAnalyzer:
                     "vader_score": 0.0,
                     "textblob_score": 0.0,
                     "subjectivity": 0.0,
+                    "model_score": None,
                     "emotion": "Neutral",
                     "entities": [],
                     "analysis_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 })
             else:
-                analysis = self.comprehensive_analysis(row[text_column])
+                analysis = self.comprehensive_analysis(row[text_column], model_scores.get(idx))
                 analysis_results.append(analysis)
             
             # Update progress
-            progress = (idx + 1) / total_rows
-            progress_bar.progress(progress)
-            status_text.text(f"Analyzing article {idx + 1}/{total_rows}...")
+            if self.verbose:
+                progress = (idx + 1) / total_rows
+                progress_bar.progress(progress)
+                status_text.text(f"Analyzing article {idx + 1}/{total_rows}...")
         
-        progress_bar.empty()
-        status_text.empty()
+        if self.verbose:
+            progress_bar.empty()
+            status_text.empty()
         
         # Convert to DataFrame and combine with original
+        monitor.increment('analyze.articles', total_rows)
         analysis_df = pd.DataFrame(analysis_results)
         final_df = pd.concat([df.reset_index(drop=True), analysis_df], axis=1)
         
-        st.success("✅ Sentiment analysis complete!")
-        return final_df
\ No newline at end of file
+        # Optional sentence-level pass over the full content, blended into the final score
+        if self.deep is not None:
+            content_df = self.deep.analyze(final_df, self)
+            final_df = self.relabel(pd.concat([final_df, content_df], axis=1), previous_rules=self.rules)
+        
+        if self.verbose:
+            st.success("✅ Sentiment analysis complete!")
+        return final_df
+    
+    def clean_series(self, texts):
+        """Vectorized equivalent of clean_text, lowercased for keyword matching"""
+        cleaned = texts.fillna('').astype(str)
+        cleaned = cleaned.str.replace(r'http\S+', '', regex=True)
+        cleaned = cleaned.str.replace(r'[^\w\s\.\!\?]', '', regex=True)
+        return cleaned.str.split().str.join(' ').str.lower()
+    
+    @monitor.timed('analyze.relabel')
+    def relabel(self, df, previous_rules=None, text_column='text'):
+        """Re-derive scores, labels, emotions and entities from stored raw scores under the current rules"""
+        if df.empty:
+            return df
+        
+        rules = self.rules
+        df = df.copy()
+        unknown = df['sentiment_label'].eq('Unknown').to_numpy()
+        
+        # Combined score from stored VADER compound and TextBlob polarity, or the backend score
+        combined = (df['vader_score'].astype(float) * rules['vader_weight'] +
+                    df['textblob_score'].astype(float) * rules['textblob_weight'])
+        if 'model_score' in df.columns:
+            model_scores = pd.to_numeric(df['model_score'], errors='coerce')
+            combined = model_scores.where(model_scores.notna(), combined)
+        if 'content_score' in df.columns:
+            content_scores = pd.to_numeric(df['content_score'], errors='coerce')
+            content_weight = rules.get('content_weight', 0.0)
+            combined = combined.where(content_scores.isna(), (1 - content_weight) * combined + content_weight * content_scores)
+        combined = combined.round(3)
+        
+        labels = np.select(
+            [combined >= rules['positive_threshold'], combined <= rules['negative_threshold']],
+            ['Positive', 'Negative'],
+            default='Neutral'
+        )
+        df['sentiment_score'] = np.where(unknown, df['sentiment_score'], combined)
+        df['sentiment_label'] = np.where(unknown, 'Unknown', labels)
+        
+        # Keyword-derived columns only need recomputing when the keyword lists changed
+        keywords_changed = previous_rules is None or (
+            previous_rules.get('entity_keywords') != rules['entity_keywords'] or
+            previous_rules.get('emotion_keywords') != rules['emotion_keywords']
+        )
+        if keywords_changed and text_column in df.columns:
+            cleaned = self.clean_series(df[text_column])
+            
+            entity_keywords = rules['entity_keywords']
+            entity_hits = np.column_stack([
+                cleaned.str.contains(keyword.lower(), regex=False).to_numpy() for keyword in entity_keywords
+            ]) if entity_keywords else np.zeros((len(df), 0), dtype=bool)
+            keyword_array = np.array(entity_keywords, dtype=object)
+            df['entities'] = [list(keyword_array[row]) for row in entity_hits]
+            
+            emotions = list(rules['emotion_keywords'].keys())
+            emotion_counts = np.column_stack([
+                sum((cleaned.str.contains(keyword, regex=False).to_numpy().astype(int) for keyword in keywords),
+                    np.zeros(len(df), dtype=int))
+                for keywords in rules['emotion_keywords'].values()
+            ]) if emotions else np.zeros((len(df), 0), dtype=int)
+            if emotions:
+                dominant = np.array(emotions, dtype=object)[emotion_counts.argmax(axis=1)]
+                df['emotion'] = np.where(emotion_counts.sum(axis=1) == 0, 'Neutral', dominant)
+        
+        monitor.increment('analyze.relabelled_rows', len(df))
+        return df
@@ -0,0 +1,254 @@
+import copy
+import math
+import numpy as np
+import pandas as pd
+import config
+from utils.profiler import monitor
+
+
+def normal_confidence(z_scores):
+    """Two-sided probability mass inside |z| under a standard normal"""
+    erf = np.frompyfunc(math.erf, 1, 1)
+    return erf(np.abs(z_scores) / math.sqrt(2)).astype(float)
+
+
+class AnomalyDetector:
+    """Per-competitor EWMA baselines with weekday seasonality for daily article volume and sentiment"""
+
+    # Baseline state before each day, shaped (competitors, days); seasons add a weekday axis
+    STATE_FILL = {
+        'level': np.nan,
+        'volume_var': 0.0,
+        'season': 0.0,
+        'sentiment': np.nan,
+        'sentiment_var': 0.0,
+        'history': 0.0
+    }
+
+    def __init__(self, alpha=None, seasonal_alpha=None, z_threshold=None, min_history=None, sentiment_floor=None):
+        anomaly_config = config.ANOMALY_CONFIG
+        self.alpha = alpha or anomaly_config['alpha']
+        self.seasonal_alpha = seasonal_alpha or anomaly_config['seasonal_alpha']
+        self.z_threshold = z_threshold or anomaly_config['z_threshold']
+        self.min_history = min_history or anomaly_config['min_history_days']
+        self.sentiment_floor = sentiment_floor or anomaly_config['sentiment_floor']
+
+        self.competitors = []
+        self._index = {}
+        self.origin = None
+        self.latest = None
+        self.counts = np.zeros((0, 0))
+        self.score_sums = np.zeros((0, 0))
+
+        self.state = {}
+        self._reset_state(0, 0)
+        self._dirty = None
+
+    def fork(self):
+        """Copy for a derived dataset version; the per-day arrays are updated in place, so they are copied"""
+        detector = copy.copy(self)
+        detector.competitors = list(self.competitors)
+        detector._index = dict(self._index)
+        detector.counts = self.counts.copy()
+        detector.score_sums = self.score_sums.copy()
+        detector.state = {name: array.copy() for name, array in self.state.items()}
+        return detector
+
+    @property
+    def n_days(self):
+        return self.counts.shape[1]
+
+    def _reset_state(self, n_competitors, n_days):
+        self.state = {
+            name: np.full((n_competitors, n_days, 7) if name == 'season' else (n_competitors, n_days), fill)
+            for name, fill in self.STATE_FILL.items()
+        }
+
+    def _mark_dirty(self, day):
+        self._dirty = day if self._dirty is None else min(self._dirty, day)
+
+    def _grow(self, competitors, first_day, last_day):
+        """Extend the day axis and competitor axis to cover newly seen values"""
+        new_competitors = [c for c in pd.unique(pd.Series(competitors)) if c not in self._index]
+        for competitor in new_competitors:
+            self._index[competitor] = len(self.competitors)
+            self.competitors.append(competitor)
+
+        prepend = 0
+        if self.origin is None:
+            self.origin = first_day
+        elif first_day < self.origin:
+            prepend = (self.origin - first_day).days
+            self.origin = first_day
+        n_days = max(self.n_days + prepend, (last_day - self.origin).days + 1)
+        append = n_days - self.n_days - prepend
+
+        if not (new_competitors or prepend or append):
+            return
+        old_days = self.n_days
+        pad = ((0, len(new_competitors)), (prepend, append))
+        self.counts = np.pad(self.counts, pad)
+        self.score_sums = np.pad(self.score_sums, pad)
+
+        if prepend:
+            # Earlier history changes every baseline from the start
+            self._reset_state(len(self.competitors), n_days)
+            self._mark_dirty(0)
+            return
+        for name, fill in self.STATE_FILL.items():
+            state_pad = pad + ((0, 0),) if name == 'season' else pad
+            self.state[name] = np.pad(self.state[name], state_pad, constant_values=fill)
+        if new_competitors:
+            self._mark_dirty(0)
+        elif old_days:
+            # The previous last day is complete now and can be learned from
+            self._mark_dirty(old_days - 1)
+
+    @monitor.timed('anomaly.update')
+    def update(self, df):
+        """Fold newly ingested articles into the daily per-competitor series"""
+        if df.empty:
+            return
+        published = pd.to_datetime(df['published_at'])
+        if published.dt.tz is not None:
+            published = published.dt.tz_convert(None)
+        daily = pd.DataFrame({
+            'date': published.dt.floor('D'),
+            'competitor': df['competitor'].to_numpy(),
+            'score': df['sentiment_score'].astype(float).to_numpy()
+        }).groupby(['date', 'competitor'])['score'].agg(['size', 'sum']).reset_index()
+        self.add_daily(daily['date'], daily['competitor'], daily['size'], daily['sum'], latest=published.max())
+
+    def add_daily(self, dates, competitors, counts, score_sums, latest=None):
+        """Add pre-aggregated daily counts and sentiment sums per competitor"""
+        dates = pd.to_datetime(pd.Series(dates)).dt.floor('D')
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_convert(None)
+        self._grow(competitors, dates.min(), dates.max())
+
+        rows = np.array([self._index[c] for c in competitors], dtype=np.int64)
+        days = ((dates - self.origin).dt.days).to_numpy()
+        np.add.at(self.counts, (rows, days), np.asarray(counts, dtype=float))
+        np.add.at(self.score_sums, (rows, days), np.asarray(score_sums, dtype=float))
+
+        latest = latest if latest is not None else dates.max() + pd.Timedelta(days=1)
+        self.latest = latest if self.latest is None else max(self.latest, latest)
+        self._mark_dirty(int(days.min()))
+
+    def fit(self):
+        """Advance the baselines over every complete day, from the earliest day that changed"""
+        if self._dirty is None or self.n_days == 0:
+            return
+        state = self.state
+        alpha, gamma = self.alpha, self.seasonal_alpha
+        rows = np.arange(len(self.competitors))
+        weekdays = (self.origin.dayofweek + np.arange(self.n_days)) % 7
+
+        # The last day is still filling up, so it is scored but never learned from
+        for day in range(self._dirty, self.n_days - 1):
+            nxt = day + 1
+            volume = self.counts[:, day]
+            seen = self.counts[:, day] > 0
+            level = state['level'][:, day]
+            season = state['season'][:, day]
+            started = ~np.isnan(level)
+            weekday = weekdays[day]
+
+            # Volume: additive Holt-Winters level with a weekday seasonal term
+            forecast = np.where(started, level + season[rows, weekday], volume)
+            residual = volume - forecast
+            new_level = np.where(started, alpha * (volume - season[rows, weekday]) + (1 - alpha) * level, volume)
+            new_level = np.where(started | seen, new_level, np.nan)
+            new_season = season.copy()
+            new_season[rows, weekday] = np.where(
+                started, gamma * (volume - new_level) + (1 - gamma) * season[rows, weekday], 0.0
+            )
+            state['volume_var'][:, nxt] = np.where(
+                started, (1 - alpha) * (state['volume_var'][:, day] + alpha * residual ** 2), 0.0
+            )
+            state['level'][:, nxt] = new_level
+            state['season'][:, nxt] = new_season
+            state['history'][:, nxt] = state['history'][:, day] + (started | seen)
+
+            # Sentiment: EWMA of the daily mean, only on days with articles
+            mean = np.divide(self.score_sums[:, day], volume, out=np.zeros_like(volume), where=seen)
+            sentiment = state['sentiment'][:, day]
+            has_sentiment = ~np.isnan(sentiment)
+            sentiment_residual = np.where(has_sentiment, mean - sentiment, 0.0)
+            state['sentiment'][:, nxt] = np.where(
+                seen, np.where(has_sentiment, sentiment + alpha * sentiment_residual, mean), sentiment
+            )
+            state['sentiment_var'][:, nxt] = np.where(
+                seen & has_sentiment,
+                (1 - alpha) * (state['sentiment_var'][:, day] + alpha * sentiment_residual ** 2),
+                state['sentiment_var'][:, day]
+            )
+        self._dirty = None
+
+    @monitor.timed('anomaly.detect')
+    def detect(self, recent_days=None, competitors=None):
+        """Score the most recent days of every competitor against its baseline in one batch"""
+        columns = ['competitor', 'metric', 'date', 'observed', 'expected', 'z_score', 'confidence']
+        if self.n_days == 0:
+            return pd.DataFrame(columns=columns)
+        self.fit()
+
+        recent_days = recent_days or config.ANOMALY_CONFIG['recent_days']
+        window = np.arange(max(self.n_days - recent_days, 0), self.n_days)
+        rows = np.arange(len(self.competitors))[:, None]
+        weekdays = (self.origin.dayofweek + window) % 7
+        state = self.state
+
+        # Only part of the last day has been observed yet
+        elapsed = np.ones(len(window))
+        last_start = self.origin + pd.Timedelta(days=self.n_days - 1)
+        elapsed[-1] = min(max((self.latest - last_start) / pd.Timedelta(days=1), 1 / 24), 1.0)
+
+        volume = self.counts[:, window]
+        expected_volume = np.clip(
+            state['level'][:, window] + state['season'][rows, window[None, :], weekdays[None, :]], 0, None
+        ) * elapsed
+        # Poisson noise keeps quiet competitors from alerting on a single article
+        volume_sd = np.sqrt(state['volume_var'][:, window] * elapsed ** 2 + np.maximum(expected_volume, 1.0))
+        volume_z = (volume - expected_volume) / volume_sd
+
+        seen = volume > 0
+        mean = np.divide(self.score_sums[:, window], volume, out=np.zeros_like(volume), where=seen)
+        expected_sentiment = state['sentiment'][:, window]
+        sentiment_sd = np.sqrt(state['sentiment_var'][:, window] + self.sentiment_floor ** 2)
+        sentiment_z = np.where(seen, (mean - expected_sentiment) / sentiment_sd, np.nan)
+
+        # Competitors still building a baseline are left to the caller's fixed rules
+        history = state['history'][:, window]
+        dates = self.origin + pd.to_timedelta(window, unit='D')
+
+        frames = []
+        for metric, observed, expected, z in (
+            ('volume', volume, expected_volume, volume_z),
+            ('sentiment', mean, expected_sentiment, sentiment_z)
+        ):
+            flagged = (np.abs(np.nan_to_num(z)) >= self.z_threshold) & (history >= self.min_history)
+            competitor_rows, day_columns = np.nonzero(flagged)
+            frames.append(pd.DataFrame({
+                'competitor': np.asarray(self.competitors, dtype=object)[competitor_rows],
+                'metric': metric,
+                'date': dates[day_columns],
+                'observed': observed[competitor_rows, day_columns],
+                'expected': expected[competitor_rows, day_columns],
+                'z_score': z[competitor_rows, day_columns],
+                'confidence': normal_confidence(z[competitor_rows, day_columns])
+            }))
+
+        anomalies = pd.concat(frames, ignore_index=True)
+        if competitors:
+            anomalies = anomalies[anomalies['competitor'].isin(competitors)]
+        return anomalies.sort_values('confidence', ascending=False, ignore_index=True)[columns]
+
+    def baselined(self, competitors=None):
+        """The competitors, of those given or all, with enough history to be scored"""
+        if self.n_days == 0:
+            return []
+        self.fit()
+        history = self.state['history'][:, -1]
+        candidates = self.competitors if competitors is None else [c for c in competitors if c in self._index]
+        return [c for c in candidates if history[self._index[c]] >= self.min_history]
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+import config
+from utils.profiler import monitor
+from utils.snapshots import SnapshotManager
+from utils.anomaly import AnomalyDetector
+
+logger = logging.getLogger(__name__)
+
+
+class AggregatesAPI:
+    """Read-only JSON views of the latest snapshot's aggregates, cached per dataset version"""
+
+    ENDPOINTS = {
+        '/api/competitors': 'competitor_stats',
+        '/api/sources': 'source_stats',
+        '/api/emotions': 'emotion_stats',
+        '/api/trend': 'daily_trend'
+    }
+
+    def __init__(self, snapshots=None, poll_seconds=None):
+        self.snapshots = snapshots or SnapshotManager()
+        self.poll_seconds = poll_seconds or config.SHARED_BACKEND_CONFIG['version_poll_seconds']
+        self._lock = threading.Lock()
+        self._snapshot_dir = None
+        self._meta = None
+        self._tables = {}
+        self._responses = {}
+        self._checked_at = 0.0
+
+    def refresh(self):
+        """Follow LATEST to the newest snapshot, dropping every cached response when it moves"""
+        now = time.monotonic()
+        if now - self._checked_at < self.poll_seconds:
+            return
+        self._checked_at = now
+        path = self.snapshots.latest_dir()
+        if path == self._snapshot_dir:
+            return
+        meta = None
+        if path is not None:
+            with open(os.path.join(path, self.snapshots.META_FILE)) as f:
+                meta = json.load(f)
+        with self._lock:
+            self._snapshot_dir, self._meta = path, meta
+            self._tables.clear()
+            self._responses.clear()
+
+    @property
+    def version(self):
+        return self._meta['dataset_version'] if self._meta else 0
+
+    def table(self, name):
+        """Memory-map one snapshot table, once per snapshot"""
+        with self._lock:
+            if name not in self._tables:
+                columns = ['published_at', 'competitor', 'sentiment_score'] if name == 'dataset' else None
+                filename = self.snapshots.DATASET_FILE if name == 'dataset' else f"{name}.arrow"
+                self._tables[name] = self.snapshots.read_table(os.path.join(self._snapshot_dir, filename), columns=columns)
+            return self._tables[name]
+
+    def alerts(self):
+        """Baseline deviations across every competitor, scored in one batch"""
+        detector = AnomalyDetector()
+        detector.update(self.table('dataset'))
+        return detector.detect()
+
+    def payload(self, path, params):
+        """JSON-ready body for an endpoint, or None when the path is unknown"""
+        if path == '/api/version':
+            return {'dataset_version': self.version, 'created_at': self._meta['created_at'] if self._meta else None}
+        if self._snapshot_dir is None:
+            return {'dataset_version': 0, 'data': []}
+
+        if path == '/api/alerts':
+            frame = self.alerts()
+        elif path in self.ENDPOINTS:
+            frame = self.table(self.ENDPOINTS[path])
+        else:
+            return None
+
+        competitors = params.get('competitor')
+        if competitors and 'competitor' in frame.columns:
+            frame = frame[frame['competitor'].isin(competitors)]
+        days = params.get('days')
+        if days and 'date' in frame.columns:
+            dates = pd.to_datetime(frame['date'])
+            frame = frame[dates > dates.max() - pd.Timedelta(days=int(days[0]))]
+        return {
+            'dataset_version': self.version,
+            'data': json.loads(frame.to_json(orient='records', date_format='iso'))
+        }
+
+    @monitor.timed('api.respond')
+    def respond(self, target):
+        """(status, body, etag) for a request target; bodies are built once per dataset version"""
+        self.refresh()
+        with self._lock:
+            cached = self._responses.get(target)
+        if cached is not None:
+            monitor.increment('api.cache_hits')
+            return cached
+
+        version = self.version
+        url = urlsplit(target)
+        try:
+            payload = self.payload(url.path.rstrip('/') or '/', parse_qs(url.query))
+        except ValueError as e:
+            return 400, json.dumps({'error': str(e)}).encode('utf-8'), None
+        if payload is None:
+            return 404, json.dumps({'error': f"Unknown endpoint {url.path}"}).encode('utf-8'), None
+
+        body = json.dumps(payload).encode('utf-8')
+        response = (200, body, f'"{self.version}-{hashlib.sha1(body).hexdigest()[:16]}"')
+        with self._lock:
+            # Arbitrary query strings must not grow the cache without bound
+            if version == self.version and len(self._responses) < config.API_CONFIG['max_cached_responses']:
+                self._responses[target] = response
+        return response
+
+
+def etag_matches(header, etag):
+    """Weak comparison of an ETag against an If-None-Match list, as RFC 9110 prescribes for GET"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag.strip('"')
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate.strip('"') == opaque:
+            return True
+    return False
+
+
+class AggregatesRequestHandler(BaseHTTPRequestHandler):
+    """GET handler with If-None-Match support"""
+
+    api = None
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_body(200, b'{"status": "ok"}')
+            return
+        status, body, etag = self.api.respond(self.path)
+        if etag is not None and etag_matches(self.headers.get('If-None-Match'), etag):
+            monitor.increment('api.not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_body(status, body, etag)
+
+    def send_body(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', f"public, max-age={config.API_CONFIG['max_age_seconds']}")
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(api=None, host=None, port=None):
+    """HTTP server for the aggregates API"""
+    handler = type('BoundAggregatesRequestHandler', (AggregatesRequestHandler,), {'api': api or AggregatesAPI()})
+    server = ThreadingHTTPServer((host or config.API_CONFIG['host'], port or config.API_CONFIG['port']), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(api=None):
+    """Serve the API from a daemon thread next to the dashboard, or None if the port is taken"""
+    try:
+        server = create_server(api)
+    except OSError as e:
+        # Another replica on this host already serves the API
+        logger.warning("Aggregates API not started: %s", e)
+        return None
+    threading.Thread(target=server.serve_forever, name='aggregates-api', daemon=True).start()
+    logger.info("Aggregates API listening on %s:%s", *server.server_address[:2])
+    return server
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    server = create_server()
+    logger.info("Aggregates API listening on %s:%s", *server.server_address[:2])
+    server.serve_forever()
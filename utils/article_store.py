@@ -0,0 +1,119 @@
+import os
+import glob
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import config
+from utils.profiler import monitor
+
+
+class ArticleStore:
+    """Append-only Parquet store of analyzed articles, one segment file per ingest batch"""
+
+    RETIRED_FILE = 'retired.json'
+
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir or config.STORAGE_CONFIG['data_dir']
+        self.segment_dir = os.path.join(self.data_dir, 'segments')
+        # Older articles live on only as per-day aggregates, one file per month
+        self.daily_dir = os.path.join(self.data_dir, 'daily')
+        self._lock = threading.Lock()
+
+    def prepare(self, df):
+        """Normalize an analyzed frame for Parquet storage"""
+        df = df.copy()
+        published = pd.to_datetime(df['published_at'])
+        if published.dt.tz is None:
+            published = published.dt.tz_localize('UTC')
+        df['published_at'] = published.dt.tz_convert('UTC')
+        if 'entities' in df.columns:
+            df['entities'] = df['entities'].apply(lambda entities: list(entities) if isinstance(entities, (list, tuple, np.ndarray)) else [])
+        if 'model_score' in df.columns:
+            df['model_score'] = pd.to_numeric(df['model_score'], errors='coerce')
+        return df.reset_index(drop=True)
+
+    @monitor.timed('store.append')
+    def append(self, df):
+        """Write one batch as a new segment, sorted by publication time"""
+        if df.empty:
+            return None
+
+        df = self.prepare(df).sort_values('published_at', ignore_index=True)
+        name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(self.segment_dir, name)
+
+        with self._lock:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            # Write under a temporary name so readers never see a partial segment
+            df.to_parquet(path + '.tmp', index=False)
+            os.replace(path + '.tmp', path)
+        monitor.increment('store.segments_written')
+        return path
+
+    def _retired(self):
+        try:
+            with open(os.path.join(self.data_dir, self.RETIRED_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_retired(self, retired):
+        path = os.path.join(self.data_dir, self.RETIRED_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(retired, f)
+        os.replace(path + '.tmp', path)
+
+    def _live(self, pattern):
+        with self._lock:
+            retired = self._retired()
+            return sorted(path for path in glob.glob(pattern) if os.path.basename(path) not in retired)
+
+    def commit(self, staged, retire=()):
+        """Move staged files into place and retire the files they replace, in one step for readers"""
+        with self._lock:
+            retired = self._retired()
+            for tmp_path in staged:
+                path = tmp_path[:-len('.tmp')]
+                os.replace(tmp_path, path)
+                # A file rewritten under a retired name (e.g. a daily month) is live again
+                retired.pop(os.path.basename(path), None)
+            retired.update({os.path.basename(path): time.time() for path in retire})
+            if staged or retire:
+                self._write_retired(retired)
+
+    def purge_retired(self, grace_seconds):
+        """Delete retired files once scans that listed them before retirement have had time to finish"""
+        with self._lock:
+            retired = self._retired()
+            expired = [name for name, retired_at in retired.items() if time.time() - retired_at >= grace_seconds]
+            for name in expired:
+                for directory in (self.segment_dir, self.daily_dir):
+                    path = os.path.join(directory, name)
+                    if os.path.exists(path):
+                        os.remove(path)
+                del retired[name]
+            if expired:
+                self._write_retired(retired)
+        return len(expired)
+
+    def segment_paths(self):
+        """All committed segment files that have not been retired by maintenance"""
+        return self._live(os.path.join(self.segment_dir, '*.parquet'))
+
+    def daily_paths(self):
+        """All live monthly files of the daily aggregate tier"""
+        return self._live(os.path.join(self.daily_dir, '*.parquet'))
+
+    def has_data(self):
+        return bool(self.segment_paths() or self.daily_paths())
+
+    def load(self, columns=None):
+        """Load the whole history into memory (only for datasets that fit in RAM)"""
+        paths = self.segment_paths()
+        if not paths:
+            return pd.DataFrame()
+        return pd.concat([pd.read_parquet(path, columns=columns) for path in paths], ignore_index=True)
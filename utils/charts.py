@@ -0,0 +1,143 @@
+import pandas as pd
+import plotly.express as px
+
+SENTIMENT_COLORS = {
+    'Positive': '#2ecc71',
+    'Negative': '#e74c3c',
+    'Neutral': '#f39c12'
+}
+
+
+def sentiment_distribution_pie(df):
+    """Pie chart of sentiment labels"""
+    sentiment_counts = df['sentiment_label'].value_counts()
+    fig = px.pie(
+        values=sentiment_counts.values,
+        names=sentiment_counts.index,
+        title="Sentiment Distribution",
+        color=sentiment_counts.index,
+        color_discrete_map=SENTIMENT_COLORS
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+
+def sentiment_by_competitor_bar(df):
+    """Stacked bar of sentiment labels per competitor"""
+    sentiment_by_competitor = pd.crosstab(
+        df['competitor'],
+        df['sentiment_label']
+    )
+    fig = px.bar(
+        sentiment_by_competitor,
+        title="Sentiment Distribution by Competitor",
+        barmode='stack',
+        color_discrete_map=SENTIMENT_COLORS
+    )
+    fig.update_layout(xaxis_title="Competitor", yaxis_title="Number of Articles")
+    return fig
+
+
+def average_sentiment_by_competitor_bar(df):
+    """Horizontal bar of mean sentiment per competitor"""
+    avg_sentiment = df.groupby('competitor')['sentiment_score'].mean().sort_values()
+    fig = px.bar(
+        x=avg_sentiment.values,
+        y=avg_sentiment.index,
+        orientation='h',
+        title="Average Sentiment Score by Competitor",
+        color=avg_sentiment.values,
+        color_continuous_scale='RdYlGn',
+        color_continuous_midpoint=0
+    )
+    fig.update_layout(xaxis_title="Sentiment Score", yaxis_title="Competitor")
+    return fig
+
+
+def sentiment_score_box(df):
+    """Box plot of sentiment scores per competitor"""
+    fig = px.box(
+        df,
+        x='competitor',
+        y='sentiment_score',
+        title="Sentiment Score Distribution by Competitor",
+        color='competitor'
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def emotion_distribution_pie(df):
+    """Pie chart of detected emotions"""
+    emotion_counts = df['emotion'].value_counts()
+    fig = px.pie(
+        values=emotion_counts.values,
+        names=emotion_counts.index,
+        title="Emotion Distribution in Articles"
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+
+def emotion_heatmap(df):
+    """Heatmap of emotion shares per competitor"""
+    emotion_by_competitor = pd.crosstab(
+        df['competitor'],
+        df['emotion'],
+        normalize='index'
+    )
+    fig = px.imshow(
+        emotion_by_competitor,
+        title="Emotion Distribution Heatmap by Competitor",
+        aspect="auto",
+        color_continuous_scale='Blues'
+    )
+    return fig
+
+
+def top_sources_bar(df):
+    """Horizontal bar of the ten most frequent sources"""
+    source_counts = df['source'].value_counts().head(10)
+    fig = px.bar(
+        x=source_counts.values,
+        y=source_counts.index,
+        orientation='h',
+        title="Top 10 News Sources",
+        color=source_counts.values,
+        color_continuous_scale='viridis'
+    )
+    fig.update_layout(xaxis_title="Number of Articles", yaxis_title="Source")
+    return fig
+
+
+def sentiment_by_source_bar(df):
+    """Horizontal bar of mean sentiment per source"""
+    source_sentiment = df.groupby('source')['sentiment_score'].mean().sort_values().tail(10)
+    fig = px.bar(
+        x=source_sentiment.values,
+        y=source_sentiment.index,
+        orientation='h',
+        title="Average Sentiment by Source (Top 10)",
+        color=source_sentiment.values,
+        color_continuous_scale='RdYlGn',
+        color_continuous_midpoint=0
+    )
+    fig.update_layout(xaxis_title="Average Sentiment Score", yaxis_title="Source")
+    return fig
+
+
+def top_entities_bar(df):
+    """Horizontal bar of the fifteen most mentioned entities"""
+    # Works for Python lists and the arrays produced by Arrow snapshots
+    entity_counts = df['entities'].explode().dropna().value_counts().head(15)
+
+    fig = px.bar(
+        x=entity_counts.values,
+        y=entity_counts.index,
+        orientation='h',
+        title="Top 15 Mentioned Entities",
+        color=entity_counts.values,
+        color_continuous_scale='viridis'
+    )
+    fig.update_layout(xaxis_title="Frequency", yaxis_title="Entity")
+    return fig
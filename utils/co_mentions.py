@@ -0,0 +1,200 @@
+import copy
+import threading
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import config
+from utils.profiler import monitor
+
+
+class CoMentionGraph:
+    """Competitor x entity and competitor x competitor co-mention counts as sparse matrices per day"""
+
+    def __init__(self, competitors=None):
+        competitors = competitors or config.COMPETITORS
+        # Entities naming a competitor (or one of its aliases) count as a competitor mention
+        self.aliases = {
+            alias.lower(): name
+            for name, names in competitors.items()
+            for alias in [name] + list(names)
+        }
+        self.competitors = {}
+        self.entities = {}
+        self.days = {}
+        self._lock = threading.Lock()
+
+    def fork(self):
+        """Copy for a derived dataset version; day matrices are replaced on update, never mutated, so they are shared"""
+        with self._lock:
+            graph = copy.copy(self)
+            graph.competitors = dict(self.competitors)
+            graph.entities = dict(self.entities)
+            graph.days = dict(self.days)
+        graph._lock = threading.Lock()
+        return graph
+
+    @staticmethod
+    def _ids(vocabulary, values):
+        """Stable integer ids for values, growing the vocabulary as needed"""
+        for value in pd.unique(values):
+            if value not in vocabulary:
+                vocabulary[value] = len(vocabulary)
+        return np.fromiter((vocabulary[value] for value in values), dtype=np.int64, count=len(values))
+
+    @staticmethod
+    def _incidence(rows, columns, n_rows, n_columns):
+        """Binary article x item matrix"""
+        matrix = sp.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(n_rows, n_columns))
+        matrix.data[:] = 1.0
+        return matrix
+
+    @monitor.timed('comentions.update')
+    def update(self, df):
+        """Fold newly ingested articles into the per-day co-mention matrices"""
+        if df.empty or 'entities' not in df.columns:
+            return
+
+        published = pd.to_datetime(df['published_at'])
+        if published.dt.tz is not None:
+            published = published.dt.tz_convert(None)
+        articles = pd.DataFrame({
+            'day': published.dt.floor('D').to_numpy(),
+            'competitor': df['competitor'].to_numpy(),
+            'entities': df['entities'].to_numpy()
+        })
+
+        mentions = articles['entities'].explode().dropna().astype(str)
+        mentioned = mentions.str.lower().map(self.aliases)
+        # Each article mentions its tagged competitor plus any competitor named in its entities
+        competitor_rows = np.concatenate([articles.index.to_numpy(), mentioned.dropna().index.to_numpy()])
+        competitor_names = np.concatenate([articles['competitor'].to_numpy(), mentioned.dropna().to_numpy()])
+        topics = mentions[mentioned.isna()]
+
+        with self._lock:
+            competitor_ids = self._ids(self.competitors, competitor_names)
+            entity_ids = self._ids(self.entities, topics.to_numpy())
+            n_articles = len(articles)
+            competitor_matrix = self._incidence(competitor_rows, competitor_ids, n_articles, len(self.competitors))
+            entity_matrix = self._incidence(topics.index.to_numpy(), entity_ids, n_articles, len(self.entities))
+
+            for day, rows in articles.groupby('day').indices.items():
+                day = pd.Timestamp(day)
+                day_competitors = competitor_matrix[rows]
+                competitor_entity = (day_competitors.T @ entity_matrix[rows]).tocsr()
+                competitor_competitor = (day_competitors.T @ day_competitors).tocsr()
+                if day in self.days:
+                    previous_entity, previous_competitor = self.days[day]
+                    competitor_entity = self._resized(previous_entity) + competitor_entity
+                    competitor_competitor = self._resized(previous_competitor, square=True) + competitor_competitor
+                self.days[day] = (competitor_entity, competitor_competitor)
+        monitor.increment('comentions.articles', len(df))
+
+    def _resized(self, matrix, square=False):
+        """Pad a stored matrix to the current vocabulary sizes"""
+        shape = (len(self.competitors), len(self.competitors) if square else len(self.entities))
+        if matrix.shape == shape:
+            return matrix
+        matrix = matrix.copy()
+        matrix.resize(shape)
+        return matrix
+
+    def tables(self):
+        """Per-day co-mention counts as long tables, so snapshots can restore the graph without a rebuild"""
+        with self._lock:
+            competitor_names = np.array(list(self.competitors), dtype=object)
+            entity_names = np.array(list(self.entities), dtype=object)
+            entity_frames, competitor_frames = [], []
+            for day, (entity_counts, competitor_counts) in self.days.items():
+                for counts, target_names, frames in ((entity_counts, entity_names, entity_frames),
+                                                     (competitor_counts, competitor_names, competitor_frames)):
+                    counts = counts.tocoo()
+                    frames.append(pd.DataFrame({
+                        'day': np.full(counts.nnz, day.to_datetime64(), dtype='datetime64[ns]'),
+                        'competitor': competitor_names[counts.row],
+                        'target': target_names[counts.col],
+                        'articles': counts.data.astype(np.int64)
+                    }))
+        columns = ['day', 'competitor', 'target', 'articles']
+        return {
+            'co_mentions_entity': pd.concat(entity_frames, ignore_index=True) if entity_frames else pd.DataFrame(columns=columns),
+            'co_mentions_competitor': pd.concat(competitor_frames, ignore_index=True) if competitor_frames else pd.DataFrame(columns=columns)
+        }
+
+    @classmethod
+    def from_tables(cls, tables, competitors=None):
+        """Rebuild a graph from the tables written by `tables()`"""
+        graph = cls(competitors)
+        entity_table, competitor_table = tables['co_mentions_entity'], tables['co_mentions_competitor']
+        graph._ids(graph.competitors, np.concatenate([
+            entity_table['competitor'].to_numpy(dtype=object),
+            competitor_table['competitor'].to_numpy(dtype=object),
+            competitor_table['target'].to_numpy(dtype=object)
+        ]))
+        graph._ids(graph.entities, entity_table['target'].to_numpy(dtype=object))
+        n_competitors, n_entities = len(graph.competitors), len(graph.entities)
+
+        def per_day(table, vocabulary, n_columns):
+            matrices = {}
+            for day, rows in table.groupby('day'):
+                matrices[pd.Timestamp(day)] = sp.csr_matrix((
+                    rows['articles'].to_numpy(dtype=float),
+                    (graph._ids(graph.competitors, rows['competitor'].to_numpy(dtype=object)),
+                     graph._ids(vocabulary, rows['target'].to_numpy(dtype=object)))
+                ), shape=(n_competitors, n_columns))
+            return matrices
+
+        entity_days = per_day(entity_table, graph.entities, n_entities)
+        competitor_days = per_day(competitor_table, graph.competitors, n_competitors)
+        for day in set(entity_days) | set(competitor_days):
+            graph.days[day] = (
+                entity_days.get(day, sp.csr_matrix((n_competitors, n_entities))),
+                competitor_days.get(day, sp.csr_matrix((n_competitors, n_competitors)))
+            )
+        return graph
+
+    def window(self, days=None):
+        """Summed competitor x entity and competitor x competitor matrices over the last `days` days"""
+        with self._lock:
+            n_competitors, n_entities = len(self.competitors), len(self.entities)
+            competitor_entity = sp.csr_matrix((n_competitors, n_entities))
+            competitor_competitor = sp.csr_matrix((n_competitors, n_competitors))
+            if not self.days:
+                return competitor_entity, competitor_competitor
+            end = max(self.days)
+            for day, (entity_counts, competitor_counts) in self.days.items():
+                if days and day <= end - pd.Timedelta(days=days):
+                    continue
+                competitor_entity = competitor_entity + self._resized(entity_counts)
+                competitor_competitor = competitor_competitor + self._resized(competitor_counts, square=True)
+        return competitor_entity, competitor_competitor
+
+    def top_edges(self, kind='entity', days=None, competitors=None, limit=20):
+        """Heaviest edges of one graph in the window as (source, target, articles) rows"""
+        competitor_entity, competitor_competitor = self.window(days)
+        competitor_names = np.array(list(self.competitors), dtype=object)
+        if kind == 'competitor':
+            # Symmetric, so keep each pair once and drop the per-competitor totals on the diagonal
+            matrix, target_names = sp.triu(competitor_competitor, k=1).tocoo(), competitor_names
+        else:
+            matrix, target_names = competitor_entity.tocoo(), np.array(list(self.entities), dtype=object)
+
+        edges = pd.DataFrame({
+            'source': competitor_names[matrix.row],
+            'target': target_names[matrix.col],
+            'articles': matrix.data.astype(int)
+        })
+        edges = edges[edges['articles'] > 0]
+        if competitors:
+            selected = edges['source'].isin(competitors)
+            if kind == 'competitor':
+                selected |= edges['target'].isin(competitors)
+            edges = edges[selected]
+        return edges.nlargest(limit, 'articles').reset_index(drop=True)
+
+    def competitor_matrix(self, days=None):
+        """Dense competitor x competitor co-mention counts for plotting"""
+        _, competitor_competitor = self.window(days)
+        names = list(self.competitors)
+        matrix = competitor_competitor.toarray()
+        np.fill_diagonal(matrix, 0)
+        return pd.DataFrame(matrix, index=names, columns=names)
@@ -3,66 +3,86 @@ import pandas as pd
 from datetime import datetime, timedelta
 import time
 import json
+from urllib.parse import quote
 import streamlit as st
+from utils.profiler import monitor
+from utils.fetch_planner import FetchPlanner
+from utils.key_validator import KeyValidator
 
 class DataFetcher:
-    def __init__(self):
+    def __init__(self, verbose=True, planner=None, validator=None):
         self.newsapi_key = None
         self.gnews_key = None
+        self.verbose = verbose
+        self.planner = planner or FetchPlanner()
+        self.validator = validator or KeyValidator(planner=self.planner)
+        self.last_call_succeeded = False
+    
+    def notify(self, level, message):
+        """Show a status message in the UI unless running headless"""
+        if self.verbose:
+            getattr(st, level)(message)
         
+    def configured_keys(self):
+        """Configured keys by provider"""
+        return {'newsapi': self.newsapi_key, 'gnews': self.gnews_key}
+    
     def configure_keys(self, newsapi_key, gnews_key):
-        """Configure API keys"""
+        """Configure API keys and start validating them in the background"""
         self.newsapi_key = newsapi_key
         self.gnews_key = gnews_key
         
-        # Validate keys by making a test call
-        if newsapi_key:
-            test_result = self.test_newsapi_key()
-            if not test_result:
-                st.error("❌ Invalid NewsAPI key. Please check your key.")
-                return False
-        
-        if gnews_key:
-            test_result = self.test_gnews_key()
-            if not test_result:
-                st.error("❌ Invalid GNews key. Please check your key.")
-                return False
+        # Only a cached rejection fails immediately; unknown keys are checked without blocking
+        results = self.validator.validate(self.configured_keys(), wait=0)
+        if results.get('newsapi') is False:
+            st.error("❌ Invalid NewsAPI key. Please check your key.")
+            return False
+        if results.get('gnews') is False:
+            st.error("❌ Invalid GNews key. Please check your key.")
+            return False
                 
         return True
     
+    def verify_keys(self):
+        """Drop keys a check has rejected, waiting briefly for checks still in flight"""
+        results = self.validator.validate(self.configured_keys(), wait=self.validator.timeout)
+        if results.get('newsapi') is False:
+            self.notify('error', "❌ NewsAPI key was rejected. Please check your key.")
+            self.newsapi_key = None
+        if results.get('gnews') is False:
+            self.notify('error', "❌ GNews key was rejected. Please check your key.")
+            self.gnews_key = None
+    
     def test_newsapi_key(self):
         """Test NewsAPI key validity"""
-        try:
-            url = f"https://newsapi.org/v2/top-headlines?country=us&pageSize=1&apiKey={self.newsapi_key}"
-            response = requests.get(url)
-            return response.status_code == 200
-        except:
-            return False
+        return bool(self.validator.check('newsapi', self.newsapi_key))
     
     def test_gnews_key(self):
         """Test GNews key validity"""
-        try:
-            url = f"https://gnews.io/api/v4/top-headlines?token={self.gnews_key}&lang=en&max=1"
-            response = requests.get(url)
-            return response.status_code == 200
-        except:
-            return False
+        return bool(self.validator.check('gnews', self.gnews_key))
     
     def get_newsapi_articles(self, query, page_size=20, days_back=7):
         """Fetch articles from NewsAPI"""
         if not self.newsapi_key:
-            st.warning("⚠️ NewsAPI key not configured")
+            self.notify('warning', "⚠️ NewsAPI key not configured")
             return pd.DataFrame()
             
         data = []
+        self.last_call_succeeded = False
         from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
         
-        url = f"https://newsapi.org/v2/everything?q={query}&from={from_date}&sortBy=publishedAt&apiKey={self.newsapi_key}&pageSize={page_size}&language=en"
+        url = f"https://newsapi.org/v2/everything?q={quote(query)}&from={from_date}&sortBy=publishedAt&apiKey={self.newsapi_key}&pageSize={page_size}&language=en"
         
         try:
-            response = requests.get(url)
+            with monitor.stage('fetch.newsapi.http'):
+                response = requests.get(url)
+            monitor.increment('fetch.newsapi.requests')
+            if response.status_code in (200, 401):
+                self.validator.record('newsapi', self.newsapi_key, response.status_code == 200)
             if response.status_code == 200:
+                self.last_call_succeeded = True
                 articles = response.json().get("articles", [])
+                monitor.increment('fetch.newsapi.articles', len(articles))
                 for article in articles:
                     data.append({
                         "source": "NewsAPI",
@@ -76,29 +96,38 @@ class DataFetcher:
                         "text": f"{article.get('title', '')}. {article.get('description', '') or ''}",
                         "image_url": article.get('urlToImage', '')
                     })
-                st.success(f"✅ NewsAPI: Found {len(articles)} articles for '{query}'")
+                self.notify('success', f"✅ NewsAPI: Found {len(articles)} articles for '{query}'")
             else:
-                st.error(f"❌ NewsAPI Error: {response.status_code} - {response.json().get('message', 'Unknown error')}")
+                if response.status_code == 429:
+                    self.planner.mark_exhausted('newsapi')
+                self.notify('error', f"❌ NewsAPI Error: {response.status_code} - {response.json().get('message', 'Unknown error')}")
         except Exception as e:
-            st.error(f"❌ Error fetching from NewsAPI: {e}")
+            self.notify('error', f"❌ Error fetching from NewsAPI: {e}")
             
         return pd.DataFrame(data)
     
     def get_gnews_articles(self, query, max_results=20, days_back=7):
         """Fetch articles from GNews"""
         if not self.gnews_key:
-            st.warning("⚠️ GNews key not configured")
+            self.notify('warning', "⚠️ GNews key not configured")
             return pd.DataFrame()
             
         data = []
+        self.last_call_succeeded = False
         from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%dT%H:%M:%SZ')
         
-        url = f"https://gnews.io/api/v4/search?q={query}&from={from_date}&token={self.gnews_key}&max={max_results}&lang=en"
+        url = f"https://gnews.io/api/v4/search?q={quote(query)}&from={from_date}&token={self.gnews_key}&max={max_results}&lang=en"
         
         try:
-            response = requests.get(url)
+            with monitor.stage('fetch.gnews.http'):
+                response = requests.get(url)
+            monitor.increment('fetch.gnews.requests')
+            if response.status_code in (200, 401):
+                self.validator.record('gnews', self.gnews_key, response.status_code == 200)
             if response.status_code == 200:
+                self.last_call_succeeded = True
                 articles = response.json().get("articles", [])
+                monitor.increment('fetch.gnews.articles', len(articles))
                 for article in articles:
                     data.append({
                         "source": "GNews",
@@ -112,76 +141,80 @@ class DataFetcher:
                         "text": f"{article.get('title', '')}. {article.get('description', '') or ''}",
                         "image_url": article.get('image', '')
                     })
-                st.success(f"✅ GNews: Found {len(articles)} articles for '{query}'")
+                self.notify('success', f"✅ GNews: Found {len(articles)} articles for '{query}'")
             else:
+                if response.status_code in (403, 429):
+                    self.planner.mark_exhausted('gnews')
                 error_msg = response.json().get('errors', ['Unknown error'])[0] if response.json().get('errors') else 'Unknown error'
-                st.error(f"❌ GNews Error: {response.status_code} - {error_msg}")
+                self.notify('error', f"❌ GNews Error: {response.status_code} - {error_msg}")
         except Exception as e:
-            st.error(f"❌ Error fetching from GNews: {e}")
+            self.notify('error', f"❌ Error fetching from GNews: {e}")
             
         return pd.DataFrame(data)
     
+    @monitor.timed('fetch.total')
     def fetch_competitor_data(self, competitors, articles_per_query=10, days_back=7):
         """Fetch data for multiple competitors"""
         all_data = []
         
+        # Keys are verified lazily, on the first real fetch
+        self.verify_keys()
+        
         # Check if any API keys are configured
         if not self.newsapi_key and not self.gnews_key:
-            st.error("❌ Please configure at least one API key to fetch data")
+            self.notify('error', "❌ Please configure at least one API key to fetch data")
             return pd.DataFrame()
         
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        progress_bar = st.progress(0) if self.verbose else None
+        status_text = st.empty() if self.verbose else None
         
-        total_queries = sum(len(queries) for queries in competitors.values())
-        current_query = 0
+        # Merge aliases into OR-queries and spend the remaining quota on the stalest competitors first
+        providers = [name for name, key in (('newsapi', self.newsapi_key), ('gnews', self.gnews_key)) if key]
+        plan = self.planner.plan(competitors, providers)
+        if not plan:
+            self.notify('warning', "⚠️ Daily API quota exhausted for all configured providers")
         
-        for competitor, queries in competitors.items():
-            for query in queries:
-                current_query += 1
-                progress = current_query / total_queries
+        for current_call, call in enumerate(plan, start=1):
+            competitor, provider, query = call['competitor'], call['provider'], call['query']
+            if self.verbose:
+                progress = current_call / len(plan)
                 progress_bar.progress(progress)
                 status_text.text(f"Fetching data for {competitor}: '{query}'...")
-                
-                # Fetch from NewsAPI if key is available
-                newsapi_df = pd.DataFrame()
-                if self.newsapi_key:
-                    newsapi_df = self.get_newsapi_articles(
-                        query, page_size=articles_per_query, days_back=days_back
-                    )
-                
-                # Fetch from GNews if key is available
-                gnews_df = pd.DataFrame()
-                if self.gnews_key:
-                    gnews_df = self.get_gnews_articles(
-                        query, max_results=articles_per_query, days_back=days_back
-                    )
-                
-                # Add competitor tag
-                if not newsapi_df.empty:
-                    newsapi_df['competitor'] = competitor
-                if not gnews_df.empty:
-                    gnews_df['competitor'] = competitor
-                
-                # Combine
-                combined = pd.concat([newsapi_df, gnews_df], ignore_index=True)
-                if not combined.empty:
-                    all_data.append(combined)
-                
-                # Rate limiting
+            
+            if provider == 'newsapi':
+                articles_df = self.get_newsapi_articles(
+                    query, page_size=articles_per_query, days_back=days_back
+                )
+            else:
+                articles_df = self.get_gnews_articles(
+                    query, max_results=articles_per_query, days_back=days_back
+                )
+            # Failed calls still count against the quota but leave the competitor stale
+            self.planner.record(competitor, provider, succeeded=self.last_call_succeeded)
+            
+            # Add competitor tag
+            if not articles_df.empty:
+                articles_df['competitor'] = competitor
+                all_data.append(articles_df)
+            
+            # Rate limiting
+            with monitor.stage('fetch.rate_limit'):
                 time.sleep(1)
         
-        progress_bar.empty()
-        status_text.empty()
+        if self.verbose:
+            progress_bar.empty()
+            status_text.empty()
         
         if all_data:
             final_df = pd.concat(all_data, ignore_index=True)
             final_df.dropna(subset=['text'], inplace=True)
+            # The same story can come back from both providers
+            final_df.drop_duplicates(subset=['url', 'competitor'], inplace=True)
             if not final_df.empty:
                 final_df['published_at'] = pd.to_datetime(final_df['published_at'])
                 final_df.reset_index(drop=True, inplace=True)
-                st.success(f"🎉 Successfully fetched {len(final_df)} articles!")
+                self.notify('success', f"🎉 Successfully fetched {len(final_df)} articles!")
             return final_df
         else:
-            st.warning("⚠️ No articles found with the current configuration")
+            self.notify('warning', "⚠️ No articles found with the current configuration")
             return pd.DataFrame()
\ No newline at end of file
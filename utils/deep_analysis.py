@@ -0,0 +1,159 @@
+import re
+import json
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import config
+from utils.profiler import monitor
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(])')
+# NewsAPI truncates content and appends e.g. "[+2817 chars]"
+TRUNCATION_MARKER = re.compile(r'\s*(?:…|\.\.\.)?\s*\[\+\d+ chars\]\s*$')
+
+_vader = None
+
+
+def lexicon_scores(sentences):
+    """Raw VADER compound and TextBlob polarity per sentence; runs in worker processes"""
+    global _vader
+    from textblob import TextBlob
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    if _vader is None:
+        _vader = SentimentIntensityAnalyzer()
+    return [(_vader.polarity_scores(sentence)['compound'], TextBlob(sentence).sentiment.polarity) for sentence in sentences]
+
+
+def split_sentences(text, max_sentences=None):
+    """Split article content into sentences, dropping the provider's truncation marker"""
+    if not isinstance(text, str) or not text.strip():
+        return []
+    text = TRUNCATION_MARKER.sub('', ' '.join(text.split()))
+    sentences = [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text) if len(sentence.strip()) > 3]
+    return sentences[:max_sentences] if max_sentences else sentences
+
+
+class DeepContentAnalyzer:
+    """Sentence-level scoring of article content, attributed to the competitors each sentence mentions"""
+
+    def __init__(self, competitors=None, workers=None, batch_size=None, cache_size=None, max_sentences=None):
+        deep_config = config.DEEP_ANALYSIS_CONFIG
+        competitors = competitors or config.COMPETITORS
+        self.workers = workers or deep_config['workers']
+        self.batch_size = batch_size or deep_config['batch_size']
+        self.cache_size = cache_size or deep_config['cache_size']
+        self.max_sentences = max_sentences or deep_config['max_sentences']
+        self.patterns = {
+            name: re.compile(r'\b(?:' + '|'.join(re.escape(alias) for alias in [name] + list(aliases)) + r')\b', re.IGNORECASE)
+            for name, aliases in competitors.items()
+        }
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def mentions(self, sentence):
+        """Competitors a sentence names"""
+        return [name for name, pattern in self.patterns.items() if pattern.search(sentence)]
+
+    def _cached(self, keys):
+        with self._lock:
+            hits = {}
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    hits[key] = self._cache[key]
+            return hits
+
+    def _store(self, scores):
+        with self._lock:
+            self._cache.update(scores)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _pool(self):
+        if self._executor is None:
+            # Spawned rather than forked: the caller may be a threaded server process
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def score_sentences(self, sentences, analyzer):
+        """Score unique sentences in batches, in parallel, serving repeats from the cache"""
+        rules = analyzer.rules
+        if analyzer.backend is not None:
+            keys = [('model', sentence) for sentence in sentences]
+        else:
+            keys = [('lexicon', sentence) for sentence in sentences]
+        scores = self._cached(keys)
+        monitor.increment('deep.sentence_cache_hits', len(scores))
+
+        pending = [sentence for key, sentence in zip(keys, sentences) if key not in scores]
+        if pending:
+            if analyzer.backend is not None:
+                # The backend batches by length internally and releases the GIL while scoring
+                computed = analyzer.backend.score_batch(pending)
+            else:
+                batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+                if len(batches) > 1 and self.workers > 1:
+                    computed = [score for batch in self._pool().map(lexicon_scores, batches) for score in batch]
+                else:
+                    computed = lexicon_scores(pending)
+            fresh = {(keys[0][0], sentence): score for sentence, score in zip(pending, computed)}
+            self._store(fresh)
+            scores.update(fresh)
+
+        raw = [scores[key] for key in keys]
+        if analyzer.backend is not None:
+            return np.asarray(raw, dtype=float)
+        raw = np.asarray(raw, dtype=float).reshape(-1, 2)
+        return raw[:, 0] * rules['vader_weight'] + raw[:, 1] * rules['textblob_weight']
+
+    @monitor.timed('analyze.deep')
+    def analyze(self, df, analyzer, content_column='content'):
+        """Per-article content score for the tagged competitor plus a score for every competitor mentioned"""
+        result = pd.DataFrame({
+            'content_score': np.nan,
+            'content_sentences': 0,
+            'competitor_scores': '{}'
+        }, index=df.index)
+        if df.empty or content_column not in df.columns:
+            return result
+
+        rows = []
+        for position, text in enumerate(df[content_column].to_numpy()):
+            for sentence in split_sentences(text, self.max_sentences):
+                rows.append((position, sentence))
+        if not rows:
+            return result
+
+        sentences = pd.DataFrame(rows, columns=['article', 'sentence'])
+        unique = sentences['sentence'].drop_duplicates()
+        unique_scores = pd.Series(self.score_sentences(unique.tolist(), analyzer), index=unique.to_numpy())
+        sentences['score'] = sentences['sentence'].map(unique_scores).to_numpy()
+        sentences['competitor'] = sentences['sentence'].map(
+            {sentence: self.mentions(sentence) for sentence in unique}
+        )
+        monitor.increment('deep.sentences', len(sentences))
+
+        # Attributed sentences: one row per sentence and competitor it names
+        attributed = sentences.explode('competitor').dropna(subset=['competitor'])
+        per_competitor = attributed.groupby(['article', 'competitor'])['score'].mean().round(3)
+        overall = sentences.groupby('article')['score'].agg(['mean', 'size'])
+
+        tagged = df['competitor'].to_numpy() if 'competitor' in df.columns else np.full(len(df), None)
+        competitor_scores = [{} for _ in range(len(df))]
+        for (article, competitor), score in per_competitor.items():
+            competitor_scores[article][competitor] = score
+        content_scores = np.full(len(df), np.nan)
+        content_scores[overall.index.to_numpy()] = overall['mean'].to_numpy()
+        # Prefer the sentences that actually name the article's competitor
+        for article, scores in enumerate(competitor_scores):
+            if tagged[article] in scores:
+                content_scores[article] = scores[tagged[article]]
+
+        result['content_score'] = np.round(content_scores, 3)
+        result.loc[df.index[overall.index.to_numpy()], 'content_sentences'] = overall['size'].to_numpy()
+        # JSON text keeps the column storable in Parquet and Arrow whatever competitors appear
+        result['competitor_scores'] = [json.dumps(scores) for scores in competitor_scores]
+        return result
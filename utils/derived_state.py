@@ -0,0 +1,80 @@
+import uuid
+import pandas as pd
+from utils.profiler import monitor
+from utils.rollups import TrendRollups
+from utils.anomaly import AnomalyDetector
+from utils.co_mentions import CoMentionGraph
+from utils.search_index import SearchIndex
+from utils.filter_index import FilterIndex
+from utils.story_clustering import StoryClusterer
+from utils.session_memory import fork
+
+
+def empty_state(df, shared_stories=True):
+    """Fresh derived structures for a dataset version built from scratch"""
+    return {
+        'rollups': TrendRollups(),
+        'anomaly_detector': AnomalyDetector(),
+        'co_mentions': CoMentionGraph(),
+        'search_index': SearchIndex(),
+        'story_clusterer': StoryClusterer(),
+        'filter_index': FilterIndex(df),
+        'shared_stories': shared_stories,
+        # Identify the version and its ancestors to the search index they share
+        'token': uuid.uuid4().hex,
+        'lineage': ()
+    }
+
+
+def descend(state, parent_state, parent_rows):
+    """Mark a state as derived from the parent's, sharing the parent's search index"""
+    state['token'] = uuid.uuid4().hex
+    state['lineage'] = (*parent_state['lineage'], (parent_state['token'], parent_rows))
+    state['search_index'] = parent_state['search_index']
+    return state
+
+
+def needs_stories(new_rows, state):
+    """True when rows must be clustered here rather than carrying the worker's story ids"""
+    if new_rows.empty:
+        return False
+    return not (state['shared_stories'] and 'story_id' in new_rows.columns and new_rows['story_id'].notna().all())
+
+
+def assign_stories(new_rows, state):
+    """Tag rows with the story cluster they belong to"""
+    # Published rows carry the worker's story ids; a privately fetched dataset numbers its own
+    if not needs_stories(new_rows, state):
+        return new_rows
+    return new_rows.assign(story_id=state['story_clusterer'].assign(new_rows))
+
+
+def derive_state(parent_state, parent_rows, new_rows):
+    """Copy-on-write state for a child version: only the structures the new rows mutate are copied"""
+    state = descend(dict(parent_state), parent_state, parent_rows)
+    state['rollups'] = parent_state['rollups'].fork()
+    state['anomaly_detector'] = parent_state['anomaly_detector'].fork()
+    state['co_mentions'] = parent_state['co_mentions'].fork()
+    if needs_stories(new_rows, parent_state):
+        state['story_clusterer'] = fork(parent_state['story_clusterer'])
+    # The search index is append-only by row position, so the child keeps extending the parent's;
+    # the parent bounds its searches by its own row count
+    return state
+
+
+@monitor.timed('session_memory.build_version')
+def build_version(new_rows, parent_df=None, parent_state=None, shared_stories=True):
+    """A dataset version and its derived structures, carried forward from the parent with the new rows only"""
+    if parent_state is None:
+        state = empty_state(pd.DataFrame(), shared_stories)
+    else:
+        state = derive_state(parent_state, 0 if parent_df is None else len(parent_df), new_rows)
+    new_rows = assign_stories(new_rows, state)
+    df = new_rows if parent_df is None or parent_df.empty else pd.concat([parent_df, new_rows], ignore_index=True)
+    state['filter_index'] = FilterIndex(df)
+    state['rollups'].update(new_rows)
+    state['anomaly_detector'].update(new_rows)
+    # Fitted up front so sessions sharing the detector only ever read it
+    state['anomaly_detector'].fit()
+    state['co_mentions'].update(new_rows)
+    return df, state
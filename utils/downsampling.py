@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import config
+from utils.profiler import monitor
+
+
+def _numeric(values):
+    """Float view of an x axis, with datetimes as nanoseconds"""
+    values = pd.Series(values)
+    if values.dtype == object:
+        values = pd.to_datetime(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if values.dt.tz is not None:
+            values = values.dt.tz_convert(None)
+        return values.astype('int64').to_numpy(dtype=float)
+    return values.to_numpy(dtype=float)
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: positions of the points that best preserve the line's shape"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # First and last points are always kept; the rest is split into equal buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous]) -
+            (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(y, n_buckets):
+    """Positions of the minimum and maximum of each equal-width bucket, in order"""
+    n = len(y)
+    if n_buckets * 2 >= n:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1]
+    bucket_of = np.repeat(np.arange(n_buckets), np.diff(np.append(edges, n)))
+    order = np.lexsort((y, bucket_of))
+    counts = np.bincount(bucket_of, minlength=n_buckets)
+    firsts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    lasts = firsts + counts - 1
+    return np.unique(np.concatenate((order[firsts], order[lasts])))
+
+
+def target_points(width_fraction=1.0, viewport_width=None):
+    """Points per series the chart can actually resolve at its rendered width"""
+    chart_config = config.CHART_CONFIG
+    viewport_width = viewport_width or chart_config['viewport_width']
+    points = int(viewport_width * width_fraction * chart_config['points_per_pixel'])
+    return max(points, chart_config['min_points'])
+
+
+@monitor.timed('charts.downsample')
+def downsample(df, x, y, threshold, group=None, method=None):
+    """Reduce each series of a frame to at most `threshold` rows, keeping whole rows"""
+    method = method or config.CHART_CONFIG['method']
+    if df.empty or len(df) <= threshold:
+        return df
+
+    groups = [df] if group is None else [frame for _, frame in df.groupby(group, sort=False)]
+    reduced = []
+    for frame in groups:
+        frame = frame.sort_values(x)
+        values = frame[y].to_numpy(dtype=float)
+        if method == 'minmax':
+            positions = minmax_indices(values, max(threshold // 2, 1))
+        else:
+            positions = lttb_indices(_numeric(frame[x]), values, threshold)
+        reduced.append(frame.iloc[positions])
+
+    result = pd.concat(reduced, ignore_index=True)
+    monitor.increment('charts.points_dropped', len(df) - len(result))
+    return result
@@ -0,0 +1,116 @@
+import threading
+from datetime import datetime, timezone
+import config
+
+
+class FetchPlanner:
+    """Plan API calls across competitors and providers under daily quotas and a per-run budget"""
+
+    PROVIDERS = ['newsapi', 'gnews']
+
+    def __init__(self, daily_quota=None, call_budget=None, max_query_length=None):
+        fetch_config = config.FETCH_CONFIG
+        self.daily_quota = dict(daily_quota or fetch_config['daily_quota'])
+        self.call_budget = call_budget or fetch_config['call_budget']
+        self.max_query_length = dict(max_query_length or fetch_config['max_query_length'])
+        self._lock = threading.Lock()
+        self._usage_day = None
+        self.used = {provider: 0 for provider in self.PROVIDERS}
+        self.last_fetched = {}
+
+    def _roll_day(self):
+        # Provider quotas reset at midnight UTC
+        today = datetime.now(timezone.utc).date()
+        if self._usage_day != today:
+            self._usage_day = today
+            self.used = {provider: 0 for provider in self.PROVIDERS}
+
+    def remaining(self, provider):
+        """Calls left today for a provider"""
+        with self._lock:
+            self._roll_day()
+            return max(self.daily_quota.get(provider, 0) - self.used.get(provider, 0), 0)
+
+    def record(self, competitor, provider, calls=1, succeeded=True):
+        """Account for calls made, marking the competitor as freshly fetched only when they succeeded"""
+        with self._lock:
+            self._roll_day()
+            self._count(provider, calls)
+            if succeeded:
+                self.last_fetched[competitor] = datetime.now()
+
+    def count(self, provider, calls=1):
+        """Account for calls that fetch nothing for a competitor, e.g. key probes"""
+        with self._lock:
+            self._roll_day()
+            self._count(provider, calls)
+
+    def _count(self, provider, calls):
+        used = self.used.get(provider, 0) + calls
+        # A call recorded after mark_exhausted (e.g. the 429 itself) must not push usage past the quota
+        quota = self.daily_quota.get(provider)
+        self.used[provider] = min(used, quota) if quota is not None else used
+
+    def mark_exhausted(self, provider):
+        """Treat a provider as out of quota for the rest of the day (e.g. after HTTP 429)"""
+        with self._lock:
+            self._roll_day()
+            self.used[provider] = self.daily_quota.get(provider, 0)
+
+    def merge_aliases(self, aliases, provider):
+        """Combine a competitor's aliases into as few OR-queries as the provider allows"""
+        max_length = self.max_query_length.get(provider, 200)
+        terms = [f'"{alias}"' if ' ' in alias else alias for alias in dict.fromkeys(aliases)]
+
+        queries, current = [], ''
+        for term in terms:
+            candidate = f"{current} OR {term}" if current else term
+            if current and len(candidate) > max_length:
+                queries.append(current)
+                candidate = term
+            current = candidate
+        if current:
+            queries.append(current)
+        return queries
+
+    def staleness_order(self, competitors):
+        """Competitors never fetched first, then the longest since their last fetch"""
+        return sorted(competitors, key=lambda comp: self.last_fetched.get(comp, datetime.min))
+
+    def plan(self, competitors, providers):
+        """Return the ordered list of calls to make for this run"""
+        remaining = {provider: self.remaining(provider) for provider in providers}
+        budget = self.call_budget
+        ordered = self.staleness_order(competitors)
+        calls = []
+
+        # First pass covers every competitor once on the provider with the most quota left,
+        # later passes add the other providers for extra source coverage while budget remains
+        for _ in providers:
+            for competitor in ordered:
+                ranked = sorted(providers, key=lambda p: remaining[p], reverse=True)
+                planned = {call['provider'] for call in calls if call['competitor'] == competitor}
+                candidates = [p for p in ranked if p not in planned]
+                if not candidates:
+                    continue
+                provider = candidates[0]
+                for query in self.merge_aliases(competitors[competitor], provider):
+                    if budget <= 0 or remaining[provider] <= 0:
+                        break
+                    calls.append({'competitor': competitor, 'provider': provider, 'query': query})
+                    remaining[provider] -= 1
+                    budget -= 1
+        return calls
+
+    def usage(self):
+        """Quota usage per provider for display"""
+        with self._lock:
+            self._roll_day()
+            return {
+                provider: {
+                    'used': self.used.get(provider, 0),
+                    'quota': self.daily_quota.get(provider, 0),
+                    'remaining': max(self.daily_quota.get(provider, 0) - self.used.get(provider, 0), 0)
+                }
+                for provider in self.PROVIDERS
+            }
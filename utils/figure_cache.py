@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+from utils.profiler import monitor
+
+
+class FigureCache:
+    """Bounded LRU cache of plotly figures keyed by (dataset version, filters, chart id)"""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder):
+        """Return the cached figure for key, building and storing it on a miss"""
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                monitor.increment('figure_cache.hits')
+                return self._figures[key]
+
+        monitor.increment('figure_cache.misses')
+        fig = builder()
+
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+                monitor.increment('figure_cache.evictions')
+        return fig
+
+    def invalidate(self, dataset_version=None):
+        """Drop every figure, or only those built for one dataset version"""
+        with self._lock:
+            if dataset_version is None:
+                self._figures.clear()
+                return
+            for key in [key for key in self._figures if key[0] == dataset_version]:
+                del self._figures[key]
+
+    def __len__(self):
+        return len(self._figures)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from utils.profiler import monitor
+
+
+class FilterIndex:
+    """Precomputed row bitmaps per sentiment, source and competitor plus a day array for date filters"""
+
+    COLUMNS = ['sentiment_label', 'source', 'competitor']
+
+    @monitor.timed('filter_index.build')
+    def __init__(self, df):
+        self.size = len(df)
+        self.bitmaps = {}
+        self.values = {}
+
+        for column in self.COLUMNS:
+            bitmaps = {}
+            if column in df.columns:
+                for value, positions in df.groupby(column, sort=True).indices.items():
+                    bitmap = np.zeros(self.size, dtype=bool)
+                    bitmap[positions] = True
+                    bitmaps[value] = bitmap
+            self.bitmaps[column] = bitmaps
+            self.values[column] = list(bitmaps.keys())
+
+        self.days = None
+        if 'published_at' in df.columns and self.size:
+            published = pd.to_datetime(df['published_at'])
+            if published.dt.tz is not None:
+                published = published.dt.tz_convert(None)
+            self.days = published.to_numpy().astype('datetime64[D]')
+
+    def date_bounds(self):
+        """Return the first and last day covered by the dataset"""
+        if self.days is None:
+            return None, None
+        return self.days.min().astype(object), self.days.max().astype(object)
+
+    def column_mask(self, column, selected):
+        """OR together the bitmaps of the selected values of one column"""
+        mask = np.zeros(self.size, dtype=bool)
+        for value in selected:
+            bitmap = self.bitmaps[column].get(value)
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def mask(self, sentiments=None, sources=None, competitors=None, date_range=None):
+        """Intersect the active filters, returning None when nothing is filtered out"""
+        mask = None
+        for column, selected in zip(self.COLUMNS, (sentiments, sources, competitors)):
+            # An empty or complete selection does not restrict the rows
+            if not selected or set(selected) >= set(self.values[column]):
+                continue
+            column_mask = self.column_mask(column, selected)
+            mask = column_mask if mask is None else mask & column_mask
+
+        if date_range and self.days is not None:
+            start, end = date_range
+            date_mask = (self.days >= np.datetime64(start, 'D')) & (self.days <= np.datetime64(end, 'D'))
+            if not date_mask.all():
+                mask = date_mask if mask is None else mask & date_mask
+        return mask
+
+    @monitor.timed('filter_index.select')
+    def select(self, df, rows=None, **filters):
+        """Return the filtered rows, reusing the original frame when no filter applies
+
+        `rows` optionally restricts the result to (and orders it by) candidate row positions,
+        e.g. ranked search hits.
+        """
+        mask = self.mask(**filters)
+        if rows is not None:
+            if mask is not None:
+                rows = rows[mask[rows]]
+            return df.iloc[rows]
+        if mask is None:
+            return df
+        return df.iloc[np.flatnonzero(mask)]
@@ -0,0 +1,304 @@
+import io
+import os
+import time
+import uuid
+import socket
+import threading
+import logging
+from datetime import datetime
+import pandas as pd
+from utils.data_fetcher import DataFetcher
+from utils.analyzer import SentimentAnalyzer
+from utils.profiler import monitor
+from utils.rollups import TrendRollups
+from utils.co_mentions import CoMentionGraph
+from utils.story_clustering import StoryClusterer
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetStore:
+    """Thread-safe store of published dataset versions, kept as append-only deltas
+
+    With a shared backend the deltas are written there as Parquet blobs so every
+    replica reads the same versions while only one ingestor writes them.
+    """
+
+    VERSION_KEY = 'dataset:version'
+    DELTA_KEY = 'dataset:delta:{}'
+
+    def __init__(self, backend=None, poll_seconds=1.0):
+        self.backend = backend
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._deltas = []
+        self._seen_urls = set()
+        self._local_version = 0
+        self._remote_version = 0
+        self._remote_checked = 0.0
+
+    @property
+    def version(self):
+        """Latest published version, polling the shared backend at most once per poll interval"""
+        if self.backend is None:
+            return self._local_version
+        now = time.time()
+        if now - self._remote_checked >= self.poll_seconds:
+            self._remote_version = int(self.backend.get(self.VERSION_KEY) or 0)
+            self._remote_checked = now
+        return max(self._remote_version, self._local_version)
+
+    def _add_delta(self, version, rows):
+        self._deltas.append((version, rows))
+        if 'url' in rows.columns:
+            self._seen_urls.update(u for u in rows['url'] if isinstance(u, str) and u)
+        self._local_version = version
+
+    def sync(self):
+        """Pull deltas published by other replicas that this process has not loaded yet"""
+        if self.backend is None:
+            return
+        latest = int(self.backend.get(self.VERSION_KEY) or 0)
+        with self._lock:
+            for version in range(self._local_version + 1, latest + 1):
+                blob = self.backend.get(self.DELTA_KEY.format(version))
+                rows = pd.read_parquet(io.BytesIO(blob)) if blob else pd.DataFrame()
+                self._add_delta(version, rows)
+        monitor.increment('dataset_store.syncs')
+
+    def _unseen(self, rows):
+        if 'url' not in rows.columns:
+            return rows
+        urls = rows['url'].fillna('')
+        fresh = ~urls.isin(self._seen_urls) & ~urls.duplicated()
+        fresh |= urls.eq('')
+        return rows[fresh.to_numpy()]
+
+    def unseen(self, rows):
+        """The rows whose URLs have not been published yet"""
+        self.sync()
+        with self._lock:
+            return self._unseen(rows)
+
+    def publish(self, new_rows):
+        """Append the rows not seen before as a new version and return that version"""
+        if new_rows.empty:
+            return self.version
+
+        self.sync()
+        with self._lock:
+            new_rows = self._unseen(new_rows)
+            if new_rows.empty:
+                return self._local_version
+
+            new_rows = new_rows.reset_index(drop=True)
+            version = self._local_version + 1
+            if self.backend is not None:
+                # Write the delta before announcing its version
+                buffer = io.BytesIO()
+                new_rows.to_parquet(buffer, index=False)
+                self.backend.set(self.DELTA_KEY.format(version), buffer.getvalue())
+                self.backend.set(self.VERSION_KEY, version)
+            self._add_delta(version, new_rows)
+            monitor.increment('ingest.published_rows', len(new_rows))
+            return version
+
+    def changes_since(self, version):
+        """Return the latest version and the rows published after `version`"""
+        self.sync()
+        with self._lock:
+            frames = [delta for delta_version, delta in self._deltas if delta_version > version and not delta.empty]
+            latest = self._local_version
+        if not frames:
+            return latest, pd.DataFrame()
+        return latest, pd.concat(frames, ignore_index=True)
+
+    def snapshot(self):
+        """Return the full dataset at the latest version"""
+        return self.changes_since(0)
+
+    def seed(self, dataset, version):
+        """Resume from a snapshot after a restart, so later snapshots still hold the full dataset"""
+        with self._lock:
+            if version <= self._local_version or dataset.empty:
+                return
+            # The snapshot becomes the base delta; sessions resume after its version
+            self._add_delta(version, dataset)
+
+
+class IngestionWorker:
+    """Background thread that fetches and analyzes articles on a schedule and publishes them"""
+
+    LEASE_NAME = 'ingestor:lease'
+
+    def __init__(self, store, planner=None, article_store=None, snapshots=None, validator=None,
+                 deep_analyzer=None, maintainer=None, lease_seconds=None, sentiment_backend=None):
+        self.store = store
+        self.sentiment_backend = sentiment_backend
+        self.planner = planner
+        self.validator = validator
+        self.deep_analyzer = deep_analyzer
+        self.article_store = article_store
+        self.snapshots = snapshots
+        self.maintainer = maintainer
+        # Process-wide derived state, published with each snapshot so sessions start without rebuilding it
+        self.clusterer = StoryClusterer()
+        self.story_offset = None
+        self.co_mentions = CoMentionGraph()
+        self._graph_version = 0
+        self._publish_lock = threading.Lock()
+        self.lease_seconds = lease_seconds or config.SHARED_BACKEND_CONFIG['lease_seconds']
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self.settings = {}
+        self.status = {'runs': 0, 'last_run': None, 'last_rows': 0, 'last_error': None, 'running': False, 'lease_held': None,
+                       'changed_by': None}
+
+    def configure(self, newsapi_key, gnews_key, competitors, articles_per_query, days_back, interval_minutes,
+                  deep_analysis=False):
+        """Update what the next ingestion runs will fetch"""
+        with self._lock:
+            self.settings = {
+                'newsapi_key': newsapi_key,
+                'gnews_key': gnews_key,
+                'competitors': dict(competitors),
+                'articles_per_query': articles_per_query,
+                'days_back': days_back,
+                'interval_minutes': interval_minutes,
+                'deep_analysis': deep_analysis
+            }
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, changed_by=None):
+        """Start the worker thread if it is not already running"""
+        if self.is_alive():
+            return
+        self.status['changed_by'] = changed_by
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='ingestion-worker', daemon=True)
+        self._thread.start()
+
+    def stop(self, changed_by=None):
+        """Ask the worker thread to exit after the current run"""
+        self.status['changed_by'] = changed_by
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self):
+        """Run the next ingestion immediately instead of waiting for the schedule"""
+        self._wake.set()
+
+    def run_once(self):
+        """Fetch, analyze and publish one batch of articles"""
+        with self._lock:
+            settings = dict(self.settings)
+        if not settings.get('competitors'):
+            return 0
+        
+        # Only the replica holding the lease ingests; the others just read what it publishes
+        backend = self.store.backend
+        if backend is not None:
+            # Hold the lease across the idle interval so leadership does not flap between runs
+            lease_seconds = max(self.lease_seconds, settings['interval_minutes'] * 60 * 2)
+            self.status['lease_held'] = backend.acquire_lease(self.LEASE_NAME, self.worker_id, lease_seconds)
+            if not self.status['lease_held']:
+                monitor.increment('ingest.lease_skipped')
+                return 0
+
+        # Storage maintenance rides on the lease too, so only one replica rewrites segments;
+        # long passes renew the lease between files
+        if self.maintainer is not None:
+            heartbeat = None
+            if backend is not None:
+                heartbeat = lambda: backend.acquire_lease(self.LEASE_NAME, self.worker_id, lease_seconds)
+            self.maintainer.run_if_due(heartbeat)
+
+        fetcher = DataFetcher(verbose=False, planner=self.planner, validator=self.validator)
+        fetcher.newsapi_key = settings['newsapi_key']
+        fetcher.gnews_key = settings['gnews_key']
+        analyzer = SentimentAnalyzer(
+            backend=self.sentiment_backend,
+            verbose=False,
+            deep=self.deep_analyzer if settings.get('deep_analysis') else None
+        )
+
+        with monitor.stage('ingest.run'):
+            fetched = fetcher.fetch_competitor_data(
+                competitors=settings['competitors'],
+                articles_per_query=settings['articles_per_query'],
+                days_back=settings['days_back']
+            )
+            if fetched.empty:
+                return 0
+            analyzed = analyzer.analyze_dataframe(fetched)
+            # Only rows the store had not seen become part of the published delta, and only they are persisted;
+            # re-fetched articles would otherwise be written to the history again on every run
+            published = self.publish_rows(analyzed)
+            if self.article_store is not None and not published.empty:
+                self.article_store.append(published)
+        return len(published)
+
+    def resume(self, dataset, tables, version):
+        """Pick up the derived state of the snapshot the store was seeded from"""
+        if 'co_mentions_entity' in tables and 'co_mentions_competitor' in tables:
+            self.co_mentions = CoMentionGraph.from_tables(tables)
+            self._graph_version = version
+        if 'story_id' in dataset.columns and not dataset.empty:
+            self.story_offset = int(dataset['story_id'].max()) + 1
+
+    def publish_rows(self, rows):
+        """Tag unseen rows with their story and publish them as a new version and snapshot"""
+        with self._publish_lock:
+            fresh = self.store.unseen(rows)
+            if fresh.empty:
+                return fresh
+            if self.story_offset is None:
+                # Story ids continue after the ones already published, e.g. by a previous lease holder
+                _, published = self.store.snapshot()
+                has_stories = 'story_id' in published.columns and published['story_id'].notna().any()
+                self.story_offset = int(published['story_id'].max()) + 1 if has_stories else 0
+            fresh = fresh.assign(story_id=self.clusterer.assign(fresh) + self.story_offset)
+            self.store.publish(fresh)
+            if self.snapshots is not None:
+                self.publish_snapshot()
+            return fresh
+
+    def publish_snapshot(self):
+        """Write the full dataset, its aggregates, rollups and co-mention graph as a memory-mappable snapshot"""
+        version, dataset = self.store.snapshot()
+        if dataset.empty:
+            return
+        rollups = TrendRollups()
+        rollups.update(dataset)
+        # The graph only folds in what was published since the last snapshot
+        _, delta = self.store.changes_since(self._graph_version)
+        self.co_mentions.update(delta)
+        self._graph_version = version
+        extra_tables = {f"rollup_{name}": table for name, table in rollups.tables.items()}
+        extra_tables.update(self.co_mentions.tables())
+        self.snapshots.publish(dataset, dataset_version=version, extra_tables=extra_tables)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.status['running'] = True
+            try:
+                self.status['last_rows'] = self.run_once()
+                self.status['last_error'] = None
+            except Exception as e:
+                logger.exception("Background ingestion failed")
+                self.status['last_error'] = str(e)
+            finally:
+                self.status['running'] = False
+                self.status['runs'] += 1
+                self.status['last_run'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            with self._lock:
+                interval = self.settings.get('interval_minutes', 30) * 60
+            self._wake.wait(interval)
+            self._wake.clear()
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+import requests
+import config
+from utils.profiler import monitor
+from utils.shared_backend import LocalBackend
+
+
+class KeyValidator:
+    """Concurrent API key checks with timeouts, cached per key hash so saving keys never blocks"""
+
+    PROBES = {
+        'newsapi': "https://newsapi.org/v2/top-headlines?country=us&pageSize=1&apiKey={key}",
+        'gnews': "https://gnews.io/api/v4/top-headlines?token={key}&lang=en&max=1"
+    }
+
+    def __init__(self, backend=None, timeout=None, valid_ttl=None, invalid_ttl=None, max_workers=None, planner=None):
+        validation_config = config.KEY_VALIDATION_CONFIG
+        self.backend = backend or LocalBackend()
+        self.planner = planner
+        self.timeout = timeout or validation_config['timeout_seconds']
+        self.valid_ttl = valid_ttl or validation_config['valid_ttl_seconds']
+        self.invalid_ttl = invalid_ttl or validation_config['invalid_ttl_seconds']
+        self.max_workers = max_workers or validation_config['max_workers']
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = {}
+
+    @staticmethod
+    def cache_key(provider, key):
+        """Backend key for a check result; the API key itself is never stored"""
+        digest = hashlib.sha256(f"{provider}:{key}".encode('utf-8')).hexdigest()
+        return f"keycheck:{provider}:{digest[:32]}"
+
+    def cached(self, provider, key):
+        """True or False from a recent check, None when unknown"""
+        value = self.backend.get(self.cache_key(provider, key))
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return str(value) == '1'
+
+    def record(self, provider, key, valid):
+        """Remember a check result, or a real fetch's verdict on the key"""
+        ttl = self.valid_ttl if valid else self.invalid_ttl
+        self.backend.set(self.cache_key(provider, key), 1 if valid else 0, ttl=ttl)
+
+    def check(self, provider, key):
+        """Probe the provider once; None when it could not be reached"""
+        url = self.PROBES[provider].format(key=key)
+        try:
+            with monitor.stage(f'keys.{provider}.check'):
+                response = requests.get(url, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        # Probes are real requests and spend the provider's daily quota like fetches do
+        if self.planner is not None:
+            self.planner.count(provider)
+        if response.status_code == 200:
+            valid = True
+        elif response.status_code == 401 or self.rejected_key(provider, response):
+            valid = False
+        else:
+            # GNews answers 403 once the daily quota is spent, as DataFetcher knows; the key may well be fine
+            if response.status_code == 429 or (provider == 'gnews' and response.status_code == 403):
+                if self.planner is not None:
+                    self.planner.mark_exhausted(provider)
+            # Rate limits and server errors say nothing about the key
+            return None
+        self.record(provider, key, valid)
+        return valid
+
+    @staticmethod
+    def rejected_key(provider, response):
+        """True when NewsAPI names the key itself as the problem, whatever the status code"""
+        if provider != 'newsapi':
+            return False
+        try:
+            code = response.json().get('code')
+        except ValueError:
+            return False
+        return code in ('apiKeyInvalid', 'apiKeyDisabled', 'apiKeyMissing')
+
+    def submit(self, provider, key):
+        """Start a background check unless one is cached or already running"""
+        cache_key = self.cache_key(provider, key)
+        with self._lock:
+            future = self._pending.get(cache_key)
+            if future is not None and not future.done():
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='key-check')
+            future = self._executor.submit(self.check, provider, key)
+            self._pending[cache_key] = future
+        # Registered outside the lock: a check that already finished runs the callback right here
+        future.add_done_callback(lambda done: self._discard(cache_key, done))
+        return future
+
+    def _discard(self, cache_key, future):
+        """Forget a finished check; its result, if any, is in the backend"""
+        with self._lock:
+            if self._pending.get(cache_key) is future:
+                del self._pending[cache_key]
+
+    def status(self, provider, key):
+        """'valid', 'invalid', 'pending' or 'unknown' without waiting"""
+        cached = self.cached(provider, key)
+        if cached is not None:
+            return 'valid' if cached else 'invalid'
+        with self._lock:
+            future = self._pending.get(self.cache_key(provider, key))
+        if future is not None and not future.done():
+            return 'pending'
+        return 'unknown'
+
+    def validate(self, keys, wait=0):
+        """Check every configured key concurrently and wait at most `wait` seconds for the results"""
+        results, futures = {}, {}
+        for provider, key in keys.items():
+            if not key:
+                continue
+            cached = self.cached(provider, key)
+            if cached is not None:
+                results[provider] = cached
+            else:
+                futures[provider] = self.submit(provider, key)
+        if futures:
+            wait_futures(list(futures.values()), timeout=wait)
+        for provider, future in futures.items():
+            results[provider] = future.result() if future.done() else None
+        return results
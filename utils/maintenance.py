@@ -0,0 +1,211 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+import pandas as pd
+import config
+from utils.profiler import monitor
+from utils.aggregates import daily_rollup
+
+logger = logging.getLogger(__name__)
+
+
+class StorageMaintainer:
+    """Compacts small article segments, rolls old articles into daily aggregates and enforces retention"""
+
+    DAILY_KEYS = ['published_at', 'competitor', 'source', 'sentiment_label', 'emotion']
+
+    def __init__(self, store, snapshots=None, maintenance_config=None):
+        self.store = store
+        self.snapshots = snapshots
+        self.config = maintenance_config or config.MAINTENANCE_CONFIG
+        self._lock = threading.Lock()
+        self._last_run = None
+        self.heartbeat = None
+        self.status = {'last_run': None, 'compacted': 0, 'rolled_up': 0, 'expired': 0, 'purged': 0, 'last_error': None}
+
+    def _stage(self, df, path):
+        """Write a Parquet file under a temporary name; ArticleStore.commit moves it into place"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_parquet(path + '.tmp', index=False, row_group_size=self.config['row_group_rows'])
+        return path + '.tmp'
+
+    def _heartbeat(self):
+        """Renew the caller's lease between files, stopping when another replica has taken over"""
+        if self.heartbeat is not None and not self.heartbeat():
+            raise RuntimeError("Lost the maintenance lease; stopping before touching more files")
+
+    def _read_segments(self, paths):
+        frames = [pd.read_parquet(path) for path in paths]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        df['published_at'] = pd.to_datetime(df['published_at'], utc=True)
+        return df
+
+    @monitor.timed('maintenance.compact')
+    def compact(self):
+        """Merge small segments into large segments sorted by publication time"""
+        import pyarrow.parquet as pq
+        small = [
+            path for path in self.store.segment_paths()
+            if os.path.getsize(path) < self.config['small_segment_bytes']
+        ]
+        if len(small) < 2:
+            return 0
+
+        # Group consecutive small segments up to the target segment size
+        groups, group, rows = [], [], 0
+        for path in small:
+            group.append(path)
+            rows += pq.ParquetFile(path).metadata.num_rows
+            if rows >= self.config['target_segment_rows']:
+                groups.append(group)
+                group, rows = [], 0
+        if len(group) > 1:
+            groups.append(group)
+
+        compacted = 0
+        for group in groups:
+            df = self._read_segments(group).sort_values('published_at', kind='stable', ignore_index=True)
+            # Re-fetched articles appear in several batches; the latest analysis wins
+            has_url = df['url'].fillna('').astype(str).ne('') if 'url' in df.columns else None
+            if has_url is not None:
+                duplicated = df.duplicated(['url', 'competitor'], keep='last') & has_url
+                df = df[~duplicated].reset_index(drop=True)
+
+            start, end = df['published_at'].iloc[[0, -1]].dt.strftime('%Y%m%d%H%M%S')
+            path = os.path.join(self.store.segment_dir, f"compact-{start}-{end}-{uuid.uuid4().hex[:8]}.parquet")
+            # The merged segment goes live as the small ones are retired; they are deleted after a grace period
+            self.store.commit([self._stage(df, path)], retire=group)
+            compacted += len(group)
+            self._heartbeat()
+        monitor.increment('maintenance.segments_compacted', compacted)
+        return compacted
+
+    def _merge_daily(self, rolled):
+        """Replace the contributions of the rolled segments in the monthly files of the daily tier"""
+        segments = set(rolled['segment'])
+        months = rolled['published_at'].dt.strftime('%Y%m')
+        for month, rows in rolled.groupby(months):
+            path = os.path.join(self.store.daily_dir, f"daily-{month}.parquet")
+            if os.path.exists(path):
+                existing = pd.read_parquet(path)
+                existing['published_at'] = pd.to_datetime(existing['published_at'], utc=True)
+                if 'segment' not in existing.columns:
+                    existing['segment'] = ''
+                # Re-rolling a segment after an interrupted run replaces its rows instead of adding them again
+                existing = existing[~existing['segment'].isin(segments)]
+                rows = pd.concat([existing, rows], ignore_index=True)
+            rows = rows.groupby(self.DAILY_KEYS + ['segment'], as_index=False, dropna=False)[
+                ['article_count', 'score_sum', 'subjectivity_sum']
+            ].sum()
+            self.store.commit([self._stage(rows.sort_values('published_at', kind='stable', ignore_index=True), path)])
+
+    @monitor.timed('maintenance.roll_up')
+    def roll_up(self, now=None):
+        """Replace raw articles past raw retention with their daily aggregates"""
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz='UTC')
+        cutoff = now.floor('D') - pd.Timedelta(days=self.config['raw_retention_days'])
+
+        expired = []
+        for path in self.store.segment_paths():
+            published = pd.to_datetime(pd.read_parquet(path, columns=['published_at'])['published_at'], utc=True)
+            if len(published) and published.min() < cutoff:
+                expired.append(path)
+        if not expired:
+            return 0
+
+        # Newest segment first, so the latest copy of a re-fetched article is the one rolled up;
+        # one segment in memory at a time, plus the keys already seen and the small aggregates
+        rolled, seen = [], set()
+        for path in reversed(expired):
+            df = self._read_segments([path])
+            old = df[df['published_at'] < cutoff]
+            if 'url' in old.columns:
+                keys = old['url'].fillna('').astype(str) + '\x1f' + old['competitor'].astype(str)
+                has_url = old['url'].fillna('').astype(str).ne('')
+                duplicated = has_url & (keys.duplicated(keep='last') | keys.isin(seen))
+                seen.update(keys[has_url])
+                old = old[~duplicated]
+            if not old.empty:
+                rolled.append(daily_rollup(old).assign(segment=os.path.basename(path)))
+
+        # Aggregates are written before raw rows go away; they are keyed by segment, so a rerun
+        # after a crash in between replaces them rather than counting the same days twice
+        rolled = pd.concat(rolled, ignore_index=True) if rolled else pd.DataFrame(columns=['article_count'])
+        if not rolled.empty:
+            self._merge_daily(rolled)
+        for path in expired:
+            self._heartbeat()
+            df = self._read_segments([path])
+            kept = df[df['published_at'] >= cutoff]
+            staged = []
+            if not kept.empty:
+                start = kept['published_at'].min().strftime('%Y%m%d%H%M%S')
+                staged.append(self._stage(kept, os.path.join(self.store.segment_dir, f"compact-{start}-{uuid.uuid4().hex[:8]}.parquet")))
+            self.store.commit(staged, retire=[path])
+        rows = int(rolled['article_count'].sum())
+        monitor.increment('maintenance.rows_rolled_up', rows)
+        return rows
+
+    @monitor.timed('maintenance.expire_daily')
+    def expire_daily(self, now=None):
+        """Drop daily aggregates past their retention"""
+        retention_days = self.config['daily_retention_days']
+        if not retention_days:
+            return 0
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz='UTC')
+        cutoff = now.floor('D') - pd.Timedelta(days=retention_days)
+        removed = 0
+        for path in self.store.daily_paths():
+            rows = pd.read_parquet(path)
+            published = pd.to_datetime(rows['published_at'], utc=True)
+            old = published < cutoff
+            if not old.any():
+                continue
+            if old.all():
+                self.store.commit([], retire=[path])
+            else:
+                self.store.commit([self._stage(rows[~old.to_numpy()], path)])
+            removed += int(old.sum())
+        return removed
+
+    def run(self, heartbeat=None):
+        """One full maintenance pass over every tier; `heartbeat` renews the caller's lease and returns False once lost"""
+        with self._lock:
+            self.heartbeat = heartbeat
+            with monitor.stage('maintenance.run'):
+                self.status['rolled_up'] = self.roll_up()
+                self._heartbeat()
+                self.status['expired'] = self.expire_daily()
+                self._heartbeat()
+                self.status['compacted'] = self.compact()
+                # Files retired on an earlier pass are past any scan that could still be reading them
+                self.status['purged'] = self.store.purge_retired(self.config['retire_grace_seconds'])
+                if self.snapshots is not None:
+                    self.snapshots.prune()
+            self._last_run = time.monotonic()
+            self.status['last_run'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return dict(self.status)
+
+    def run_if_due(self, heartbeat=None):
+        """Run maintenance when the configured interval has passed; errors are recorded, not raised"""
+        interval = self.config['interval_hours'] * 3600
+        if self._last_run is not None and time.monotonic() - self._last_run < interval:
+            return None
+        try:
+            return self.run(heartbeat)
+        except Exception as e:
+            self._last_run = time.monotonic()
+            self.status['last_error'] = str(e)
+            logger.exception("Storage maintenance failed")
+            return None
+
+
+if __name__ == '__main__':
+    from utils.article_store import ArticleStore
+    from utils.snapshots import SnapshotManager
+    logging.basicConfig(level=logging.INFO)
+    result = StorageMaintainer(ArticleStore(), SnapshotManager()).run()
+    logger.info("Maintenance finished: %s", result)
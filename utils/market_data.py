@@ -0,0 +1,186 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+import config
+from utils.profiler import monitor
+
+
+def ticker_map(competitors=None):
+    """Exchange tickers per competitor: short all-caps aliases other than the name itself"""
+    competitors = competitors or config.COMPETITORS
+    tickers = {}
+    for name, aliases in competitors.items():
+        for alias in aliases:
+            if alias != name and alias.isalpha() and alias.isupper() and 2 <= len(alias) <= 5:
+                tickers[name] = alias
+                break
+    tickers.update(config.MARKET_CONFIG['tickers'])
+    return tickers
+
+
+def to_naive_utc(timestamps):
+    """Datetime series as timezone-naive UTC"""
+    timestamps = pd.to_datetime(timestamps, utc=True)
+    return timestamps.dt.tz_convert(None)
+
+
+def asof_positions(bar_times, event_times, tolerance=None):
+    """Index of the last bar at or before each event, -1 when none is recent enough"""
+    positions = np.searchsorted(bar_times, event_times, side='right') - 1
+    if tolerance is not None:
+        valid = positions >= 0
+        stale = np.zeros(len(positions), dtype=bool)
+        stale[valid] = event_times[valid] - bar_times[positions[valid]] > tolerance
+        positions[stale] = -1
+    return positions
+
+
+def column_correlation(left, right, min_periods=2):
+    """Pearson correlation of matching columns over their jointly observed rows"""
+    observed = left.notna() & right.notna()
+    left, right = left.where(observed), right.where(observed)
+    left, right = left - left.mean(), right - right.mean()
+    correlation = (left * right).sum() / np.sqrt((left ** 2).sum() * (right ** 2).sum())
+    return correlation.where(observed.sum() >= min_periods)
+
+
+class MarketData:
+    """Sorted OHLC price bars from local CSV/Parquet files, as-of joined against article timestamps"""
+
+    TIME_COLUMNS = ['timestamp', 'datetime', 'date', 'time']
+
+    def __init__(self, price_dir=None, tickers=None):
+        market_config = config.MARKET_CONFIG
+        self.price_dir = price_dir or market_config['price_dir']
+        self.tickers = tickers or ticker_map()
+        self.max_staleness = pd.Timedelta(market_config['max_staleness'])
+        self._lock = threading.Lock()
+        self._prices = {}
+
+    def price_file(self, ticker):
+        """Path of a ticker's price file, Parquet preferred"""
+        for extension in ('parquet', 'csv'):
+            path = os.path.join(self.price_dir, f"{ticker}.{extension}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def available(self):
+        """Competitors with a price file on disk"""
+        return {name: ticker for name, ticker in self.tickers.items() if self.price_file(ticker)}
+
+    def _read(self, path):
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            names = pq.read_schema(path).names
+        else:
+            names = pd.read_csv(path, nrows=0).columns.tolist()
+        lowered = {name.lower(): name for name in names}
+        time_column = next((lowered[c] for c in self.TIME_COLUMNS if c in lowered), None)
+        if time_column is None or 'close' not in lowered:
+            raise ValueError(f"{path} needs a timestamp and a close column")
+        # Only the two columns the joins need are read, which matters for years of minute bars
+        columns = [time_column, lowered['close']]
+        if path.endswith('.parquet'):
+            frame = pd.read_parquet(path, columns=columns)
+        else:
+            frame = pd.read_csv(path, usecols=columns)
+        frame.columns = ['timestamp', 'close']
+        frame['timestamp'] = to_naive_utc(frame['timestamp'])
+        frame = frame.dropna().sort_values('timestamp', kind='stable')
+        return frame.drop_duplicates('timestamp', keep='last').reset_index(drop=True)
+
+    @monitor.timed('market.load_prices')
+    def prices(self, ticker):
+        """Sorted bars for a ticker, re-read only when its file changes"""
+        path = self.price_file(ticker)
+        if path is None:
+            return None
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._prices.get(ticker)
+            if cached is not None and cached[0] == (path, mtime):
+                return cached[1]
+        frame = self._read(path)
+        bars = {
+            'times': frame['timestamp'].to_numpy(dtype='datetime64[ns]'),
+            'close': frame['close'].to_numpy(dtype=float)
+        }
+        with self._lock:
+            self._prices[ticker] = ((path, mtime), bars)
+        return bars
+
+    def daily_returns(self, ticker):
+        """Close-to-close returns from the last bar of each trading day"""
+        bars = self.prices(ticker)
+        if bars is None or len(bars['times']) < 2:
+            return pd.Series(dtype=float)
+        days = bars['times'].astype('datetime64[D]')
+        last_of_day = np.flatnonzero(np.append(days[1:] != days[:-1], True))
+        closes = pd.Series(bars['close'][last_of_day], index=pd.DatetimeIndex(days[last_of_day]))
+        return closes.pct_change().dropna()
+
+    @monitor.timed('market.event_returns')
+    def event_returns(self, df, horizons=None):
+        """Returns before and after each article's publication, from the bars around it"""
+        horizons = horizons or config.MARKET_CONFIG['horizons']
+        frames = []
+        for competitor, ticker in self.available().items():
+            articles = df[df['competitor'] == competitor]
+            bars = self.prices(ticker)
+            if articles.empty or bars is None or len(bars['times']) == 0:
+                continue
+            events = to_naive_utc(articles['published_at']).to_numpy(dtype='datetime64[ns]')
+            times, close = bars['times'], bars['close']
+            at = asof_positions(times, events, self.max_staleness.to_timedelta64())
+            base = np.where(at >= 0, close[np.maximum(at, 0)], np.nan)
+
+            result = pd.DataFrame({
+                'competitor': competitor,
+                'ticker': ticker,
+                'published_at': articles['published_at'].to_numpy(),
+                'sentiment_score': articles['sentiment_score'].to_numpy(dtype=float),
+                'sentiment_label': articles['sentiment_label'].to_numpy()
+            })
+            for horizon in horizons:
+                offset = pd.Timedelta(horizon).to_timedelta64()
+                after = asof_positions(times, events + offset)
+                before = asof_positions(times, events - offset)
+                # No bar after the event within the horizon (e.g. weekends) means no observed move
+                result[f'return_{horizon}'] = np.where(
+                    (at >= 0) & (after > at), close[np.maximum(after, 0)] / base - 1, np.nan
+                )
+                result[f'pre_return_{horizon}'] = np.where(
+                    (at >= 0) & (before >= 0) & (before < at), base / close[np.maximum(before, 0)] - 1, np.nan
+                )
+            frames.append(result)
+
+        if not frames:
+            return pd.DataFrame()
+        monitor.increment('market.events', sum(len(frame) for frame in frames))
+        return pd.concat(frames, ignore_index=True)
+
+    @monitor.timed('market.lagged_correlation')
+    def lagged_correlation(self, df, max_lag=None):
+        """Correlation of daily mean sentiment with daily returns `lag` days later, per competitor"""
+        max_lag = max_lag if max_lag is not None else config.MARKET_CONFIG['max_lag_days']
+        available = self.available()
+        df = df[df['competitor'].isin(list(available))]
+        if df.empty:
+            return pd.DataFrame()
+
+        days = to_naive_utc(df['published_at']).dt.floor('D')
+        sentiment = df.groupby([days.rename('day'), 'competitor'])['sentiment_score'].mean().unstack('competitor')
+        returns = pd.DataFrame({competitor: self.daily_returns(ticker) for competitor, ticker in available.items()})
+        sentiment, returns = sentiment.align(returns, join='left', axis=1)
+
+        # Calendar-day index so a lag is a fixed number of days across weekends
+        calendar = pd.date_range(days.min() - pd.Timedelta(days=max_lag), days.max() + pd.Timedelta(days=max_lag), freq='D')
+        sentiment, returns = sentiment.reindex(calendar), returns.reindex(calendar)
+        min_periods = config.MARKET_CONFIG['min_overlap_days']
+        correlations = {
+            lag: column_correlation(sentiment, returns.shift(-lag), min_periods)
+            for lag in range(-max_lag, max_lag + 1)
+        }
+        return pd.DataFrame(correlations).T.rename_axis('lag')
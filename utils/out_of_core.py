@@ -0,0 +1,212 @@
+import os
+from datetime import datetime, timedelta, timezone
+import config
+from utils.profiler import monitor
+
+
+class OutOfCoreEngine:
+    """Streaming aggregations over the Parquet article store with DuckDB or Polars"""
+
+    # Raw articles and rolled-up daily rows share these columns; a raw article counts once
+    HISTORY_COLUMNS = ['published_at', 'competitor', 'source', 'sentiment_label', 'emotion',
+                       'article_count', 'score_sum', 'subjectivity_sum']
+
+    def __init__(self, store, engine=None, threads=None):
+        self.store = store
+        self.threads = threads or config.STORAGE_CONFIG['scan_threads'] or os.cpu_count()
+        self.engine = engine or self.detect_engine()
+
+    @staticmethod
+    def detect_engine():
+        """Prefer DuckDB, fall back to Polars lazy frames"""
+        try:
+            import duckdb  # noqa: F401
+            return 'duckdb'
+        except ImportError:
+            pass
+        try:
+            import polars  # noqa: F401
+            return 'polars'
+        except ImportError:
+            raise ImportError("Out-of-core mode needs duckdb or polars: pip install duckdb")
+
+    def _duckdb_where(self, filters):
+        clauses, params = [], []
+        for column, key in (('sentiment_label', 'sentiments'), ('source', 'sources'), ('competitor', 'competitors')):
+            values = filters.get(key)
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        date_range = filters.get('date_range')
+        if date_range:
+            start, end = date_range
+            clauses.append("published_at >= ? AND published_at < ?")
+            params.extend([
+                datetime.combine(start, datetime.min.time(), timezone.utc),
+                datetime.combine(end, datetime.min.time(), timezone.utc) + timedelta(days=1)
+            ])
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    @staticmethod
+    def _duckdb_files(paths):
+        # An explicit file list rather than a glob, so files retired by maintenance are never picked up
+        files = ', '.join("'" + path.replace("'", "''") + "'" for path in paths)
+        return f"read_parquet([{files}], union_by_name=true)"
+
+    def _duckdb_source(self):
+        return self._duckdb_files(self.store.segment_paths())
+
+    def _duckdb_history(self):
+        """Raw articles and the daily tier as one relation of per-row counts and sums"""
+        parts = []
+        segments, daily = self.store.segment_paths(), self.store.daily_paths()
+        if segments:
+            parts.append(
+                "SELECT published_at, competitor, source, sentiment_label, emotion, 1 AS article_count, "
+                f"sentiment_score AS score_sum, subjectivity AS subjectivity_sum FROM {self._duckdb_files(segments)}"
+            )
+        if daily:
+            parts.append(f"SELECT {', '.join(self.HISTORY_COLUMNS)} FROM {self._duckdb_files(daily)}")
+        return f"({' UNION ALL '.join(parts)}) AS history"
+
+    def _duckdb_query(self, select, filters, group_by=None, order_by=None):
+        import duckdb
+        where, params = self._duckdb_where(filters)
+        sql = f"SELECT {select} FROM {self._duckdb_history()}{where}"
+        if group_by:
+            sql += f" GROUP BY {group_by}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        with duckdb.connect() as con:
+            con.execute(f"SET threads TO {int(self.threads)}")
+            return con.execute(sql, params).df()
+
+    def _polars_history(self, filters):
+        """Raw articles and the daily tier as one lazy frame of per-row counts and sums"""
+        import polars as pl
+        frames = []
+        segments, daily = self.store.segment_paths(), self.store.daily_paths()
+        if segments:
+            frames.append(pl.scan_parquet(segments).select(
+                'published_at', 'competitor', 'source', 'sentiment_label', 'emotion',
+                pl.lit(1, dtype=pl.Int64).alias('article_count'),
+                pl.col('sentiment_score').alias('score_sum'),
+                pl.col('subjectivity').alias('subjectivity_sum')
+            ))
+        if daily:
+            frames.append(pl.scan_parquet(daily).select(self.HISTORY_COLUMNS))
+        return self._polars_frame(filters, pl.concat(frames, how='vertical_relaxed'))
+
+    def _polars_frame(self, filters, frame=None):
+        import polars as pl
+        if frame is None:
+            frame = pl.scan_parquet(self.store.segment_paths())
+        for column, key in (('sentiment_label', 'sentiments'), ('source', 'sources'), ('competitor', 'competitors')):
+            values = filters.get(key)
+            if values:
+                frame = frame.filter(pl.col(column).is_in(list(values)))
+        date_range = filters.get('date_range')
+        if date_range:
+            start, end = date_range
+            frame = frame.filter(
+                (pl.col('published_at') >= datetime.combine(start, datetime.min.time(), timezone.utc)) &
+                (pl.col('published_at') < datetime.combine(end, datetime.min.time(), timezone.utc) + timedelta(days=1))
+            )
+        return frame
+
+    def _polars_collect(self, frame):
+        try:
+            return frame.collect(streaming=True).to_pandas()
+        except TypeError:
+            return frame.collect(engine='streaming').to_pandas()
+
+    @monitor.timed('out_of_core.competitor_stats')
+    def competitor_stats(self, **filters):
+        """Mean sentiment, article count and mean subjectivity per competitor"""
+        if self.engine == 'duckdb':
+            return self._duckdb_query(
+                "competitor, sum(score_sum) / sum(article_count) AS avg_sentiment, sum(article_count) AS article_count, "
+                "sum(subjectivity_sum) / sum(article_count) AS avg_subjectivity",
+                filters, group_by='competitor', order_by='avg_sentiment DESC'
+            )
+        import polars as pl
+        frame = self._polars_history(filters).group_by('competitor').agg(
+            (pl.col('score_sum').sum() / pl.col('article_count').sum()).alias('avg_sentiment'),
+            pl.col('article_count').sum().alias('article_count'),
+            (pl.col('subjectivity_sum').sum() / pl.col('article_count').sum()).alias('avg_subjectivity')
+        ).sort('avg_sentiment', descending=True)
+        return self._polars_collect(frame)
+
+    @monitor.timed('out_of_core.source_stats')
+    def source_stats(self, **filters):
+        """Article count and mean sentiment per source"""
+        if self.engine == 'duckdb':
+            return self._duckdb_query(
+                "source, sum(article_count) AS article_count, sum(score_sum) / sum(article_count) AS avg_sentiment",
+                filters, group_by='source', order_by='article_count DESC'
+            )
+        import polars as pl
+        frame = self._polars_history(filters).group_by('source').agg(
+            pl.col('article_count').sum().alias('article_count'),
+            (pl.col('score_sum').sum() / pl.col('article_count').sum()).alias('avg_sentiment')
+        ).sort('article_count', descending=True)
+        return self._polars_collect(frame)
+
+    @monitor.timed('out_of_core.emotion_stats')
+    def emotion_stats(self, **filters):
+        """Article count per competitor and emotion"""
+        if self.engine == 'duckdb':
+            return self._duckdb_query(
+                "competitor, emotion, sum(article_count) AS article_count, sum(score_sum) / sum(article_count) AS avg_sentiment",
+                filters, group_by='competitor, emotion', order_by='competitor, emotion'
+            )
+        import polars as pl
+        frame = self._polars_history(filters).group_by(['competitor', 'emotion']).agg(
+            pl.col('article_count').sum().alias('article_count'),
+            (pl.col('score_sum').sum() / pl.col('article_count').sum()).alias('avg_sentiment')
+        ).sort(['competitor', 'emotion'])
+        return self._polars_collect(frame)
+
+    @monitor.timed('out_of_core.daily_trend')
+    def daily_trend(self, **filters):
+        """Mean sentiment and volume per day and competitor"""
+        if self.engine == 'duckdb':
+            return self._duckdb_query(
+                "date_trunc('day', published_at) AS date, competitor, "
+                "sum(score_sum) / sum(article_count) AS sentiment_score, sum(article_count) AS article_count",
+                filters, group_by='1, 2', order_by='1, 2'
+            )
+        import polars as pl
+        frame = self._polars_history(filters).group_by(
+            pl.col('published_at').dt.truncate('1d').alias('date'), 'competitor'
+        ).agg(
+            (pl.col('score_sum').sum() / pl.col('article_count').sum()).alias('sentiment_score'),
+            pl.col('article_count').sum().alias('article_count')
+        ).sort(['date', 'competitor'])
+        return self._polars_collect(frame)
+
+    @monitor.timed('out_of_core.alert_scan')
+    def alert_scan(self, recent_days=3, **filters):
+        """Recent sentiment counts and per-competitor means used by the alert rules"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=recent_days)
+        if self.engine == 'duckdb':
+            where, params = self._duckdb_where(filters)
+            sql = (
+                "SELECT competitor, avg(sentiment_score) AS avg_sentiment, count(*) AS article_count, "
+                "count(*) FILTER (WHERE published_at >= ? AND sentiment_label = 'Negative') AS recent_negative, "
+                "count(*) FILTER (WHERE published_at >= ? AND sentiment_label = 'Positive') AS recent_positive "
+                f"FROM {self._duckdb_source()}{where} GROUP BY competitor"
+            )
+            import duckdb
+            with duckdb.connect() as con:
+                con.execute(f"SET threads TO {int(self.threads)}")
+                return con.execute(sql, [cutoff, cutoff] + params).df()
+        import polars as pl
+        recent = pl.col('published_at') >= cutoff
+        frame = self._polars_frame(filters).group_by('competitor').agg(
+            pl.col('sentiment_score').mean().alias('avg_sentiment'),
+            pl.len().alias('article_count'),
+            (recent & (pl.col('sentiment_label') == 'Negative')).sum().alias('recent_negative'),
+            (recent & (pl.col('sentiment_label') == 'Positive')).sum().alias('recent_positive')
+        )
+        return self._polars_collect(frame)
@@ -0,0 +1,153 @@
+import time
+import json
+import io
+import logging
+import threading
+import cProfile
+import pstats
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMonitor:
+    """Collect per-stage timings and counters for the dashboard pipeline"""
+
+    PROFILE_MODES = ['cProfile', 'pyinstrument']
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.counters = {}
+        self.last_profile = None
+        self.last_profile_mode = None
+
+    def record(self, name, elapsed):
+        """Record one timed execution of a stage"""
+        with self._lock:
+            stats = self.timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['last'] = elapsed
+            if elapsed > stats['max']:
+                stats['max'] = elapsed
+
+    def increment(self, name, value=1):
+        """Increase a named counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as a named stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator timing every call of a function as a named stage"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def capture(self, mode='cProfile'):
+        """Profile the enclosed block with cProfile or pyinstrument"""
+        if mode == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("pyinstrument not installed, falling back to cProfile")
+                mode = 'cProfile'
+
+        if mode == 'pyinstrument':
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                self.last_profile = profiler.output_text(unicode=True, color=False)
+                self.last_profile_mode = mode
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(40)
+                self.last_profile = stream.getvalue()
+                self.last_profile_mode = 'cProfile'
+
+    def reset(self):
+        """Clear all collected timings, counters and profiles"""
+        with self._lock:
+            self.timings = {}
+            self.counters = {}
+            self.last_profile = None
+            self.last_profile_mode = None
+
+    def snapshot(self):
+        """Return a copy of the current timings and counters"""
+        with self._lock:
+            timings = {
+                name: dict(stats, mean=stats['total'] / stats['count'] if stats['count'] else 0.0)
+                for name, stats in self.timings.items()
+            }
+            return {'timings': timings, 'counters': dict(self.counters)}
+
+    def to_json(self):
+        """Export the current metrics as a single JSON log line"""
+        data = self.snapshot()
+        data['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return json.dumps(data, sort_keys=True)
+
+    def to_prometheus(self, prefix='strategic_dashboard'):
+        """Export the current metrics in Prometheus text exposition format"""
+        data = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Total time spent per stage",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        for name, stats in sorted(data['timings'].items()):
+            lines.append(f'{prefix}_stage_seconds_total{{stage="{name}"}} {stats["total"]:.6f}')
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Number of executions per stage",
+            f"# TYPE {prefix}_stage_calls_total counter",
+        ]
+        for name, stats in sorted(data['timings'].items()):
+            lines.append(f'{prefix}_stage_calls_total{{stage="{name}"}} {stats["count"]}')
+        lines += [
+            f"# HELP {prefix}_stage_seconds_max Slowest single execution per stage",
+            f"# TYPE {prefix}_stage_seconds_max gauge",
+        ]
+        for name, stats in sorted(data['timings'].items()):
+            lines.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {stats["max"]:.6f}')
+        lines += [
+            f"# HELP {prefix}_events_total Pipeline event counters",
+            f"# TYPE {prefix}_events_total counter",
+        ]
+        for name, value in sorted(data['counters'].items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def log_json(self):
+        """Emit the current metrics as a JSON log record"""
+        if not logger.handlers:
+            logger.addHandler(logging.StreamHandler())
+            logger.setLevel(logging.INFO)
+        logger.info(self.to_json())
+
+
+# Process-wide monitor shared by the fetcher, analyzer and dashboard
+monitor = PerformanceMonitor()
@@ -0,0 +1,199 @@
+import os
+import re
+import sys
+import html
+import logging
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import plotly.express as px
+import config
+from utils.profiler import monitor
+from utils.snapshots import SnapshotManager
+from utils.anomaly import AnomalyDetector
+from utils import charts
+
+logger = logging.getLogger(__name__)
+
+REPORT_STYLE = """
+body { font-family: -apple-system, 'Segoe UI', Roboto, sans-serif; margin: 2rem auto; max-width: 1200px; color: #222; }
+h1 { color: #1f77b4; border-bottom: 2px solid #1f77b4; padding-bottom: 0.5rem; }
+h2 { color: #1f77b4; margin-top: 2rem; }
+table.report-table { border-collapse: collapse; margin: 1rem 0; }
+table.report-table th, table.report-table td { border: 1px solid #ddd; padding: 0.4rem 0.8rem; text-align: left; }
+table.report-table th { background: #f0f2f6; }
+.grid { display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; }
+.footer { color: #666; margin-top: 3rem; text-align: center; }
+"""
+
+_snapshot = None
+
+
+def report_filename(competitor):
+    """File name of a competitor's report"""
+    return re.sub(r'[^A-Za-z0-9]+', '-', competitor).strip('-').lower() + '.html'
+
+
+def _load_snapshot(snapshot_dir):
+    """Memory-map the snapshot once per worker process; every worker shares the same page cache"""
+    global _snapshot
+    if _snapshot is None or _snapshot[0] != snapshot_dir:
+        manager = SnapshotManager(os.path.dirname(snapshot_dir))
+        dataset = manager.read_table(os.path.join(snapshot_dir, manager.DATASET_FILE))
+        trend = manager.read_table(os.path.join(snapshot_dir, 'daily_trend.arrow'))
+        stats = manager.read_table(os.path.join(snapshot_dir, 'competitor_stats.arrow'))
+        detector = AnomalyDetector()
+        detector.update(dataset[['published_at', 'competitor', 'sentiment_score']])
+        _snapshot = (snapshot_dir, dataset, trend, stats, detector)
+    return _snapshot[1:]
+
+
+def kpi_table(df, stats, competitor):
+    """The dashboard's KPI cards as one table row, plus the competitor's sentiment rank"""
+    ranked = stats.reset_index(drop=True)
+    rank = ranked.index[ranked['competitor'] == competitor]
+    return pd.DataFrame([{
+        'Total Articles': len(df),
+        'Positive Articles': int((df['sentiment_label'] == 'Positive').sum()),
+        'Negative Articles': int((df['sentiment_label'] == 'Negative').sum()),
+        'Avg Sentiment': round(df['sentiment_score'].mean(), 3),
+        'Avg Subjectivity': round(df['subjectivity'].mean(), 3) if 'subjectivity' in df.columns else None,
+        'News Sources': df['source'].nunique(),
+        'Unique Stories': df['story_id'].nunique() if 'story_id' in df.columns else len(df),
+        'Sentiment Rank': f"{rank[0] + 1} of {len(ranked)}" if len(rank) else '-'
+    }])
+
+
+def trend_line(trend, competitor):
+    """Daily sentiment line for one competitor"""
+    trend = trend[trend['competitor'] == competitor]
+    fig = px.line(trend, x='date', y='sentiment_score', title=f"Daily Sentiment Trend - {competitor}", markers=True)
+    fig.update_layout(xaxis_title="Date", yaxis_title="Average Sentiment Score")
+    return fig
+
+
+def render_report(snapshot_dir, competitor, output_dir, include_plotlyjs='cdn', recent_days=7):
+    """Write one competitor's HTML report; runs in worker processes"""
+    dataset, trend, stats, detector = _load_snapshot(snapshot_dir)
+    df = dataset[dataset['competitor'] == competitor]
+
+    figures = [
+        trend_line(trend, competitor),
+        charts.sentiment_distribution_pie(df),
+        charts.emotion_distribution_pie(df),
+        charts.top_sources_bar(df),
+        charts.sentiment_by_source_bar(df)
+    ]
+    if 'entities' in df.columns:
+        figures.append(charts.top_entities_bar(df))
+    # plotly.js is included once, with the first figure
+    figure_html = [
+        fig.to_html(full_html=False, include_plotlyjs=include_plotlyjs if i == 0 else False)
+        for i, fig in enumerate(figures)
+    ]
+
+    anomalies = detector.detect(recent_days=recent_days, competitors=[competitor])
+    if not anomalies.empty:
+        anomalies = anomalies.assign(date=anomalies['date'].dt.date).round(3)
+    headlines = df.sort_values('published_at', ascending=False).head(10)
+    headlines = headlines[[c for c in ['published_at', 'title', 'source', 'sentiment_label', 'sentiment_score'] if c in headlines.columns]]
+
+    title = html.escape(f"{competitor} - Competitive Intelligence Report")
+    body = [
+        f"<h1>{title}</h1>",
+        f"<p>Snapshot {html.escape(os.path.basename(snapshot_dir))} &bull; generated {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        "<h2>Key Performance Indicators</h2>",
+        kpi_table(df, stats, competitor).to_html(index=False, classes='report-table', border=0),
+        "<h2>Sentiment Trend</h2>",
+        figure_html[0],
+        "<h2>Sentiment and Emotion</h2>",
+        f"<div class='grid'><div>{figure_html[1]}</div><div>{figure_html[2]}</div></div>",
+        "<h2>Sources and Entities</h2>",
+        f"<div class='grid'><div>{figure_html[3]}</div><div>{figure_html[4]}</div></div>",
+        *figure_html[5:],
+        "<h2>Baseline Deviations</h2>",
+        anomalies.to_html(index=False, classes='report-table', border=0) if not anomalies.empty
+        else "<p>No significant deviations from baseline.</p>",
+        "<h2>Latest Headlines</h2>",
+        headlines.to_html(index=False, classes='report-table', border=0),
+        "<div class='footer'>Strategic Intelligence Dashboard &bull; Data sources: NewsAPI, GNews</div>"
+    ]
+    path = os.path.join(output_dir, report_filename(competitor))
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(
+            f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title>"
+            f"<style>{REPORT_STYLE}</style></head><body>{''.join(body)}</body></html>"
+        )
+    os.replace(path + '.tmp', path)
+    return path
+
+
+class ReportGenerator:
+    """Renders per-competitor HTML reports from the latest snapshot in parallel worker processes"""
+
+    def __init__(self, snapshots=None, output_dir=None, workers=None):
+        report_config = config.REPORT_CONFIG
+        self.snapshots = snapshots or SnapshotManager()
+        self.output_dir = output_dir or report_config['output_dir']
+        self.workers = workers or report_config['workers']
+        self.include_plotlyjs = report_config['include_plotlyjs']
+        self.recent_days = report_config['recent_days']
+
+    def write_index(self, report_dir, stats, paths):
+        """Landing page ranking every competitor and linking its report"""
+        stats = stats[stats['competitor'].isin(list(paths))].round(3)
+        stats = stats.assign(report=[
+            f"<a href='{report_filename(competitor)}'>{html.escape(competitor)}</a>" for competitor in stats['competitor']
+        ])
+        path = os.path.join(report_dir, 'index.html')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(
+                "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Competitor Reports</title>"
+                f"<style>{REPORT_STYLE}</style></head><body><h1>Competitor Reports</h1>"
+                f"<p>Snapshot {html.escape(os.path.basename(report_dir))}</p>"
+                f"{stats.to_html(index=False, classes='report-table', border=0, escape=False)}</body></html>"
+            )
+        os.replace(path + '.tmp', path)
+        return path
+
+    @monitor.timed('reports.generate')
+    def generate(self, competitors=None):
+        """Render every competitor's report from the latest snapshot; returns {competitor: path}"""
+        # Pinned so a publish in another process cannot prune the snapshot while workers read it
+        with self.snapshots.pinned_latest() as snapshot_dir:
+            return self._generate(snapshot_dir, competitors)
+
+    def _generate(self, snapshot_dir, competitors):
+        if snapshot_dir is None:
+            logger.warning("No snapshot to report on in %s", self.snapshots.snapshot_dir)
+            return {}
+        stats = self.snapshots.read_table(os.path.join(snapshot_dir, 'competitor_stats.arrow'))
+        available = stats['competitor'].tolist()
+        competitors = [c for c in competitors if c in available] if competitors else available
+        if not competitors:
+            return {}
+
+        report_dir = os.path.join(self.output_dir, os.path.basename(snapshot_dir))
+        os.makedirs(report_dir, exist_ok=True)
+        args = (snapshot_dir, report_dir, self.include_plotlyjs, self.recent_days)
+        workers = min(self.workers, len(competitors))
+        if workers > 1:
+            # Spawned rather than forked, as for deep analysis; each worker maps the snapshot once
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = {competitor: pool.submit(render_report, args[0], competitor, *args[1:]) for competitor in competitors}
+                paths = {competitor: future.result() for competitor, future in futures.items()}
+        else:
+            paths = {competitor: render_report(args[0], competitor, *args[1:]) for competitor in competitors}
+
+        self.write_index(report_dir, stats, paths)
+        monitor.increment('reports.rendered', len(paths))
+        return paths
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    # Optional competitor names as arguments; all competitors in the snapshot by default
+    reports = ReportGenerator().generate(sys.argv[1:] or None)
+    for competitor, path in reports.items():
+        logger.info("%s: %s", competitor, path)
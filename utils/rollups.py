@@ -0,0 +1,126 @@
+import copy
+import pandas as pd
+import numpy as np
+import config
+from utils.profiler import monitor
+
+
+class TrendRollups:
+    """Materialized hourly, daily and weekly sentiment rollups per competitor and source"""
+
+    GRANULARITIES = ['hourly', 'daily', 'weekly']
+    BUCKET_WIDTHS = {'hourly': pd.Timedelta(hours=1), 'daily': pd.Timedelta(days=1), 'weekly': pd.Timedelta(days=7)}
+    KEYS = ['competitor', 'source', 'sentiment_label']
+
+    def __init__(self):
+        self.tables = {
+            granularity: pd.DataFrame(columns=['bucket'] + self.KEYS + ['score_sum', 'count'])
+            for granularity in self.GRANULARITIES
+        }
+
+    def fork(self):
+        """Copy for a derived dataset version; update() replaces tables rather than mutating them, so they are shared"""
+        rollups = copy.copy(self)
+        rollups.tables = dict(self.tables)
+        return rollups
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Restore rollups from previously materialized tables keyed by granularity"""
+        rollups = cls()
+        for granularity in cls.GRANULARITIES:
+            table = tables.get(granularity)
+            if table is not None and not table.empty:
+                rollups.tables[granularity] = table.reset_index(drop=True)
+        return rollups
+
+    def bucket_start(self, timestamps, granularity):
+        """Truncate timestamps to the start of their rollup bucket"""
+        if granularity == 'hourly':
+            return timestamps.dt.floor('h')
+        days = timestamps.dt.floor('D')
+        if granularity == 'daily':
+            return days
+        return days - pd.to_timedelta(days.dt.dayofweek, unit='D')
+
+    @monitor.timed('rollups.update')
+    def update(self, df):
+        """Fold newly ingested articles into every rollup table"""
+        if df.empty:
+            return
+
+        new_rows = df[self.KEYS].copy()
+        new_rows['published_at'] = pd.to_datetime(df['published_at'])
+        new_rows['sentiment_score'] = df['sentiment_score'].astype(float)
+
+        for granularity in self.GRANULARITIES:
+            new_rows['bucket'] = self.bucket_start(new_rows['published_at'], granularity)
+            delta = new_rows.groupby(['bucket'] + self.KEYS).agg(
+                score_sum=('sentiment_score', 'sum'),
+                count=('sentiment_score', 'size')
+            )
+
+            table = self.tables[granularity]
+            if not table.empty:
+                delta = table.set_index(['bucket'] + self.KEYS).add(delta, fill_value=0)
+                delta['count'] = delta['count'].astype(int)
+            self.tables[granularity] = delta.reset_index().sort_values('bucket', ignore_index=True)
+
+    def select_granularity(self, days):
+        """Pick the coarsest rollup that still resolves the requested range"""
+        max_days = config.ROLLUP_CONFIG['max_days']
+        if days <= max_days['hourly']:
+            return 'hourly'
+        if days <= max_days['daily']:
+            return 'daily'
+        return 'weekly'
+
+    def query(self, days, competitors=None, sources=None, sentiments=None, date_range=None):
+        """Return the rollup rows covering the last `days` of data after filtering
+
+        `date_range` keeps the buckets overlapping the (first, last) day and ends the window at the last one.
+        """
+        granularity = self.select_granularity(days)
+        table = self.tables[granularity]
+        if table.empty:
+            return granularity, table
+
+        mask = np.ones(len(table), dtype=bool)
+        if competitors:
+            mask &= table['competitor'].isin(competitors).to_numpy()
+        if sources:
+            mask &= table['source'].isin(sources).to_numpy()
+        if sentiments:
+            mask &= table['sentiment_label'].isin(sentiments).to_numpy()
+
+        buckets = table['bucket']
+        in_range = np.ones(len(table), dtype=bool)
+        if date_range:
+            tz = buckets.dt.tz
+            start, stop = (pd.Timestamp(day) for day in date_range)
+            stop += pd.Timedelta(days=1)
+            if tz is not None:
+                start, stop = start.tz_localize(tz), stop.tz_localize(tz)
+            in_range = ((buckets + self.BUCKET_WIDTHS[granularity] > start) & (buckets < stop)).to_numpy()
+            if not in_range.any():
+                return granularity, table[in_range]
+            mask &= in_range
+
+        # The window ends at the newest bucket in range, whatever the other filters keep
+        end = buckets[in_range].max()
+        mask &= (buckets > end - pd.Timedelta(days=days)).to_numpy()
+        return granularity, table[mask]
+
+    def competitor_trend(self, days, **filters):
+        """Average sentiment per bucket and competitor"""
+        granularity, rows = self.query(days, **filters)
+        trend = rows.groupby(['bucket', 'competitor'])[['score_sum', 'count']].sum().reset_index()
+        trend['sentiment_score'] = trend['score_sum'] / trend['count']
+        return granularity, trend[['bucket', 'competitor', 'sentiment_score', 'count']]
+
+    def overall_trend(self, days, **filters):
+        """Article volume and average sentiment per bucket across all competitors"""
+        granularity, rows = self.query(days, **filters)
+        trend = rows.groupby('bucket')[['score_sum', 'count']].sum().reset_index()
+        trend['sentiment_score'] = trend['score_sum'] / trend['count']
+        return granularity, trend[['bucket', 'sentiment_score', 'count']]
@@ -0,0 +1,156 @@
+import re
+import math
+import threading
+import numpy as np
+from utils.profiler import monitor
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'is', 'it',
+    'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'were', 'will', 'with'
+}
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    if not isinstance(text, str):
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """In-memory inverted index over article titles and text with BM25 ranking"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # (version token, first row, end row) of every batch indexed by sync()
+        self.extents = []
+        self._postings = {}
+        self._arrays = {}
+        self._doc_lengths = []
+        self._lengths_array = None
+        self._total_length = 0
+
+    @property
+    def size(self):
+        return len(self._doc_lengths)
+
+    @monitor.timed('search.index')
+    def add_documents(self, df, start_row=None, columns=('title', 'text')):
+        """Index new rows; row ids are their positions in the session dataset"""
+        columns = [column for column in columns if column in df.columns]
+        titled_text = columns == ['title', 'text']
+        with self._lock:
+            row_id = self.size if start_row is None else start_row
+            if row_id != self.size:
+                raise ValueError(f"Rows must be appended in order: expected {self.size}, got {row_id}")
+
+            for values in zip(*(df[column].tolist() for column in columns)):
+                if titled_text:
+                    values = self.document_fields(values)
+                counts = {}
+                for value in values:
+                    for token in tokenize(value):
+                        counts[token] = counts.get(token, 0) + 1
+
+                for token, tf in counts.items():
+                    ids, tfs = self._postings.setdefault(token, ([], []))
+                    ids.append(row_id)
+                    tfs.append(tf)
+                    self._arrays.pop(token, None)
+
+                length = sum(counts.values())
+                self._doc_lengths.append(length)
+                self._lengths_array = None
+                self._total_length += length
+                row_id += 1
+
+    @staticmethod
+    def document_fields(values):
+        """(title, text), or just (text,) when fetched text already starts with the title so its terms count once"""
+        if not isinstance(values[0], str) or not isinstance(values[1], str):
+            return values
+        return values[1:] if values[0] and values[1].startswith(values[0]) else values
+
+    def sync(self, df, token=None, lineage=()):
+        """Index the rows of `df` past those already indexed; returns how many were added
+
+        Dataset versions derived from one another share an index, each extending it with its own rows.
+        `lineage` lists the (token, row count) of every ancestor version, oldest first. Rows a version
+        reads must belong to itself (`token`) or an ancestor; rows indexed for another branch raise
+        ValueError, and that version needs an index of its own.
+        """
+        with self._sync_lock:
+            rows = min(self.size, len(df))
+            ancestors = {owner for owner, _ in lineage}
+            for owner, start, _ in self.extents:
+                if start < rows and owner != token and owner not in ancestors:
+                    raise ValueError(f"Rows from {start} were indexed for another dataset version")
+            if self.size >= len(df):
+                return 0
+            start = added_from = self.size
+            self.add_documents(df.iloc[start:], start_row=start)
+            # Rows an ancestor also has are credited to it, so its other sessions can keep using the index
+            for owner, end in (*lineage, (token, self.size)):
+                if end > start:
+                    self.extents.append((owner, start, end))
+                    start = end
+            return self.size - added_from
+
+    def _posting_arrays(self, token):
+        arrays = self._arrays.get(token)
+        if arrays is None:
+            ids, tfs = self._postings[token]
+            arrays = (np.asarray(ids, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            self._arrays[token] = arrays
+        return arrays
+
+    @monitor.timed('search.query')
+    def search(self, query, limit=None, match_all=True, max_row=None):
+        """Return (row ids, scores) ranked by BM25, best match first
+
+        `max_row` drops rows at or past it, for a dataset version sharing an index that later versions extended.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        empty = (np.array([], dtype=np.int64), np.array([], dtype=np.float32))
+        if not terms or not self.size:
+            return empty
+
+        with self._lock:
+            if match_all and any(term not in self._postings for term in terms):
+                return empty
+            terms = [term for term in terms if term in self._postings]
+            if not terms:
+                return empty
+
+            if self._lengths_array is None:
+                self._lengths_array = np.asarray(self._doc_lengths, dtype=np.float32)
+            doc_lengths = self._lengths_array
+            avg_length = self._total_length / self.size or 1.0
+            all_ids, all_scores = [], []
+            for term in terms:
+                ids, tfs = self._posting_arrays(term)
+                idf = math.log(1 + (self.size - len(ids) + 0.5) / (len(ids) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * doc_lengths[ids] / avg_length)
+                all_ids.append(ids)
+                all_scores.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+
+        ids = np.concatenate(all_ids)
+        scores = np.concatenate(all_scores)
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        totals = np.bincount(inverse, weights=scores)
+        if match_all and len(terms) > 1:
+            keep = np.bincount(inverse) == len(terms)
+            unique_ids, totals = unique_ids[keep], totals[keep]
+        if max_row is not None:
+            keep = unique_ids < max_row
+            unique_ids, totals = unique_ids[keep], totals[keep]
+
+        order = np.argsort(-totals, kind='stable')
+        if limit:
+            order = order[:limit]
+        return unique_ids[order], totals[order]
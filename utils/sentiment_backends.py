@@ -0,0 +1,195 @@
+import os
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import numpy as np
+from utils.profiler import monitor
+
+logger = logging.getLogger(__name__)
+
+
+class SentimentBackend(ABC):
+    """Interface for pluggable sentiment scorers returning scores in [-1, 1]"""
+
+    name = 'base'
+
+    @abstractmethod
+    def score_batch(self, texts):
+        """Score a list of texts, returning one float per text"""
+
+
+class TransformerBackend(SentimentBackend):
+    """CPU-only transformer classifier (e.g. a distilled FinBERT) loaded from a local path"""
+
+    name = 'transformer'
+
+    def __init__(self, model_path, batch_size=32, max_tokens_per_batch=4096, max_length=128,
+                 use_onnx=True, quantize=True, cache_size=10000, num_threads=None):
+        if not model_path or not os.path.isdir(model_path):
+            raise ValueError(f"Transformer model path not found: {model_path!r}")
+
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.max_length = max_length
+        self.use_onnx = use_onnx
+        self.quantize = quantize
+        self.cache_size = cache_size
+        self.num_threads = num_threads
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._load_error = None
+        self._tokenizer = None
+        self._session = None
+        self._model = None
+        self._label_weights = None
+
+    def load(self):
+        """Load the tokenizer and the ONNX session or (quantized) torch model on first use"""
+        with self._load_lock:
+            if self._label_weights is not None:
+                return
+            if self._load_error is not None:
+                # A failed load is not retried on every batch; the caller falls back each time
+                raise self._load_error
+            try:
+                self._load()
+            except (ImportError, OSError, ValueError, RuntimeError) as e:
+                self._load_error = e
+                raise
+
+    def _load(self):
+        from transformers import AutoTokenizer, AutoConfig
+        tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        model_config = AutoConfig.from_pretrained(self.model_path)
+
+        session, model = None, None
+        onnx_path = os.path.join(self.model_path, 'model.onnx')
+        if self.use_onnx and os.path.exists(onnx_path):
+            try:
+                import onnxruntime as ort
+                options = ort.SessionOptions()
+                if self.num_threads:
+                    options.intra_op_num_threads = self.num_threads
+                session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+            except Exception as e:
+                # onnxruntime raises its own exception types for corrupt or incompatible graphs
+                logger.warning("ONNX model %s could not be loaded, using torch: %s", onnx_path, e)
+                session = None
+
+        if session is None:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
+            model.eval()
+            if self.quantize:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        # Map class probabilities to a signed score: P(positive) - P(negative)
+        weights = np.zeros(len(model_config.id2label))
+        for idx, label in model_config.id2label.items():
+            label = label.lower()
+            if label.startswith('pos'):
+                weights[int(idx)] = 1.0
+            elif label.startswith('neg'):
+                weights[int(idx)] = -1.0
+
+        # Assigned together, and the weights last, so a failure partway leaves nothing half loaded
+        self._tokenizer, self._session, self._model = tokenizer, session, model
+        self._label_weights = weights
+
+    def cache_key(self, text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def make_batches(self, texts):
+        """Group texts of similar length so each batch pads to a short common length"""
+        lengths = [len(self._tokenizer.tokenize(text)[:self.max_length]) + 2 for text in texts]
+        order = np.argsort(lengths, kind='stable')
+
+        batches, batch = [], []
+        for position in order:
+            # Sorted ascending, so the current text is the longest in the batch
+            padded_tokens = (len(batch) + 1) * lengths[position]
+            if batch and (len(batch) >= self.batch_size or padded_tokens > self.max_tokens_per_batch):
+                batches.append(batch)
+                batch = []
+            batch.append(position)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def infer(self, texts):
+        """Run the model on one padded batch and return signed scores"""
+        if self._session is not None:
+            encoded = self._tokenizer(texts, padding='longest', truncation=True,
+                                      max_length=self.max_length, return_tensors='np')
+            input_names = {node.name for node in self._session.get_inputs()}
+            inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in input_names}
+            logits = self._session.run(None, inputs)[0]
+        else:
+            import torch
+            encoded = self._tokenizer(texts, padding='longest', truncation=True,
+                                      max_length=self.max_length, return_tensors='pt')
+            with torch.inference_mode():
+                logits = self._model(**encoded).logits.numpy()
+
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        return probs @ self._label_weights
+
+    @monitor.timed('analyze.transformer')
+    def score_batch(self, texts):
+        """Score texts, serving repeats from the per-text cache"""
+        self.load()
+        scores = [None] * len(texts)
+        pending = {}
+
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = self.cache_key(text)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+                    monitor.increment('transformer.cache_hits')
+                else:
+                    pending.setdefault(key, (text, []))[1].append(i)
+
+        if pending:
+            keys = list(pending.keys())
+            unique_texts = [pending[key][0] for key in keys]
+            for batch in self.make_batches(unique_texts):
+                batch_scores = self.infer([unique_texts[i] for i in batch])
+                monitor.increment('transformer.batches')
+                with self._lock:
+                    for i, score in zip(batch, batch_scores):
+                        score = float(score)
+                        key = keys[i]
+                        self._cache[key] = score
+                        for position in pending[key][1]:
+                            scores[position] = score
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return scores
+
+
+def create_backend(sentiment_config):
+    """Build the configured scoring backend, or None for the default VADER/TextBlob blend"""
+    if sentiment_config.get('backend', 'lexicon') != 'transformer':
+        return None
+    return TransformerBackend(
+        model_path=sentiment_config.get('transformer_model_path'),
+        batch_size=sentiment_config.get('transformer_batch_size', 32),
+        max_tokens_per_batch=sentiment_config.get('transformer_max_tokens_per_batch', 4096),
+        max_length=sentiment_config.get('transformer_max_length', 128),
+        use_onnx=sentiment_config.get('transformer_use_onnx', True),
+        quantize=sentiment_config.get('transformer_quantize', True),
+        cache_size=sentiment_config.get('transformer_cache_size', 10000),
+        num_threads=sentiment_config.get('transformer_num_threads')
+    )
@@ -0,0 +1,220 @@
+import sys
+import copy
+import time
+import hashlib
+import logging
+import threading
+import numpy as np
+import config
+from utils.profiler import monitor
+
+logger = logging.getLogger(__name__)
+
+LOCK_TYPES = (type(threading.Lock()), type(threading.RLock()))
+
+
+def derive_key(*parts):
+    """Short stable key for a dataset version derived from its parent key and the operation applied"""
+    return hashlib.sha1('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:16]
+
+
+def frame_bytes(df):
+    """Deep memory footprint of a frame, including the items of list-valued columns"""
+    total = int(df.memory_usage(index=True, deep=True).sum())
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        values = df[column].dropna()
+        if values.empty or not isinstance(values.iloc[0], (list, tuple, np.ndarray)):
+            continue
+        # deep=True sizes the list objects but not the strings they hold
+        total += int(values.explode().dropna().map(sys.getsizeof).sum())
+    return total
+
+
+def object_bytes(obj, _seen=None):
+    """Approximate deep memory footprint of a derived structure: arrays, sparse matrices, frames and containers"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'columns'):
+        return frame_bytes(obj)
+    if hasattr(obj, 'memory_usage'):
+        return int(obj.memory_usage(index=True, deep=True))
+    if hasattr(obj, 'indptr'):
+        # scipy sparse matrices keep their payload in three arrays
+        return obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = [*obj.keys(), *obj.values()]
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = obj
+    elif hasattr(obj, '__dict__'):
+        items = vars(obj).values()
+    else:
+        return size
+    if len(items) > 64 and isinstance(next(iter(items)), (int, float, str)):
+        # Long posting lists and the like hold scalars; size them from the first item instead of walking them
+        return size + len(items) * sys.getsizeof(next(iter(items)))
+    return size + sum(object_bytes(item, seen) for item in items)
+
+
+def fork(obj):
+    """Deep copy of a derived structure that gets its own lock instead of trying to copy the parent's"""
+    memo = {}
+    for value in getattr(obj, '__dict__', {}).values():
+        # Lock types cannot be instantiated through type(); the factories can
+        if isinstance(value, LOCK_TYPES[0]):
+            memo[id(value)] = threading.Lock()
+        elif isinstance(value, LOCK_TYPES[1]):
+            memo[id(value)] = threading.RLock()
+    return copy.deepcopy(obj, memo)
+
+
+class DatasetRegistry:
+    """Process-wide immutable dataset versions, and the structures derived from them, that sessions reference instead of copying"""
+
+    def __init__(self, budget_bytes=None, idle_seconds=None):
+        memory_config = config.SESSION_MEMORY_CONFIG
+        self.budget_bytes = budget_bytes or memory_config['budget_mb'] * 1024 * 1024
+        self.idle_seconds = idle_seconds or memory_config['idle_minutes'] * 60
+        self._lock = threading.Lock()
+        self._frames = {}
+        self._building = {}
+        self._sessions = {}
+        self.evictions = 0
+
+    def peek(self, key):
+        """A registered frame by key, or None"""
+        with self._lock:
+            entry = self._frames.get(key)
+            return entry['frame'] if entry else None
+
+    def get(self, session_id):
+        """The frame a session references, or None if it has none or it was evicted"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session['last_seen'] = time.monotonic()
+            return self._frames[session['key']]['frame']
+
+    def state(self, session_id):
+        """The derived structures of the version a session references, or None"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return self._frames[session['key']]['state'] if session else None
+
+    def key(self, session_id):
+        """Key of the dataset version a session references, or None"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session['key'] if session else None
+
+    def acquire(self, session_id, key, build):
+        """Point a session at dataset version `key`; build() returns (frame, derived state) and runs only for a new version"""
+        while True:
+            # The existence check and the new reference happen under one lock, so a concurrent release cannot
+            # drop the entry in between
+            with self._lock:
+                entry = self._frames.get(key)
+                if entry is not None:
+                    monitor.increment('session_memory.shared_hits')
+                    return self._attach(session_id, key, entry)
+                building = self._building.setdefault(key, threading.Lock())
+            # One session builds a new version while others asking for the same key wait, then share it
+            with building:
+                try:
+                    if self.peek(key) is not None:
+                        continue
+                    df, state = build()
+                    # Sizing walks every object value, so it happens outside the registry lock
+                    size = frame_bytes(df) + object_bytes(state)
+                    with self._lock:
+                        entry = self._frames[key] = {'frame': df, 'state': state, 'bytes': size, 'sessions': set()}
+                        return self._attach(session_id, key, entry)
+                finally:
+                    with self._lock:
+                        self._building.pop(key, None)
+
+    def _attach(self, session_id, key, entry):
+        # Referenced before the old version is released, so re-acquiring the same key keeps it alive
+        entry['sessions'].add(session_id)
+        previous = self._sessions.get(session_id)
+        if previous is not None and previous['key'] != key:
+            self._release(session_id)
+        self._sessions[session_id] = {'key': key, 'last_seen': time.monotonic()}
+        self._enforce_budget()
+        return entry['frame']
+
+    def remeasure(self, session_id):
+        """Re-size a session's version after a lazily built structure, such as the search index, grew"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            entry = self._frames[session['key']] if session else None
+        if entry is not None:
+            size = frame_bytes(entry['frame']) + object_bytes(entry['state'])
+            with self._lock:
+                entry['bytes'] = size
+
+    def release(self, session_id):
+        """Drop a session's reference, freeing its frame and derived state once no session holds it"""
+        with self._lock:
+            self._release(session_id)
+
+    def _release(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        entry = self._frames[session['key']]
+        entry['sessions'].discard(session_id)
+        if not entry['sessions']:
+            del self._frames[session['key']]
+
+    def _enforce_budget(self):
+        """Evict datasets whose sessions are all idle, least recently used first, until frames and derived state fit the budget"""
+        total = sum(entry['bytes'] for entry in self._frames.values())
+        if total <= self.budget_bytes:
+            return
+        now = time.monotonic()
+        idle = []
+        for key, entry in self._frames.items():
+            if not entry['sessions']:
+                continue
+            last_seen = max(self._sessions[session_id]['last_seen'] for session_id in entry['sessions'])
+            # A frame shared with an active session frees nothing when its idle sessions let go
+            if now - last_seen > self.idle_seconds:
+                idle.append((last_seen, key))
+        for _, key in sorted(idle):
+            if total <= self.budget_bytes:
+                break
+            entry = self._frames[key]
+            total -= entry['bytes']
+            evicted = list(entry['sessions'])
+            for session_id in evicted:
+                self._release(session_id)
+            self.evictions += len(evicted)
+            monitor.increment('session_memory.evictions', len(evicted))
+        if total > self.budget_bytes:
+            logger.warning("Session datasets use %.0f MB, over the %.0f MB budget, with no idle session left to evict",
+                           total / 2 ** 20, self.budget_bytes / 2 ** 20)
+
+    def stats(self, session_id=None):
+        """Registry-wide totals, plus what one session holds and how many sessions share it"""
+        with self._lock:
+            stats = {
+                'sessions': len(self._sessions),
+                'datasets': len(self._frames),
+                'total_bytes': sum(entry['bytes'] for entry in self._frames.values()),
+                'budget_bytes': self.budget_bytes,
+                'evictions': self.evictions
+            }
+            session = self._sessions.get(session_id)
+            if session is not None:
+                entry = self._frames[session['key']]
+                stats['session_bytes'] = entry['bytes']
+                stats['shared_with'] = len(entry['sessions']) - 1
+            return stats
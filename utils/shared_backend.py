@@ -0,0 +1,161 @@
+import os
+import time
+import sqlite3
+import threading
+import config
+
+
+class LocalBackend:
+    """In-process key/value backend with the same interface as the shared ones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            self._data[key] = (value, None)
+            return value
+
+    def acquire_lease(self, name, owner, ttl):
+        """Take or renew an exclusive lease; True when `owner` holds it"""
+        with self._lock:
+            holder = self._live(name)
+            if holder is None or holder == owner:
+                self._data[name] = (owner, time.time() + ttl)
+                return True
+            return False
+
+
+class SQLiteBackend:
+    """Key/value backend in a SQLite file on disk shared by every replica"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        con = self._connection()
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        con = getattr(self._local, 'connection', None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.connection = con
+        return con
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl if ttl else None)
+        )
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def incr(self, key):
+        con = self._connection()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            value = int(row[0]) + 1 if row else 1
+            con.execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, NULL)", (key, value))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return value
+
+    def acquire_lease(self, name, owner, ttl):
+        """Take or renew an exclusive lease; True when `owner` holds it"""
+        con = self._connection()
+        now = time.time()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute("SELECT value, expires_at FROM kv WHERE key = ?", (name,)).fetchone()
+            acquired = row is None or row[1] is None or row[1] <= now or row[0] == owner
+            if acquired:
+                con.execute(
+                    "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                    (name, owner, now + ttl)
+                )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return acquired
+
+
+class RedisBackend:
+    """Key/value backend on a Redis-compatible server"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        return self.client.incr(key)
+
+    def acquire_lease(self, name, owner, ttl):
+        """Take or renew an exclusive lease; True when `owner` holds it"""
+        if self.client.set(name, owner, nx=True, ex=int(ttl)):
+            return True
+        holder = self.client.get(name)
+        if holder is not None and holder.decode('utf-8') == owner:
+            self.client.expire(name, int(ttl))
+            return True
+        return False
+
+
+def create_backend(backend_config=None):
+    """Build the configured shared backend"""
+    backend_config = backend_config or config.SHARED_BACKEND_CONFIG
+    kind = backend_config['backend']
+    if kind == 'sqlite':
+        return SQLiteBackend(backend_config['sqlite_path'])
+    if kind == 'redis':
+        return RedisBackend(backend_config['redis_url'])
+    return LocalBackend()
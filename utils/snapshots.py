@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import config
+from utils.profiler import monitor
+from utils import aggregates
+
+
+class SnapshotManager:
+    """Immutable Arrow IPC snapshots of the analyzed dataset, memory-mapped on load"""
+
+    LATEST_FILE = 'LATEST'
+    DATASET_FILE = 'dataset.arrow'
+    META_FILE = 'meta.json'
+    PIN_PREFIX = 'pin-'
+    PRUNING_SUFFIX = '.pruning.tmp'
+
+    def __init__(self, snapshot_dir=None, keep=None):
+        self.snapshot_dir = snapshot_dir or config.STORAGE_CONFIG['snapshot_dir']
+        self.keep = keep or config.STORAGE_CONFIG['snapshots_to_keep']
+        self.pin_seconds = config.STORAGE_CONFIG['snapshot_pin_seconds']
+        self._lock = threading.Lock()
+
+    def write_table(self, df, path):
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # Uncompressed so the file can be memory-mapped without decoding
+        feather.write_feather(table, path, compression='uncompressed')
+
+    @monitor.timed('snapshots.publish')
+    def publish(self, df, dataset_version=0, extra_tables=None):
+        """Write the dataset and its aggregates as a new snapshot and point LATEST at it"""
+        name = f"snapshot-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-v{dataset_version}"
+        final_dir = os.path.join(self.snapshot_dir, name)
+        staging_dir = final_dir + '.tmp'
+
+        tables = aggregates.compute_all(df)
+        tables.update(extra_tables or {})
+
+        with self._lock:
+            os.makedirs(staging_dir, exist_ok=True)
+            self.write_table(df, os.path.join(staging_dir, self.DATASET_FILE))
+            for table_name, table in tables.items():
+                self.write_table(table, os.path.join(staging_dir, f"{table_name}.arrow"))
+            with open(os.path.join(staging_dir, self.META_FILE), 'w') as f:
+                json.dump({
+                    'dataset_version': dataset_version,
+                    'rows': len(df),
+                    'tables': sorted(tables),
+                    'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }, f)
+            os.replace(staging_dir, final_dir)
+
+            # Atomically repoint LATEST, then drop old snapshots
+            latest_tmp = os.path.join(self.snapshot_dir, self.LATEST_FILE + '.tmp')
+            with open(latest_tmp, 'w') as f:
+                f.write(name)
+            os.replace(latest_tmp, os.path.join(self.snapshot_dir, self.LATEST_FILE))
+            self.prune()
+        return final_dir
+
+    def prune(self):
+        """Keep only the newest snapshots; readers holding a mapping keep theirs alive, pinned ones are skipped"""
+        if not os.path.isdir(self.snapshot_dir):
+            return
+        names = sorted(
+            name for name in os.listdir(self.snapshot_dir)
+            if name.startswith('snapshot-') and not name.endswith('.tmp')
+        )
+        # Leftovers of a prune that was interrupted
+        doomed = [name[:-len(self.PRUNING_SUFFIX)] for name in os.listdir(self.snapshot_dir) if name.endswith(self.PRUNING_SUFFIX)]
+        for name in doomed + names[:-self.keep]:
+            path = os.path.join(self.snapshot_dir, name)
+            pruning = path + self.PRUNING_SUFFIX
+            if os.path.isdir(path):
+                if self.is_pinned(path):
+                    continue
+                # Renamed first so a reader pinning it now either fails or leaves its pin where the re-check sees it
+                try:
+                    os.replace(path, pruning)
+                except OSError:
+                    continue
+            if self.is_pinned(pruning):
+                os.replace(pruning, path)
+                continue
+            shutil.rmtree(pruning, ignore_errors=True)
+
+    def is_pinned(self, path):
+        """True when a reader holds a recent pin on a snapshot directory"""
+        now = time.time()
+        try:
+            names = os.listdir(path)
+        except FileNotFoundError:
+            return False
+        for name in names:
+            if not name.startswith(self.PIN_PREFIX):
+                continue
+            try:
+                if now - os.path.getmtime(os.path.join(path, name)) < self.pin_seconds:
+                    return True
+            except FileNotFoundError:
+                continue
+        return False
+
+    @contextmanager
+    def pinned_latest(self, attempts=3):
+        """Yield the newest snapshot directory, kept from being pruned until the block exits, or None"""
+        for _ in range(attempts):
+            path = self.latest_dir()
+            if path is None:
+                break
+            pin = os.path.join(path, f"{self.PIN_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}")
+            try:
+                with open(pin, 'w'):
+                    pass
+            except FileNotFoundError:
+                # Pruned between reading LATEST and pinning; LATEST has moved on
+                continue
+            try:
+                yield path
+            finally:
+                try:
+                    os.remove(pin)
+                except FileNotFoundError:
+                    pass
+            return
+        yield None
+
+    def latest_dir(self):
+        """Directory of the newest snapshot, or None"""
+        try:
+            with open(os.path.join(self.snapshot_dir, self.LATEST_FILE)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        path = os.path.join(self.snapshot_dir, name)
+        return path if os.path.isdir(path) else None
+
+    def read_table(self, path, columns=None):
+        """Memory-map an Arrow IPC file and convert it to pandas without copying numeric buffers"""
+        import pyarrow as pa
+        # The mapping stays open for as long as the returned buffers reference it
+        source = pa.memory_map(path, 'r')
+        table = pa.ipc.open_file(source).read_all()
+        if columns:
+            table = table.select(columns)
+        return table.to_pandas(split_blocks=True)
+
+    def read_meta(self, path):
+        """Metadata of one snapshot directory"""
+        with open(os.path.join(path, self.META_FILE)) as f:
+            return json.load(f)
+
+    def latest_meta(self):
+        """Return (directory, metadata) of the newest snapshot without reading its tables, or None"""
+        path = self.latest_dir()
+        return (path, self.read_meta(path)) if path is not None else None
+
+    @monitor.timed('snapshots.load')
+    def load(self, path, columns=None):
+        """Return (dataset, aggregates, metadata) from one snapshot directory"""
+        meta = self.read_meta(path)
+        df = self.read_table(os.path.join(path, self.DATASET_FILE), columns=columns)
+        tables = {
+            table_name: self.read_table(os.path.join(path, f"{table_name}.arrow"))
+            for table_name in meta['tables']
+        }
+        return df, tables, meta
+
+    def load_latest(self, columns=None):
+        """Return (dataset, aggregates, metadata) from the newest snapshot, or None"""
+        path = self.latest_dir()
+        return self.load(path, columns=columns) if path is not None else None
@@ -0,0 +1,213 @@
+import zlib
+import math
+import threading
+import numpy as np
+import pandas as pd
+import config
+from utils.profiler import monitor
+from utils.search_index import tokenize
+
+
+class StoryClusterer:
+    """Incremental story clustering with hashed TF-IDF vectors and random-hyperplane LSH"""
+
+    def __init__(self, n_features=None, n_tables=None, n_bits=None, threshold=None, max_age_days=None, seed=13):
+        cluster_config = config.CLUSTERING_CONFIG
+        self.n_features = n_features or cluster_config['n_features']
+        self.n_tables = n_tables or cluster_config['n_tables']
+        self.n_bits = n_bits or cluster_config['n_bits']
+        self.threshold = threshold or cluster_config['similarity_threshold']
+        self.max_age = pd.Timedelta(days=max_age_days or cluster_config['max_age_days'])
+
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((self.n_tables, self.n_bits, self.n_features)).astype(np.float32)
+        self.bit_weights = (1 << np.arange(self.n_bits)).astype(np.int64)
+
+        self._lock = threading.Lock()
+        self.doc_freq = np.zeros(self.n_features, dtype=np.float32)
+        self.n_docs = 0
+        self.buckets = [dict() for _ in range(self.n_tables)]
+        # Summed sublinear term frequencies of the clusters still open to new members; IDF is applied
+        # at comparison time so every centroid is weighted by the current document frequencies
+        self.centroids = {}
+        self.newest = None
+        self._swept = None
+        self.stats = {'size': [], 'score_sum': [], 'first_seen': [], 'last_seen': [], 'title': []}
+
+    @property
+    def n_clusters(self):
+        return len(self.stats['size'])
+
+    def hashed_counts(self, text):
+        """Term counts folded into a fixed number of hashed features"""
+        counts = {}
+        for token in tokenize(text):
+            feature = zlib.crc32(token.encode('utf-8')) % self.n_features
+            counts[feature] = counts.get(feature, 0) + 1
+        return counts
+
+    def term_frequencies(self, counts):
+        """Sublinear TF as a dense vector"""
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        for feature, tf in counts.items():
+            vector[feature] = 1 + math.log(tf)
+        return vector
+
+    def idf(self):
+        """Running IDF over every document seen so far"""
+        return np.log((self.n_docs + 1) / (self.doc_freq + 1)) + 1
+
+    @staticmethod
+    def normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    def signatures(self, vector):
+        """One LSH bucket key per table"""
+        bits = (self.planes @ vector) > 0
+        return (bits.astype(np.int64) * self.bit_weights).sum(axis=1)
+
+    def sweep(self):
+        """Close clusters not updated within max_age of the newest article, dropping them from the buckets"""
+        stale = {
+            cluster for cluster in self.centroids
+            if self.newest - self.stats['last_seen'][cluster] > self.max_age
+        }
+        if stale:
+            for cluster in stale:
+                del self.centroids[cluster]
+            for buckets in self.buckets:
+                for key in list(buckets):
+                    members = [cluster for cluster in buckets[key] if cluster not in stale]
+                    if members:
+                        buckets[key] = members
+                    else:
+                        del buckets[key]
+        self._swept = self.newest
+        monitor.increment('clustering.closed', len(stale))
+
+    def assign_one(self, text, title, score, published_at):
+        """Assign one article to its nearest open cluster, or start a new one"""
+        counts = self.hashed_counts(text)
+        for feature in counts:
+            self.doc_freq[feature] += 1
+        self.n_docs += 1
+
+        # Buckets only hold open clusters, so the candidate list stays bounded by recent volume
+        self.newest = published_at if self.newest is None else max(self.newest, published_at)
+        if self._swept is None or self.newest - self._swept >= pd.Timedelta(days=1):
+            self.sweep()
+
+        tf = self.term_frequencies(counts)
+        idf = self.idf()
+        vector = self.normalize(tf * idf)
+        keys = self.signatures(vector)
+
+        candidates = set()
+        for table, key in enumerate(keys):
+            candidates.update(self.buckets[table].get(int(key), ()))
+        candidates = [
+            cluster for cluster in candidates
+            if abs(published_at - self.stats['last_seen'][cluster]) <= self.max_age
+        ]
+
+        best = None
+        if candidates:
+            centroids = self.normalize(np.stack([self.centroids[cluster] for cluster in candidates]) * idf)
+            similarities = centroids @ vector
+            position = int(similarities.argmax())
+            if similarities[position] >= self.threshold:
+                best = candidates[position]
+
+        if best is None:
+            best = self.n_clusters
+            self.centroids[best] = tf
+            self.stats['size'].append(0)
+            self.stats['score_sum'].append(0.0)
+            self.stats['first_seen'].append(published_at)
+            self.stats['last_seen'].append(published_at)
+            self.stats['title'].append(title)
+        else:
+            self.centroids[best] = self.centroids[best] + tf
+
+        self.stats['size'][best] += 1
+        self.stats['score_sum'][best] += score
+        self.stats['first_seen'][best] = min(self.stats['first_seen'][best], published_at)
+        self.stats['last_seen'][best] = max(self.stats['last_seen'][best], published_at)
+
+        # Index the cluster under this member's buckets as well
+        for table, key in enumerate(keys):
+            members = self.buckets[table].setdefault(int(key), [])
+            if not members or members[-1] != best:
+                members.append(best)
+        return best
+
+    def rescore(self, df):
+        """Recompute per-story sentiment sums after the rows' scores were re-derived"""
+        if df.empty or 'story_id' not in df.columns:
+            return
+        sums = df.groupby('story_id')['sentiment_score'].sum()
+        with self._lock:
+            score_sum = np.zeros(self.n_clusters)
+            known = (sums.index >= 0) & (sums.index < self.n_clusters)
+            score_sum[sums.index[known].astype(np.int64)] = sums.to_numpy()[known]
+            self.stats['score_sum'] = score_sum.tolist()
+
+    @monitor.timed('clustering.assign')
+    def assign(self, df):
+        """Assign story ids to newly ingested rows, in publication order"""
+        if df.empty:
+            return np.array([], dtype=np.int64)
+
+        titles = df['title'].fillna('').astype(str)
+        texts = titles
+        if 'description' in df.columns:
+            texts = titles + ' ' + df['description'].fillna('').astype(str)
+        published = pd.to_datetime(df['published_at'])
+        if published.dt.tz is not None:
+            published = published.dt.tz_convert(None)
+        scores = df['sentiment_score'].astype(float).to_numpy()
+
+        story_ids = np.empty(len(df), dtype=np.int64)
+        with self._lock:
+            for position in np.argsort(published.to_numpy(), kind='stable'):
+                story_ids[position] = self.assign_one(
+                    texts.iat[position], titles.iat[position], scores[position], published.iat[position]
+                )
+        monitor.increment('clustering.articles', len(df))
+        return story_ids
+
+    def cluster_frame(self):
+        """Per-story volume, mean sentiment and time span"""
+        with self._lock:
+            frame = pd.DataFrame({
+                'story_id': np.arange(self.n_clusters),
+                'story_title': self.stats['title'],
+                'articles': self.stats['size'],
+                'avg_sentiment': np.asarray(self.stats['score_sum']) / np.maximum(self.stats['size'], 1),
+                'first_seen': self.stats['first_seen'],
+                'last_seen': self.stats['last_seen']
+            })
+        return frame
+
+
+def story_summary(df):
+    """Collapse article rows into one row per story with its volume and sentiment"""
+    if df.empty or 'story_id' not in df.columns:
+        return pd.DataFrame()
+    summary = df.sort_values('published_at').groupby('story_id').agg(
+        title=('title', 'first'),
+        competitors=('competitor', lambda values: ', '.join(sorted(set(values)))),
+        articles=('title', 'size'),
+        sources=('source', 'nunique'),
+        avg_sentiment=('sentiment_score', 'mean'),
+        first_published=('published_at', 'min'),
+        last_published=('published_at', 'max')
+    )
+    return summary.sort_values(['articles', 'last_published'], ascending=False)
+
+
+def competitor_story_stats(df):
+    """Story count and story-weighted mean sentiment per competitor"""
+    per_story = df.groupby(['competitor', 'story_id'])['sentiment_score'].mean()
+    return per_story.groupby(level='competitor').agg(['count', 'mean'])